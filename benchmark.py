@@ -0,0 +1,342 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from chatbot import Chatbot
+from context_window import ContextWindow
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+from mock_server import MockOpenAIServer, lognormal
+from openai_client import OpenAIClient
+from prompt_template import PromptTemplate
+from sections import PipelineConfig
+from turn_record import StringArena
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Metrics compared against a baseline, and whether higher values are better.
+BASELINE_METRICS = {
+    "p50": False,
+    "p95": False,
+    "p99": False,
+    "turns_per_second": True,
+    "peak_memory_mb": False,
+}
+
+
+@dataclass
+class BenchmarkReport:
+    """Results of one benchmark run. Latencies are per turn, in seconds."""
+
+    sessions: int
+    rounds: int
+    turns: int
+    failed: int
+    elapsed: float
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    turns_per_second: float
+    sessions_per_minute: float
+    peak_memory_mb: float
+    server: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Linearly interpolated percentile.
+    Args:
+        values: Samples.
+        q: Percentile in [0, 100].
+    Returns:
+        The percentile, or 0.0 for no samples.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def compare(report: BenchmarkReport, baseline: Dict[str, Any], tolerance: float = 0.10) -> List[str]:
+    """
+    Args:
+        report: Current run.
+        baseline: A stored ``BenchmarkReport.to_dict()``.
+        tolerance: Allowed relative change before a metric counts as regressed.
+    Returns:
+        One message per regressed metric; empty if the run is within tolerance.
+    """
+    current = report.to_dict()
+    regressions = []
+    for metric, higher_is_better in BASELINE_METRICS.items():
+        old, new = baseline.get(metric), current[metric]
+        if not old:
+            continue
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def make_chatbots(client: OpenAIClient, context_tokens: int = 8192) -> List[Chatbot]:
+    """
+    Builds a fresh writer/editor pair using the bundled prompts.
+    Args:
+        client: Shared client.
+        context_tokens: Context window size of each agent.
+    Returns:
+        [writer, editor]
+    """
+    writer_prompt = PromptTemplate.from_file(os.path.join(HERE, "chatbot7.txt"))
+    editor_prompt = PromptTemplate.from_file(os.path.join(HERE, "chatbot6.txt"))
+    return [
+        Chatbot(client, {"buffer": BufferMemory(max_messages=64)}, writer_prompt, name="Miss Writer",
+                context_window=ContextWindow(context_tokens)),
+        Chatbot(client, {"buffer": BufferMemory(max_messages=64)}, editor_prompt, name="Mr.Editor",
+                context_window=ContextWindow(context_tokens)),
+    ]
+
+
+async def run_benchmark(
+    base_url: str,
+    sessions: int = 50,
+    rounds: int = 2,
+    concurrency: int = 32,
+    pipeline: bool = False,
+) -> BenchmarkReport:
+    """
+    Runs ``sessions`` concurrent writer/editor conversations against an OpenAI-compatible server.
+    Args:
+        base_url: API root (e.g. ``MockOpenAIServer.base_url``).
+        sessions: Number of concurrent sessions.
+        rounds: Writer/editor rounds per session.
+        concurrency: ConversationManager's in-flight turn limit.
+        pipeline: Use the pipelined writer/editor topology.
+    Returns:
+        The benchmark report (without server statistics).
+    """
+    latencies: List[float] = []
+    client = OpenAIClient({"OPENAI_API_KEY": "benchmark"}, base_url=base_url, max_connections_per_host=concurrency)
+    manager = ConversationManager(
+        [],
+        max_concurrency=concurrency,
+        chatbot_factory=lambda: make_chatbots(client),
+        pipeline=PipelineConfig() if pipeline else None,
+        on_turn=lambda session_id, agent, latency: latencies.append(latency),
+    )
+    opening = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        async with client:
+            throughput = await manager.run_sessions(
+                ((f"bench-{i}", "Mr.Editor", opening) for i in range(sessions)), rounds
+            )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return BenchmarkReport(
+        sessions=throughput.sessions,
+        rounds=rounds,
+        turns=throughput.turns,
+        failed=throughput.failed + throughput.cancelled,
+        elapsed=throughput.elapsed,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        mean=sum(latencies) / len(latencies) if latencies else 0.0,
+        turns_per_second=throughput.turns_per_second,
+        sessions_per_minute=throughput.sessions_per_minute,
+        peak_memory_mb=peak / (1024 * 1024),
+    )
+
+
+# Same size as the plain (user, message, response) tuples history used to hold.
+_TupleTurn = namedtuple("_TupleTurn", "user message response")
+
+
+class _CopyingArena(StringArena):
+    """The layout before TurnRecord: plain tuples and one decoded copy of each text per structure."""
+
+    def intern(self, text: str) -> str:
+        return text
+
+    def record(self, user: str, message: str, response: Any) -> Any:
+        return _TupleTurn(user, message, response)
+
+    def share(self, value: Any) -> Any:
+        return value
+
+
+class _DraftingClient:
+    """Stands in for the API: every reply is a freshly built string, as a decoded response would be."""
+
+    def __init__(self, chars: int):
+        self.chars = chars
+        self.calls = 0
+        self._filler = "lorem ipsum dolor sit amet " * (chars // 27 + 1)
+
+    async def complete_prompt(self, prompt: Any, **params: Any) -> str:
+        self.calls += 1
+        return f"Reply {self.calls}: {self._filler}"[:self.chars]
+
+
+def measure_turn_memory(turns: int = 200, chars: int = 2000, shared: bool = True, live: bool = False) -> float:
+    """
+    Measures the memory a writer/editor session occupies: both agents' history, buffer
+    memory and context window, after a checkpoint restore or (``live``) after running the
+    turns through a ConversationManager, which adds its in-memory log and session turns.
+    Args:
+        turns: Writer/editor rounds in the session.
+        chars: Approximate length of each message.
+        shared: Use TurnRecord and one StringArena for the session; False reproduces the
+            previous layout (tuples, separate copies in every structure).
+        live: Measure a session as it runs instead of one restored from a checkpoint.
+    Returns:
+        Bytes per turn.
+    """
+
+    def pair(arena: StringArena) -> List[Chatbot]:
+        chatbots = make_chatbots(None, context_tokens=10 ** 8)
+        for chatbot in chatbots:
+            chatbot.arena = arena
+        return chatbots
+
+    if live:
+        return asyncio.run(_measure_live_turn_memory(turns, chars, shared))
+    filler = "lorem ipsum dolor sit amet " * (chars // 27 + 1)
+    writer, editor = pair(StringArena() if shared else _CopyingArena())
+    message = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
+    for round_ in range(turns):
+        draft = f"Draft {round_}: {filler}"[:chars]
+        writer._commit("Mr.Editor", message, draft)
+        message = f"Notes {round_}: {filler}"[:chars]
+        editor._commit("Miss Writer", draft, message)
+    payload = json.dumps([chatbot.snapshot() for chatbot in (writer, editor)])
+    chatbots = pair(StringArena() if shared else _CopyingArena())
+    del writer, editor
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for chatbot, state in zip(chatbots, json.loads(payload)):
+            chatbot.restore(state)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return (after - before) / (2 * turns)
+
+
+async def _measure_live_turn_memory(turns: int, chars: int, shared: bool) -> float:
+    client = _DraftingClient(chars)
+    arena = StringArena() if shared else _CopyingArena()
+
+    def pair() -> List[Chatbot]:
+        chatbots = make_chatbots(client, context_tokens=10 ** 8)
+        for chatbot in chatbots:
+            chatbot.arena = arena
+        return chatbots
+
+    manager = ConversationManager([], chatbot_factory=pair, log_limit=2 * turns)
+    manager._get_session("memory").arena = arena
+    opening = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        await manager.start_conversation("memory", "Mr.Editor", opening, rounds=turns)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    return (after - before) / (2 * turns)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the writer/editor agents against a local mock server.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pipeline", action="store_true", help="Use the pipelined writer/editor topology.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Median time to first token (seconds).")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--completion-tokens", type=int, default=256)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Compare against this stored report; exit 1 on regression.")
+    parser.add_argument("--save-baseline", help="Write this run's report to the given path.")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--turn-memory", type=int, metavar="TURNS",
+                        help="Only report bytes per turn of a restored and of a live session, "
+                             "with and without string sharing.")
+    args = parser.parse_args(argv)
+
+    if args.turn_memory:
+        report = {"turns": 2 * args.turn_memory}
+        for mode, live in (("restored", False), ("live", True)):
+            report[mode] = {
+                "bytes_per_turn_before": round(measure_turn_memory(args.turn_memory, shared=False, live=live)),
+                "bytes_per_turn_after": round(measure_turn_memory(args.turn_memory, live=live)),
+            }
+        print(json.dumps(report, indent=2))
+        return 0
+
+    server = MockOpenAIServer(
+        latency=lognormal(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    server.start_in_thread()
+    try:
+        started = time.perf_counter()
+        report = asyncio.run(
+            run_benchmark(server.base_url, args.sessions, args.rounds, args.concurrency, args.pipeline)
+        )
+    finally:
+        server.stop_thread()
+    report.server = asdict(server.stats)
+    print(json.dumps(report.to_dict(), indent=2))
+    print(f"Finished in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
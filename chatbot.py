@@ -1,4 +1,8 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from context_window import ContextWindow
+from metrics import NULL_TRACER
+from turn_record import StringArena, TurnRecord
 
 class Chatbot:
     """
@@ -11,31 +15,215 @@ class Chatbot:
         openai_client: Any,
         memory_modules: Dict[str, Any],
         prompt_template: Any,
+        name: Optional[str] = None,
+        context_window: Optional[ContextWindow] = None,
+        embedder: Optional[Any] = None,
+        recall_k: int = 3,
+        tracer: Any = NULL_TRACER,
+        arena: Optional[StringArena] = None,
     ):
         """
         Args:
             openai_client: Instance of OpenAIClient or compatible async client.
-            memory_modules: Dict of memory modules (e.g., buffer, vector).
-            prompt_template: Prompt template object with a .format(**kwargs) method.
+            memory_modules: Dict of memory modules (e.g., buffer, vector, summary). A
+                SummaryMemory under "summary" keeps older turns as a rolling summary.
+            prompt_template: Prompt template object with a .format(**kwargs) method
+                (e.g. PromptTemplate, whose cached token count is then used for budgeting).
+            name: Agent name used when this chatbot speaks in a conversation.
+            context_window: Token-budgeted window of the messages sent to the model.
+            embedder: Optional object with async embed_many(texts) (e.g. EmbeddingBatcher);
+                when set, turns are written to the "vector" memory and relevant ones recalled.
+            recall_k: Number of past turns recalled from vector memory per message.
+            tracer: metrics.Tracer recording prompt assembly, memory and completion spans.
+            arena: String arena shared by the session's agents; history, buffer memory and
+                the context window keep the arena's copy of each message.
         """
         self.openai_client = openai_client
         self.memory_modules = memory_modules
         self.prompt_template = prompt_template
-        self.history: Optional[List[Any]] = []
+        self.name = name
+        self.history: Optional[List[TurnRecord]] = []
+        self.context = context_window if context_window is not None else ContextWindow()
+        self.embedder = embedder
+        self.recall_k = recall_k
+        self.tracer = tracer
+        self.arena = arena if arena is not None else StringArena()
+        summary = memory_modules.get("summary") if isinstance(memory_modules, dict) else None
+        if summary is not None:
+            summary.bind(self.context)
 
-    async def send_message(self, user: str, message: str) -> Any:
+    async def send_message(
+        self, user: str, message: str, extra: Optional[List[Dict[str, str]]] = None, **params: Any
+    ) -> Any:
         """
         Sends a message as the agent, updates memory and history, and returns the response.
         Args:
             user: The user sending the message.
             message: The message content.
+            extra: Optional messages sent with this request only (e.g. the current draft);
+                they are not added to history or the context window.
+            **params: Extra completion parameters (temperature, seed, ...).
         Returns:
             The response from the agent (e.g., OpenAI completion).
         """
+        with self.tracer.span("chatbot.send_message", agent=self.name):
+            prompt, embedding = await self._prepare(user, message, extra)
+            response = await self.openai_client.complete_prompt(prompt, **params)
+            self._commit(user, message, response)
+            await self._remember(message, embedding, response)
+            return response
+
+    async def draft(self, user: str, message: str, **params: Any) -> Any:
+        """
+        Generates a candidate response without touching history or memory.
+        Several drafts can run concurrently; the chosen one is committed with ``accept``.
+        Args:
+            user: The user sending the message.
+            message: The message content.
+            **params: Extra completion parameters (temperature, seed, ...).
+        Returns:
+            The candidate response.
+        """
+        with self.tracer.span("chatbot.draft", agent=self.name):
+            prompt, _ = await self._prepare(user, message)
+            return await self.openai_client.complete_prompt(prompt, **params)
+
+    async def accept(self, user: str, message: str, response: Any) -> None:
+        """
+        Commits a response produced outside ``send_message`` (e.g. a chosen draft).
+        Args:
+            user: The user who sent the message.
+            message: The message content.
+            response: The response to record.
+        """
+        if self.history is None:
+            raise TypeError("Conversation history is corrupted (None).")
+        self._commit(user, message, response)
+        if self.embedder is not None and "vector" in self.memory_modules:
+            (embedding,) = await self.embedder.embed_many([message])
+            await self._remember(message, embedding, response)
+
+    async def send_message_stream(
+        self, user: str, message: str, extra: Optional[List[Dict[str, str]]] = None, **params: Any
+    ) -> AsyncIterator[str]:
+        """
+        Sends a message as the agent and yields the response incrementally.
+        Memory and history are updated with the full text once the stream completes;
+        an abandoned stream leaves them untouched.
+        Args:
+            user: The user sending the message.
+            message: The message content.
+            extra: Optional messages sent with this request only (e.g. the current draft);
+                they are not added to history or the context window.
+            **params: Extra completion parameters (temperature, seed, ...).
+        Returns:
+            An async iterator of response deltas.
+        """
+        # The span stays open until the stream is consumed, so it covers the whole turn.
+        with self.tracer.span("chatbot.send_message_stream", agent=self.name):
+            prompt, embedding = await self._prepare(user, message, extra)
+            parts: List[str] = []
+            async for delta in self.openai_client.stream_prompt(prompt, **params):
+                parts.append(delta)
+                yield delta
+            response = "".join(parts)
+            self._commit(user, message, response)
+            await self._remember(message, embedding, response)
+
+    def snapshot(self, include_history: bool = True) -> Dict[str, Any]:
+        """
+        Captures the conversation state for checkpointing: the context window, the memory
+        modules that support snapshots (buffer, summary) and, optionally, the full history.
+        Vector memory is not included; persist it separately with ``VectorStoreMemory.save``.
+        Args:
+            include_history: Whether to include ``history`` (callers may store it incrementally).
+        Returns:
+            A JSON-serialisable dict.
+        """
+        state: Dict[str, Any] = {
+            "context": self.context.snapshot(),
+            "memory": {
+                name: module.snapshot() for name, module in self.memory_modules.items() if hasattr(module, "snapshot")
+            },
+        }
+        if include_history:
+            state["history"] = [list(entry) for entry in self.history or []]
+        return state
+
+    def restore(self, state: Dict[str, Any], history: Optional[List[Any]] = None) -> None:
+        """
+        Restores state captured by ``snapshot``. Texts are deduplicated through ``arena``,
+        so the restored history, context window and memories share one copy of each message.
+        Args:
+            state: A dict produced by ``snapshot``.
+            history: History entries to use when the snapshot was taken without them.
+        """
+        entries = state.get("history", history)
+        if entries is not None:
+            self.history = [self.arena.record(*entry) for entry in entries]
+        state = self.arena.share(state)
+        self.context.restore(state["context"])
+        for name, module_state in state.get("memory", {}).items():
+            module = self.memory_modules.get(name)
+            if hasattr(module, "restore"):
+                module.restore(module_state)
+
+    async def _prepare(
+        self, user: str, message: str, extra: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[List[Dict[str, str]], Optional[List[float]]]:
         if self.history is None:
             raise TypeError("Conversation history is corrupted (None).")
-        prompt = self.prompt_template.format(user=user)
-        response = await self.openai_client.complete_prompt(prompt)
-        self.memory_modules["buffer"].add_message(message)
-        self.history.append((user, message, response))
-        return response
\ No newline at end of file
+        with self.tracer.span("chatbot.prepare"):
+            vector_memory = self.memory_modules.get("vector") if self.embedder is not None else None
+            if vector_memory is None:
+                return self._build_prompt(user, message, extra), None
+            with self.tracer.span("memory.embed"):
+                (embedding,) = await self.embedder.embed_many([message])
+            with self.tracer.span("memory.recall"):
+                recalled = self._recall(vector_memory, embedding)
+            return self._build_prompt(user, message, recalled + (extra or [])), embedding
+
+    def _recall(self, vector_memory: Any, embedding: List[float]) -> List[Dict[str, str]]:
+        if self.recall_k <= 0 or not len(vector_memory):
+            return []
+        in_window = {m["content"] for m in self.context}
+        snippets = [
+            text for text, _ in vector_memory.search(embedding, k=self.recall_k)
+            if isinstance(text, str) and text not in in_window
+        ]
+        if not snippets:
+            return []
+        return [{"role": "system", "content": "Relevant earlier turns:\n" + "\n---\n".join(snippets)}]
+
+    async def _remember(self, message: str, embedding: Optional[List[float]], response: Any) -> None:
+        if embedding is None or not isinstance(response, str):
+            return
+        with self.tracer.span("memory.remember"):
+            (response_embedding,) = await self.embedder.embed_many([response])
+            vector_memory = self.memory_modules["vector"]
+            vector_memory.add_vector(embedding, self.arena.intern(message))
+            vector_memory.add_vector(response_embedding, self.arena.intern(response))
+
+    def _build_prompt(
+        self, user: str, message: str, recalled: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        with self.tracer.span("chatbot.build_prompt") as span:
+            system_prompt = self.prompt_template.format(user=user)
+            count_tokens = getattr(self.prompt_template, "count_tokens", None)
+            system_tokens = count_tokens(user=user) if count_tokens is not None else None
+            prompt = self.context.build(system_prompt, {"role": "user", "content": message}, recalled, system_tokens)
+            span.set("messages", len(prompt))
+            return prompt
+
+    def _commit(self, user: str, message: str, response: Any) -> None:
+        # One stored copy per text: the history record, buffer and window share the arena's strings.
+        record = self.arena.record(user, message, response)
+        self.memory_modules["buffer"].add_message(record.message)
+        self.history.append(record)
+        # Only now, with the call successful, drop what the prompt had to leave out.
+        self.context.apply_trim()
+        self.context.append("user", record.message)
+        self.context.append("assistant", record.response)
+        summary = self.memory_modules.get("summary")
+        if summary is not None:
+            summary.update()
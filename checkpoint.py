@@ -0,0 +1,101 @@
+import json
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class CheckpointStore:
+    """
+    Durable SQLite store for conversation sessions. Each session has one compressed state
+    snapshot (bounded data such as context windows and buffers) plus append-only entry
+    streams (turns, per-chatbot history) so a checkpoint only writes what changed. A
+    snapshot and its new entries are committed in one transaction, so a crash leaves the
+    session at its last complete turn.
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL"):
+        """
+        Args:
+            path: SQLite file (":memory:" for tests).
+            synchronous: SQLite ``synchronous`` pragma; "FULL" also survives power loss.
+        """
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(session_id TEXT PRIMARY KEY, turn INTEGER NOT NULL, state BLOB NOT NULL, updated REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (session_id TEXT NOT NULL, stream TEXT NOT NULL, "
+            "seq INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (session_id, stream, seq))"
+        )
+        self._db.commit()
+
+    def save(self, session_id: str, turn: int, state: Dict[str, Any], entries: Iterable[Tuple[str, int, Any]] = ()) -> None:
+        """
+        Atomically writes a session's snapshot and appends new stream entries.
+        Args:
+            session_id: Session identifier.
+            turn: Number of committed turns.
+            state: JSON-serialisable snapshot.
+            entries: (stream, seq, value) rows to append.
+        """
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, turn, state, updated) VALUES (?, ?, ?, ?)",
+                (session_id, turn, _pack(state), time.time()),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (session_id, stream, seq, data) VALUES (?, ?, ?, ?)",
+                [(session_id, stream, seq, _pack(value)) for stream, seq, value in entries],
+            )
+
+    def load(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Args:
+            session_id: Session identifier.
+        Returns:
+            (turn, state), or None if the session was never checkpointed.
+        """
+        row = self._db.execute("SELECT turn, state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return None if row is None else (row[0], _unpack(row[1]))
+
+    def entries(self, session_id: str, stream: str) -> List[Any]:
+        """
+        Args:
+            session_id: Session identifier.
+            stream: Stream name.
+        Returns:
+            The stream's values in sequence order.
+        """
+        rows = self._db.execute(
+            "SELECT data FROM entries WHERE session_id = ? AND stream = ? ORDER BY seq", (session_id, stream)
+        )
+        return [_unpack(data) for (data,) in rows]
+
+    def session_ids(self) -> List[str]:
+        return [row[0] for row in self._db.execute("SELECT session_id FROM sessions ORDER BY updated")]
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._db.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone() is not None
+
+    def delete(self, session_id: str) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM entries WHERE session_id = ?", (session_id,))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
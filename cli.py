@@ -0,0 +1,137 @@
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OPENING = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
+
+# Only argparse is imported up front: the agent stack (asyncio, HTTP transport, memory,
+# checkpointing) is loaded once the arguments are known, so --help and short-lived batch
+# workers do not pay for modules they never use.
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run the Miss Writer / Mr.Editor conversation.")
+    parser.add_argument("--rounds", type=int, default=10, help="writer/editor rounds (default 10)")
+    parser.add_argument("--message", default=OPENING, help="opening message from Miss Writer")
+    parser.add_argument("--session", default="sim", help="session id (used for logs and checkpoints)")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible API root, e.g. a local mock server")
+    parser.add_argument("--env-file", default=None, help=".env file with OPENAI_API_KEY and other settings")
+    parser.add_argument("--key-file", default=os.path.join(HERE, "openaiapikey2.txt"),
+                        help="fallback file holding the API key (default openaiapikey2.txt)")
+    parser.add_argument("--writer-prompt", default=os.path.join(HERE, "chatbot7.txt"))
+    parser.add_argument("--editor-prompt", default=os.path.join(HERE, "chatbot6.txt"))
+    parser.add_argument("--context-tokens", type=int, default=8192, help="context window per agent")
+    parser.add_argument("--log-dir", default=None, help="directory for per-session JSONL logs")
+    parser.add_argument("--checkpoint", default=None, help="SQLite checkpoint file; an interrupted run resumes")
+    parser.add_argument("--drafts", action="store_true", help="diff-based drafts: the writer sends section patches")
+    parser.add_argument("--pipeline", action="store_true", help="editor critiques sections while the writer streams")
+    return parser
+
+
+def load_config(args: argparse.Namespace) -> Any:
+    """
+    Args:
+        args: Parsed arguments.
+    Returns:
+        A ConfigManager, or a plain mapping with the key from ``--key-file`` when neither the
+        environment nor ``--env-file`` provides OPENAI_API_KEY.
+    Raises:
+        KeyError: If no API key can be found.
+    """
+    from config_manager import ConfigManager
+
+    config = ConfigManager(args.env_file)
+    if "OPENAI_API_KEY" in config.snapshot:
+        return config
+    if args.key_file and os.path.exists(args.key_file):
+        with open(args.key_file, encoding="utf-8") as f:
+            return {"OPENAI_API_KEY": f.read().strip()}
+    raise KeyError("OPENAI_API_KEY is not set and no key file was found.")
+
+
+async def run(args: argparse.Namespace, out: Any = None) -> int:
+    """
+    Runs the conversation round by round, printing each turn as it completes.
+    Args:
+        args: Parsed arguments.
+        out: Text stream for the transcript (defaults to stdout).
+    Returns:
+        Process exit code.
+    """
+    from chatbot import Chatbot
+    from context_window import ContextWindow
+    from conversation_manager import ConversationManager
+    from memory import BufferMemory
+    from openai_client import DEFAULT_BASE_URL, OpenAIClient
+    from prompt_template import PromptTemplate
+
+    out = out or sys.stdout
+    client = OpenAIClient(load_config(args), model=args.model, base_url=args.base_url or DEFAULT_BASE_URL)
+    writer_prompt = PromptTemplate.from_file(args.writer_prompt)
+    editor_prompt = PromptTemplate.from_file(args.editor_prompt)
+
+    def chatbots() -> List[Chatbot]:
+        return [
+            Chatbot(client, {"buffer": BufferMemory(max_messages=64)}, writer_prompt, name="Miss Writer",
+                    context_window=ContextWindow(args.context_tokens)),
+            Chatbot(client, {"buffer": BufferMemory(max_messages=64)}, editor_prompt, name="Mr.Editor",
+                    context_window=ContextWindow(args.context_tokens)),
+        ]
+
+    options: Dict[str, Any] = {}
+    if args.checkpoint:
+        from checkpoint import CheckpointStore
+
+        options["checkpoint"] = CheckpointStore(args.checkpoint)
+    if args.drafts:
+        from draft_document import DraftConfig
+
+        options["drafts"] = DraftConfig()
+    if args.pipeline:
+        from sections import PipelineConfig
+
+        options["pipeline"] = PipelineConfig()
+    manager = ConversationManager([], chatbot_factory=chatbots, log_dir=args.log_dir, **options)
+
+    def show(turns: List[Any]) -> None:
+        for speaker, text in turns:
+            print(f"{speaker}: {text}\n", file=out, flush=True)
+
+    try:
+        async with client:
+            speaker, message = "Mr.Editor", args.message
+            rounds = args.rounds
+            turns = []
+            if manager.checkpoint is not None:
+                show(await manager.resume(args.session))
+                turns = manager.sessions[args.session].turns
+            if turns:
+                speaker, message = turns[-1]
+                # Rounds already completed by an earlier run count towards --rounds.
+                rounds -= len(turns) // 2
+            else:
+                # As in sim3, the opening is Miss Writer's introduction.
+                print(f"Miss Writer: {message}\n", file=out, flush=True)
+            for _ in range(max(rounds, 0)):
+                turns = await manager.start_conversation(args.session, speaker, message)
+                show(turns)
+                speaker, message = turns[-1]
+    finally:
+        await manager.close()
+        if manager.checkpoint is not None:
+            manager.checkpoint.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    import asyncio
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
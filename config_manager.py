@@ -1,29 +1,128 @@
+import asyncio
 import os
-from typing import Optional, Dict
+import re
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from rate_limiter import parse_reset
+
+_MISSING = object()
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+class ConfigError(ValueError):
+    """Raised when a config file is malformed or a value does not have the expected type."""
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable view of the configuration at one point in time: defaults, then config
+    files in order, then environment variables, later layers winning. Reloads replace
+    the whole snapshot, so readers never see a half-applied change and need no lock.
+    """
+
+    values: Mapping[str, str] = field(default_factory=dict)
+    version: int = 0
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "values", MappingProxyType(dict(self.values)))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        """
+        Args:
+            key: The configuration key.
+            default: Returned when the key is missing; without it a KeyError is raised.
+        Returns:
+            The raw string value.
+        Raises:
+            KeyError: If the key is missing and no default is given.
+        """
+        if key in self.values:
+            return self.values[key]
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def get_int(self, key: str, default: Any = _MISSING) -> int:
+        return self._typed(key, default, int, "an integer")
+
+    def get_float(self, key: str, default: Any = _MISSING) -> float:
+        return self._typed(key, default, float, "a number")
+
+    def get_bool(self, key: str, default: Any = _MISSING) -> bool:
+        return self._typed(key, default, _parse_bool, "a boolean")
+
+    def get_duration(self, key: str, default: Any = _MISSING) -> float:
+        """
+        Args:
+            key: The configuration key, holding seconds or a duration such as ``"1m30s"`` or ``"250ms"``.
+            default: Returned when the key is missing.
+        Returns:
+            The duration in seconds.
+        Raises:
+            KeyError: If the key is missing and no default is given.
+            ConfigError: If the value is not a duration.
+        """
+        return self._typed(key, default, _parse_duration, "a duration")
+
+    def _typed(self, key: str, default: Any, convert: Callable[[str], Any], expected: str) -> Any:
+        value = self.get(key, default)
+        if value is default and key not in self.values:
+            return default
+        try:
+            return convert(value.strip())
+        except ValueError:
+            raise ConfigError(f"{key}={value!r} is not {expected}.") from None
+
 
 class ConfigManager:
     """
     Securely loads and manages configuration values and secrets from environment variables or config files.
-    All state is instance-based.
+    All state is instance-based. Files are parsed once into a ConfigSnapshot; ``reload``
+    (or ``watch`` for on-change reloads) swaps in a new snapshot and notifies subscribers,
+    so values such as the API key can be rotated without restarting or dropping requests.
     """
 
-    def __init__(self, env_file: Optional[str] = None):
+    def __init__(
+        self,
+        env_file: Optional[str] = None,
+        defaults: Optional[Mapping[str, Any]] = None,
+        files: Sequence[str] = (),
+        environ: Optional[Mapping[str, str]] = None,
+    ):
         """
         Args:
             env_file: Optional path to a .env file for config values.
+            defaults: Lowest-priority values.
+            files: Further .env files layered over ``env_file``, later files winning.
+            environ: Environment mapping, highest priority (defaults to ``os.environ``).
+        Raises:
+            ConfigError: If a config file is malformed.
+            OSError: If a config file cannot be read.
         """
         self.env_file = env_file
+        self.files: List[str] = ([env_file] if env_file else []) + list(files)
+        self.defaults: Dict[str, str] = {key: str(value) for key, value in (defaults or {}).items()}
+        self.environ = environ if environ is not None else os.environ
         self.config: Dict[str, str] = {}
-        if env_file:
-            try:
-                with open(env_file) as f:
-                    for line in f:
-                        if "=" in line:
-                            k, v = line.strip().split("=", 1)
-                            self.config[k] = v
-            except Exception:
-                pass  # Ignore file errors in skeleton
-        # Do NOT overlay with environment variables here; handled in get()
+        self._snapshot = ConfigSnapshot()
+        self._subscribers: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        self._stamps: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """The current snapshot; hold on to it to read a consistent set of values."""
+        return self._snapshot
 
     def get(self, key: str) -> str:
         """
@@ -36,8 +135,133 @@ class ConfigManager:
             KeyError: If the key is not found.
         """
         # First check environment variable, then fallback to file config
-        if key in os.environ:
-            return os.environ[key]
+        if key in self.environ:
+            return self.environ[key]
         if key in self.config:
             return self.config[key]
-        raise KeyError(key)
\ No newline at end of file
+        raise KeyError(key)
+
+    def reload(self) -> bool:
+        """
+        Re-reads every layer and atomically swaps in a new snapshot. If a file is malformed
+        the previous configuration stays in effect.
+        Returns:
+            True if any value changed.
+        Raises:
+            ConfigError: If a config file is malformed.
+            OSError: If a config file cannot be read.
+        """
+        with self._lock:
+            config = dict(self.defaults)
+            stamps = {}
+            for path in self.files:
+                config.update(parse_env_file(path))
+                stamps[path] = _stamp(path)
+            old = self._snapshot
+            new = ConfigSnapshot({**config, **self.environ}, old.version + 1)
+            self.config, self._snapshot, self._stamps = config, new, stamps
+            subscribers = list(self._subscribers)
+        changed = new.values != old.values
+        if changed and old.version:
+            for callback in subscribers:
+                callback(old, new)
+        return changed
+
+    def check(self) -> bool:
+        """
+        Reloads if a config file was modified since the last load.
+        Returns:
+            True if the files changed and were reloaded.
+        """
+        if all(_stamp(path) == self._stamps.get(path) for path in self.files):
+            return False
+        self.reload()
+        return True
+
+    async def watch(self, interval: float = 1.0, on_error: Optional[Callable[[Exception], None]] = None) -> None:
+        """
+        Polls the config files and reloads on change until cancelled. A file that fails to
+        parse (e.g. caught mid-write) is retried on the next poll.
+        Args:
+            interval: Seconds between polls.
+            on_error: Optional callback for reload errors.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.check()
+            except (ConfigError, OSError) as exc:
+                if on_error is not None:
+                    on_error(exc)
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], None]) -> Callable[[], None]:
+        """
+        Registers ``callback(old, new)``, called after every reload that changes a value.
+        Args:
+            callback: Change listener.
+        Returns:
+            A function that unsubscribes the callback.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+
+def parse_env_file(path: str) -> Dict[str, str]:
+    """
+    Parses a .env file: ``KEY=value`` lines, optionally prefixed with ``export``, with
+    ``#`` comments, blank lines and single or double quotes around values.
+    Args:
+        path: File path.
+    Returns:
+        The key/value pairs.
+    Raises:
+        ConfigError: If a line is not a valid assignment.
+        OSError: If the file cannot be read.
+    """
+    values: Dict[str, str] = {}
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("export "):
+                line = line[7:].lstrip()
+            key, sep, value = line.partition("=")
+            key, value = key.strip(), value.strip()
+            if not sep or not _KEY.match(key):
+                raise ConfigError(f"{path}:{number}: expected KEY=value, got {line!r}.")
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            values[key] = value
+    return values
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise ValueError(value)
+
+
+def _parse_duration(value: str) -> float:
+    seconds = parse_reset(value)
+    if seconds is None or seconds < 0:
+        raise ValueError(value)
+    return seconds
+
+
+def _stamp(path: str) -> Tuple[float, int]:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return (0.0, -1)
+    return (info.st_mtime, info.st_size)
@@ -0,0 +1,223 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from token_counter import MESSAGE_OVERHEAD, TokenCounter
+
+Message = Dict[str, str]
+
+
+class ContextOverflowError(ValueError):
+    """Raised when the system prompt, summary and pending message alone exceed the budget."""
+
+
+class ContextWindow:
+    """
+    Token-aware sliding window over a conversation. Every message is counted once when it
+    is appended and the running total is maintained incrementally. ``build`` leaves out the
+    oldest messages that do not fit the budget without touching the window; once the request
+    succeeded, ``apply_trim`` evicts them (handing them to ``on_evict``, e.g. for
+    summarization), so a failed call loses no history.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8192,
+        reserve_tokens: int = 1024,
+        token_counter: Optional[TokenCounter] = None,
+        on_evict: Optional[Callable[[List[Message]], Any]] = None,
+    ):
+        """
+        Args:
+            max_tokens: Model context size the assembled request must fit into.
+            reserve_tokens: Tokens kept free for the completion.
+            token_counter: Counter used for every message; defaults to TokenCounter().
+            on_evict: Optional callback receiving messages dropped from the window.
+        """
+        if reserve_tokens >= max_tokens:
+            raise ValueError("reserve_tokens must be smaller than max_tokens.")
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.token_counter = token_counter or TokenCounter()
+        self.on_evict = on_evict
+        self.total_tokens = 0
+        self.summary: Optional[Message] = None
+        self._summary_tokens = 0
+        self._messages: Deque[Tuple[Message, int]] = deque()
+        self._system: Optional[Tuple[str, int]] = None
+        # Tokens the last build left for the window, consumed by apply_trim.
+        self._window_budget: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return (message for message, _ in self._messages)
+
+    @property
+    def budget(self) -> int:
+        return self.max_tokens - self.reserve_tokens
+
+    def append(self, role: str, content: str) -> int:
+        """
+        Adds a message, counting its tokens once.
+        Args:
+            role: Chat role ("user", "assistant", ...).
+            content: Message text.
+        Returns:
+            The message's token count.
+        """
+        message = {"role": role, "content": content}
+        tokens = self.token_counter.count_message(message)
+        self._messages.append((message, tokens))
+        self.total_tokens += tokens
+        return tokens
+
+    def set_summary(self, text: Optional[str]) -> None:
+        """
+        Sets the summary of evicted turns, sent right after the system prompt.
+        Args:
+            text: Summary text, or None to clear it.
+        """
+        if text:
+            self.summary = {"role": "system", "content": f"Summary of earlier conversation:\n{text}"}
+            self._summary_tokens = self.token_counter.count_message(self.summary)
+        else:
+            self.summary = None
+            self._summary_tokens = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            JSON-serialisable state: the messages with their token counts and the summary.
+        """
+        return {
+            "messages": [[message, tokens] for message, tokens in self._messages],
+            "summary": self.summary,
+            "summary_tokens": self._summary_tokens,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Replaces the window's contents with a ``snapshot``; stored token counts are reused.
+        Args:
+            state: A dict produced by ``snapshot``.
+        """
+        self._messages = deque((dict(message), int(tokens)) for message, tokens in state["messages"])
+        self.total_tokens = sum(tokens for _, tokens in self._messages)
+        self.summary = state.get("summary")
+        self._summary_tokens = state.get("summary_tokens", 0) if self.summary else 0
+
+    def build(
+        self,
+        system_prompt: Optional[str] = None,
+        pending: Optional[Message] = None,
+        extra: Optional[List[Message]] = None,
+        system_tokens: Optional[int] = None,
+    ) -> List[Message]:
+        """
+        Assembles the outgoing message list, leaving out the oldest messages (and then any
+        ``extra`` messages) that do not fit the budget. The window itself is not modified;
+        call ``apply_trim`` once the request succeeded.
+        Args:
+            system_prompt: Optional system prompt placed first.
+            pending: Optional message to send that is not yet part of the window.
+            extra: Optional per-request context (e.g. recalled memories) placed before the window.
+            system_tokens: Precomputed token count of the system prompt (e.g. from PromptTemplate).
+        Returns:
+            The messages for the request: system prompt, summary, extra, window, pending message.
+        Raises:
+            ContextOverflowError: If the system prompt, summary and pending message alone
+                exceed the budget.
+        """
+        if system_tokens is None:
+            system_tokens = self._system_tokens(system_prompt)
+        elif system_prompt is not None:
+            system_tokens += MESSAGE_OVERHEAD
+        fixed = system_tokens + self._summary_tokens
+        if pending is not None:
+            fixed += self.token_counter.count_message(pending)
+        if fixed > self.budget:
+            raise ContextOverflowError(
+                f"The system prompt, summary and message need {fixed} tokens; the budget is {self.budget}."
+            )
+        kept_extra: List[Message] = []
+        for message in extra or ():
+            tokens = self.token_counter.count_message(message)
+            if fixed + tokens > self.budget:
+                break
+            fixed += tokens
+            kept_extra.append(message)
+        self._window_budget = self.budget - fixed
+        messages: List[Message] = []
+        if system_prompt is not None:
+            messages.append({"role": "system", "content": system_prompt})
+        if self.summary is not None:
+            messages.append(self.summary)
+        messages.extend(kept_extra)
+        skip = self._excess(self._window_budget)
+        messages.extend(message for message, _ in islice(self._messages, skip, None))
+        if pending is not None:
+            messages.append(pending)
+        return messages
+
+    def apply_trim(self) -> List[Message]:
+        """
+        Evicts the oldest messages the last ``build`` left out of its request; call it once
+        that request succeeded.
+        Returns:
+            The evicted messages, oldest first.
+        """
+        budget, self._window_budget = self._window_budget, None
+        return self.trim(budget) if budget is not None else []
+
+    def trim(self, budget: int) -> List[Message]:
+        """
+        Evicts the oldest messages until the window fits ``budget`` tokens.
+        Args:
+            budget: Tokens available to the window.
+        Returns:
+            The evicted messages, oldest first.
+        """
+        evicted: List[Message] = []
+        while self._messages and self.total_tokens > budget:
+            message, tokens = self._messages.popleft()
+            self.total_tokens -= tokens
+            evicted.append(message)
+        if evicted and self.on_evict is not None:
+            self.on_evict(evicted)
+        return evicted
+
+    def evict(self, count: int) -> List[Message]:
+        """
+        Removes the ``count`` oldest messages without calling ``on_evict`` (e.g. once a
+        summary covering them is installed).
+        Args:
+            count: Number of messages to remove.
+        Returns:
+            The removed messages, oldest first.
+        """
+        removed: List[Message] = []
+        while self._messages and len(removed) < count:
+            message, tokens = self._messages.popleft()
+            self.total_tokens -= tokens
+            removed.append(message)
+        return removed
+
+    def _excess(self, budget: int) -> int:
+        # Number of oldest messages that must go for the window to fit ``budget`` tokens.
+        skip, total = 0, self.total_tokens
+        for _, tokens in self._messages:
+            if total <= budget:
+                break
+            total -= tokens
+            skip += 1
+        return skip
+
+    def _system_tokens(self, system_prompt: Optional[str]) -> int:
+        if system_prompt is None:
+            return 0
+        # The system prompt is usually identical every turn; count it only when it changes.
+        if self._system is None or (self._system[0] is not system_prompt and self._system[0] != system_prompt):
+            self._system = (system_prompt, self.token_counter.count_message({"content": system_prompt}))
+        return self._system[1]
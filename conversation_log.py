@@ -0,0 +1,249 @@
+import asyncio
+import glob
+import gzip
+import json
+import os
+import shutil
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+FSYNC_POLICIES = ("never", "rotate", "always")
+
+
+class ConversationLogWriter:
+    """
+    Long-lived, buffered, append-only JSONL writer with size/time based rotation.
+    One record per line; rotated segments are renamed ``<path>.<n>`` (optionally
+    gzip-compressed to ``<path>.<n>.gz``) so ``iter_records`` can replay them in order.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: Optional[float] = None,
+        compress: bool = False,
+        fsync: str = "never",
+        buffer_size: int = 64 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            path: Active log file path.
+            max_bytes: Rotate once the active segment reaches this size.
+            max_age: Rotate once the active segment is older than this many seconds.
+            compress: Gzip rotated segments.
+            fsync: "never", "rotate" (fsync before rotating/closing) or "always" (after every record).
+            buffer_size: Write buffer size in bytes.
+            clock: Wall clock, injectable for tests.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}.")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+        self._clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._open()
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Appends one record, rotating first if the active segment is full or too old.
+        Args:
+            record: JSON-serialisable record.
+        """
+        if self._file is None:
+            raise ValueError("Log writer is closed.")
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        if self._size and (
+            self._size + len(line) > self.max_bytes
+            or (self.max_age is not None and self._clock() - self._opened_at >= self.max_age)
+        ):
+            self.rotate()
+        self._file.write(line)
+        self._size += len(line)
+        if self.fsync == "always":
+            self._sync()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def rotate(self) -> Optional[str]:
+        """
+        Closes the active segment and starts a new one.
+        Returns:
+            Path of the rotated segment, or None if the active segment was empty.
+        """
+        if self._file is None or self._size == 0:
+            return None
+        if self.fsync != "never":
+            self._sync()
+        self._file.close()
+        target = f"{self.path}.{_next_index(self.path)}"
+        os.replace(self.path, target)
+        if self.compress:
+            with open(target, "rb") as src, gzip.open(target + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(target)
+            target += ".gz"
+        self._open()
+        return target
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        if self.fsync != "never":
+            self._sync()
+        self._file.close()
+        self._file = None
+
+    def _open(self) -> None:
+        self._file = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = self._file.tell()
+        self._opened_at = self._clock()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class AsyncLogWriter:
+    """
+    Background writer for use inside an event loop: ``write`` only enqueues, and a task
+    drains the queue in batches, doing the file I/O in a worker thread.
+    """
+
+    def __init__(self, writer: ConversationLogWriter, max_queue: int = 10000):
+        """
+        Args:
+            writer: Underlying synchronous writer (owned by this object from now on).
+            max_queue: Maximum queued records; ``write`` waits when the queue is full.
+        """
+        self.writer = writer
+        self._queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(max_queue)
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def __aenter__(self) -> "AsyncLogWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def write(self, record: Dict[str, Any]) -> None:
+        self.start()
+        await self._queue.put(record)
+
+    async def flush(self) -> None:
+        """
+        Waits until every queued record has been written and flushed.
+        Raises:
+            OSError: If the background writer failed.
+        """
+        if self._task is None:
+            return
+        drained = asyncio.ensure_future(self._queue.join())
+        await asyncio.wait({drained, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        drained.cancel()
+        if self._task.done():
+            self._task.result()
+
+    async def close(self) -> None:
+        """Drains queued records, then closes the underlying writer."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self.writer.close)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            done = batch[-1] is None
+            records = [record for record in batch if record is not None]
+            if records:
+                await asyncio.to_thread(self._write_batch, records)
+            for _ in batch:
+                self._queue.task_done()
+            if done:
+                return
+
+    def _write_batch(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            self.writer.write(record)
+        self.writer.flush()
+
+
+def segments(path: str) -> List[str]:
+    """
+    Args:
+        path: Active log file path.
+    Returns:
+        Rotated segments oldest first, followed by the active file if it exists.
+    """
+    rotated = [p for p in glob.glob(glob.escape(path) + ".*") if _segment_index(path, p) is not None]
+    rotated.sort(key=lambda p: _segment_index(path, p))
+    if os.path.exists(path):
+        rotated.append(path)
+    return rotated
+
+
+def iter_records(
+    path: str, session_id: Optional[str] = None, start: int = 0, limit: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streams records from a log and its rotated segments without loading them all.
+    Args:
+        path: Active log file path.
+        session_id: Only yield records of this session.
+        start: Number of matching records to skip.
+        limit: Maximum number of records to yield.
+    Returns:
+        An iterator of decoded records, oldest first.
+    """
+
+    def all_records() -> Iterator[Dict[str, Any]]:
+        for segment in segments(path):
+            opener = gzip.open if segment.endswith(".gz") else open
+            with opener(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if session_id is None or record.get("session") == session_id:
+                        yield record
+
+    stop = None if limit is None else start + limit
+    return islice(all_records(), start, stop)
+
+
+def _segment_index(path: str, candidate: str) -> Optional[int]:
+    suffix = candidate[len(path) + 1:]
+    if suffix.endswith(".gz"):
+        suffix = suffix[:-3]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def _next_index(path: str) -> int:
+    indices = [_segment_index(path, p) for p in glob.glob(glob.escape(path) + ".*")]
+    return max((i for i in indices if i is not None), default=0) + 1
@@ -1,36 +1,661 @@
-from typing import Any, List, Dict
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from metrics import NULL_TRACER
+from sections import PipelineConfig, SectionSplitter, section_title
+from token_counter import TokenCounter
+from turn_record import StringArena
+
+if TYPE_CHECKING:
+    # Optional features are imported where they are first used, keeping startup cheap.
+    from checkpoint import CheckpointStore
+    from conversation_log import AsyncLogWriter
+    from draft_document import DraftConfig, DraftDocument
+    from speculative import SpeculationConfig, SpeculationResult
+
+Turn = Tuple[str, Any]
+
+
+@dataclass
+class Session:
+    """Per-session state: the session's chatbots, its turns and the lock that keeps them ordered."""
+
+    session_id: str
+    chatbots: List[Any]
+    turns: List[Turn] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    task: Optional["asyncio.Task[Any]"] = None
+    log_writer: Optional["AsyncLogWriter"] = None
+    # The conversation call in progress (opening turn and turn target), kept for resume().
+    plan: Optional[Dict[str, Any]] = None
+    # Number of turns / history entries per chatbot already written to the checkpoint store.
+    saved_turns: int = 0
+    saved_history: List[int] = field(default_factory=list)
+    # Canonical blog post when diff-based drafts are enabled.
+    document: Optional["DraftDocument"] = None
+    # One stored copy of each message, shared by the turns, the log and (with a
+    # chatbot_factory) the chatbots' history and memories.
+    arena: StringArena = field(default_factory=StringArena)
+
+
+@dataclass
+class ThroughputReport:
+    """Outcome of a concurrent run over many sessions."""
+
+    sessions: int
+    turns: int
+    elapsed: float
+    failed: int = 0
+    cancelled: int = 0
+
+    @property
+    def sessions_per_minute(self) -> float:
+        return self.sessions * 60.0 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class PipelineResult:
+    """
+    Outcome of a pipelined writer/editor turn. ``editor_tail`` is the time between the end
+    of the writer's stream and the merged critique, i.e. the editor latency not overlapped.
+    """
+
+    response: str
+    critique: str
+    sections: int
+    writer_latency: float
+    editor_tail: float
+
 
 class ConversationManager:
     """
     Orchestrates multi-agent conversations, manages conversation flows, sessions, and persistent logging.
-    All state is instance-based.
+    All state is instance-based. Many sessions can run concurrently on one event loop: the
+    number of in-flight turns is bounded globally, while turns inside a session stay sequential.
     """
 
-    def __init__(self, chatbots: List[Any]):
+    def __init__(
+        self,
+        chatbots: List[Any],
+        max_concurrency: int = 32,
+        chatbot_factory: Optional[Callable[[], List[Any]]] = None,
+        log_dir: Optional[str] = None,
+        log_limit: int = 10000,
+        log_options: Optional[Dict[str, Any]] = None,
+        speculation: Optional["SpeculationConfig"] = None,
+        pipeline: Optional[PipelineConfig] = None,
+        on_turn: Optional[Callable[[str, str, float], None]] = None,
+        tracer: Any = NULL_TRACER,
+        checkpoint: Optional["CheckpointStore"] = None,
+        max_resident_sessions: Optional[int] = None,
+        drafts: Optional["DraftConfig"] = None,
+        max_open_logs: int = 256,
+    ):
         """
         Args:
             chatbots: List of Chatbot instances.
+            max_concurrency: Maximum number of turns in flight across all sessions.
+            chatbot_factory: Optional callable returning fresh chatbots for each new session,
+                so independent sessions do not share history. Without one, every session uses
+                ``chatbots`` and only one session may be mid-conversation at a time.
+                Fresh chatbots are given the session's string arena.
+            log_dir: Optional directory for per-session JSONL logs (``<session_id>.jsonl``).
+                Records are written by a background AsyncLogWriter, so rotation, compression
+                and fsync never block other sessions' turns.
+            log_limit: Number of recent turns kept in the in-memory log.
+            log_options: Extra ConversationLogWriter options (rotation, compression, fsync).
+            speculation: Optional speculative drafting settings; the agents it names (all
+                agents if ``agents`` is None) draft ``n`` candidates per turn and keep the best.
+            pipeline: Optional pipelined topology; each chatbot at an even position streams its
+                reply and the next one critiques finished sections while it is still writing.
+            on_turn: Optional callback ``(session_id, agent, latency)`` invoked after every turn.
+            tracer: metrics.Tracer recording turn spans and concurrency-slot wait times.
+            checkpoint: Optional CheckpointStore; sessions are saved after every turn and
+                reloaded on demand, so ``resume`` can finish a conversation after a restart.
+                Requires ``chatbot_factory`` so every session owns its chatbots.
+            max_resident_sessions: With a checkpoint store, idle sessions beyond this many
+                are evicted from memory (least recently used first) and reloaded lazily.
+            drafts: Optional diff-based draft transport; the session keeps the blog post, the
+                writer sends section patches instead of the whole post and the next agent
+                receives a diff plus the changed sections.
+            max_open_logs: With ``log_dir``, at most this many session log files are kept open;
+                the least recently written one is closed and reopened (appending) when needed.
         """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if max_open_logs < 1:
+            raise ValueError("max_open_logs must be at least 1.")
+        if checkpoint is not None and chatbot_factory is None:
+            raise ValueError("Checkpointing requires a chatbot_factory.")
         self.chatbots = chatbots
-        self.sessions: Dict[str, Any] = {}
-        self.log: List[Any] = []
+        self.chatbot_factory = chatbot_factory
+        self.sessions: Dict[str, Any] = OrderedDict()
+        self.log: Deque[Any] = deque(maxlen=log_limit)
+        self.log_dir = log_dir
+        self.log_options = log_options or {}
+        self.max_open_logs = max_open_logs
+        # Sessions whose log writer is open, least recently written first.
+        self._open_logs: "OrderedDict[str, Session]" = OrderedDict()
+        # Writers being drained and closed after eviction, by session id.
+        self._closing_logs: Dict[str, "asyncio.Future[None]"] = {}
+        self._log_open_lock = asyncio.Lock()
+        self.speculation = speculation
+        self.pipeline = pipeline
+        self.on_turn = on_turn
+        self.tracer = tracer
+        self.checkpoint = checkpoint
+        self.max_resident_sessions = max_resident_sessions
+        self.drafts = drafts
+        self.token_counter = TokenCounter()
+        self.turns_completed = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
 
-    async def start_conversation(self, session_id: str, user: str, message: str) -> Any:
+    async def start_conversation(self, session_id: str, user: str, message: str, rounds: int = 1) -> Any:
         """
-        Starts a conversation session, routes messages to chatbots, and logs responses.
+        Starts (or continues) a conversation session, routes messages to chatbots, and logs responses.
+        Each chatbot answers the previous speaker in order; ``rounds`` repeats the pass.
         Args:
             session_id: Unique identifier for the conversation session.
             user: The user initiating the conversation.
             message: The message content.
+            rounds: Number of passes through the session's chatbots.
+        Returns:
+            The (speaker, response) turns produced by this call.
+        Raises:
+            TypeError: If the session store is corrupted.
+            ValueError: If there are no chatbots to talk to.
+            RuntimeError: If another session is mid-conversation on the same shared chatbots.
+        """
+        session = self._get_session(session_id)
+        self._check_exclusive(session)
+        async with session.lock:
+            session.plan = {
+                "user": user,
+                "message": message,
+                "start": len(session.turns),
+                "turns": rounds * len(session.chatbots),
+            }
+            self._save(session)
+            new_turns = await self._run(session)
+        self._evict_idle()
+        return new_turns
+
+    async def resume(self, session_id: str) -> List[Turn]:
+        """
+        Finishes a conversation call that was interrupted (e.g. by a crash), continuing
+        after the last checkpointed turn. Sessions are reloaded from the checkpoint store.
+        Args:
+            session_id: Session to resume.
+        Returns:
+            The (speaker, response) turns produced now; empty if nothing was pending.
+        Raises:
+            TypeError: If the session store is corrupted.
+            ValueError: If there are no chatbots to talk to.
+            RuntimeError: If another session is mid-conversation on the same shared chatbots.
+        """
+        session = self._get_session(session_id)
+        self._check_exclusive(session)
+        async with session.lock:
+            new_turns = await self._run(session) if session.plan is not None else []
+        self._evict_idle()
+        return new_turns
+
+    async def _run(self, session: Session) -> List[Turn]:
+        plan = session.plan
+        session_id = session.session_id
+        chatbots = session.chatbots
+        new_turns: List[Turn] = []
+        done = len(session.turns) - plan["start"]
+        speaker, text = session.turns[-1] if done else (plan["user"], plan["message"])
+        while done < plan["turns"]:
+            index = done % len(chatbots)
+            chatbot = chatbots[index]
+            name = self._agent_name(chatbot, index)
+            if self.pipeline is not None and index + 1 < len(chatbots):
+                editor_name = self._agent_name(chatbots[index + 1], index + 1)
+                with self.tracer.span("conversation.pipelined_turn", session=session_id, agent=name):
+                    result = await self.pipelined_turn(chatbot, chatbots[index + 1], speaker, text, name)
+                # Both turns are checkpointed together: the editor has already accepted its reply.
+                await self._record(
+                    session, new_turns, name, speaker, text, result.response, result.writer_latency, save=False
+                )
+                await self._record(
+                    session, new_turns, editor_name, name, result.response, result.critique, result.editor_tail
+                )
+                speaker, text = editor_name, result.critique
+                done += 2
+                continue
+            started = time.perf_counter()
+            with self.tracer.span("conversation.turn", session=session_id, agent=name):
+                if self._speculates(name):
+                    response = (await self.speculative_turn(chatbot, speaker, text)).response
+                elif self.drafts is not None and name == self.drafts.writer:
+                    response = await self.draft_turn(session, chatbot, speaker, text)
+                else:
+                    async with self._slots:
+                        self.tracer.observe("conversation_slot_wait_seconds", time.perf_counter() - started)
+                        response = await chatbot.send_message(speaker, text)
+            await self._record(session, new_turns, name, speaker, text, response, time.perf_counter() - started)
+            speaker, text = name, response
+            done += 1
+        session.plan = None
+        self._save(session)
+        if session.log_writer is not None:
+            # The call's records are on disk (get_log can page through them) once it returns.
+            await session.log_writer.flush()
+        return new_turns
+
+    async def draft_turn(self, session: Session, writer: Any, user: str, message: str) -> str:
+        """
+        Runs a writer turn against the session's canonical draft. The first reply's post
+        becomes the draft; later turns show the writer the current post and ask for section
+        patches, which are validated and applied. An invalid patch is sent back for correction
+        up to ``retries`` times; after that the next agent receives the unchanged post with a
+        note that the patch failed, never the raw patch blocks.
+        Args:
+            session: Session owning the draft.
+            writer: Chatbot producing the post.
+            user: The user the writer is answering.
+            message: The message content.
+        Returns:
+            The text for the next agent: the writer's response, a diff of the post and the
+            changed sections (or the whole post when the reply carried no patches or they
+            could not be applied).
+        """
+        from draft_document import DraftDocument, PatchError, has_patches, parse_patches, split_reply, unified_diff
+
+        config = self.drafts
+        document = session.document
+        extra = None
+        if document is not None:
+            instructions = config.instructions.format(titles=", ".join(document.titles), draft=document.render())
+            extra = [{"role": "system", "content": instructions}]
+        attempts = 0
+        while True:
+            async with self._slots:
+                reply = await writer.send_message(user, message, extra=extra)
+            text = reply if isinstance(reply, str) else str(reply)
+            response, post = split_reply(text, config.marker)
+            if document is None or not has_patches(post):
+                session.document = DraftDocument.from_text(post, config.level)
+                return text
+            before = document.render()
+            try:
+                changed = document.apply(parse_patches(post))
+            except PatchError as exc:
+                if attempts >= config.retries:
+                    note = f"The writer's patch could not be applied ({exc}); the blog post is unchanged."
+                    return f"{response}\n\n{note}\n\n{config.marker}\n{document.render()}".lstrip()
+                attempts += 1
+                user, message = "system", f"Your patch could not be applied: {exc} Send corrected patches."
+                continue
+            updated = "\n\n".join(document.section(title) for title in changed)
+            diff = unified_diff(before, document.render())
+            return f"{response}\n\nChanges to the blog post:\n{diff}\n\nUpdated sections:\n\n{updated}".lstrip()
+
+    async def speculative_turn(
+        self, chatbot: Any, user: str, message: str, config: Optional["SpeculationConfig"] = None
+    ) -> "SpeculationResult":
+        """
+        Drafts several candidate replies concurrently, commits the best one to the chatbot
+        and cancels the remaining requests once a winner is decided. Each draft holds one
+        concurrency slot.
+        Args:
+            chatbot: Chatbot with draft() and accept().
+            user: The user sending the message.
+            message: The message content.
+            config: Speculation settings; defaults to the manager's ``speculation``.
+        Returns:
+            The chosen response with its score.
+        Raises:
+            ValueError: If no speculation settings are available.
+        """
+        config = config or self.speculation
+        if config is None:
+            raise ValueError("No speculation settings configured.")
+        from speculative import speculate
+
+        return await speculate(chatbot, user, message, config, self._slots)
+
+    async def pipelined_turn(
+        self,
+        writer: Any,
+        editor: Any,
+        user: str,
+        message: str,
+        writer_name: Optional[str] = None,
+        config: Optional[PipelineConfig] = None,
+    ) -> PipelineResult:
+        """
+        Streams the writer's reply and has the editor critique each finished section while
+        the writer is still generating; the section critiques are merged into one reply.
+        The writer's stream and every section critique each hold one concurrency slot.
+        Args:
+            writer: Chatbot with send_message_stream().
+            editor: Chatbot with draft() and accept().
+            user: The user the writer is answering.
+            message: The message content.
+            writer_name: Name the editor addresses; defaults to the writer's name.
+            config: Pipeline settings; defaults to the manager's ``pipeline``.
         Returns:
-            The session's conversation data.
+            The writer's reply, the merged critique and timing details.
         """
-        pass
+        config = config or self.pipeline or PipelineConfig()
+        writer_name = writer_name or getattr(writer, "name", None) or "writer"
+        splitter = SectionSplitter(config.level)
+        sections: List[str] = []
+        critiques: List["asyncio.Task[Any]"] = []
 
-    def get_log(self) -> Any:
+        async def critique(section: str) -> Any:
+            prompt = config.section_prompt.format(writer=writer_name, section=section)
+            async with self._slots:
+                return await editor.draft(writer_name, prompt)
+
+        def hand_off(finished: List[str]) -> None:
+            for section in finished:
+                sections.append(section)
+                critiques.append(asyncio.ensure_future(critique(section)))
+
+        started = time.perf_counter()
+        parts: List[str] = []
+        try:
+            async with self._slots:
+                async for delta in writer.send_message_stream(user, message):
+                    parts.append(delta)
+                    hand_off(splitter.feed(delta))
+            last = splitter.flush()
+            hand_off([last] if last is not None else [])
+            writer_done = time.perf_counter()
+            results = await asyncio.gather(*critiques)
+        except BaseException:
+            for task in critiques:
+                task.cancel()
+            raise
+        merged = config.separator.join(
+            config.critique_format.format(index=i, title=section_title(section), critique=result)
+            for i, (section, result) in enumerate(zip(sections, results), 1)
+        )
+        response = "".join(parts)
+        await editor.accept(writer_name, response, merged)
+        return PipelineResult(
+            response=response,
+            critique=merged,
+            sections=len(sections),
+            writer_latency=writer_done - started,
+            editor_tail=time.perf_counter() - writer_done,
+        )
+
+    async def run_sessions(
+        self, assignments: Iterable[Tuple[str, str, str]], rounds: int = 1
+    ) -> ThroughputReport:
+        """
+        Drives many sessions concurrently and reports throughput.
+        Args:
+            assignments: (session_id, user, opening message) per session.
+            rounds: Number of passes through each session's chatbots.
+        Returns:
+            A ThroughputReport covering completed, failed and cancelled sessions.
+        Raises:
+            ValueError: If several sessions are given but no ``chatbot_factory`` is set.
+        """
+        assignments = list(assignments)
+        if self.chatbot_factory is None and len({session_id for session_id, _, _ in assignments}) > 1:
+            raise ValueError("Running sessions concurrently requires a chatbot_factory.")
+        started = time.perf_counter()
+        turns_before = self.turns_completed
+        tasks = []
+        for session_id, user, message in assignments:
+            session = self._get_session(session_id)
+            session.task = asyncio.ensure_future(self.start_conversation(session_id, user, message, rounds))
+            tasks.append(session.task)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        cancelled = sum(isinstance(r, asyncio.CancelledError) for r in results)
+        failed = sum(isinstance(r, BaseException) for r in results) - cancelled
+        return ThroughputReport(
+            sessions=len(results) - failed - cancelled,
+            turns=self.turns_completed - turns_before,
+            elapsed=time.perf_counter() - started,
+            failed=failed,
+            cancelled=cancelled,
+        )
+
+    def cancel(self, session_id: str) -> bool:
+        """
+        Cancels a session's running task, if any.
+        Args:
+            session_id: Session to cancel.
+        Returns:
+            True if a running task was cancelled.
+        """
+        session = self.sessions.get(session_id)
+        if session is None or session.task is None or session.task.done():
+            return False
+        return session.task.cancel()
+
+    def get_log(self, session_id: Optional[str] = None, start: int = 0, limit: Optional[int] = None) -> Any:
         """
         Returns the persistent conversation log.
+        Without a session id this is the bounded in-memory log of recent turns. With one,
+        the session's records are streamed from disk (when ``log_dir`` is set) so long
+        histories can be paged through without loading them; turns of a call still in
+        progress may not have been written yet.
+        Args:
+            session_id: Optional session whose records to return.
+            start: Number of records to skip.
+            limit: Maximum number of records to return.
         Returns:
             The log data.
         """
-        return self.log
\ No newline at end of file
+        if session_id is None:
+            return self.log
+        if self.log_dir is None:
+            entries = (entry for entry in self.log if entry[0] == session_id)
+            return list(entries)[start: None if limit is None else start + limit]
+        from conversation_log import iter_records
+
+        return iter_records(self._log_path(session_id), start=start, limit=limit)
+
+    async def close(self) -> None:
+        """Drains and closes all session log writers."""
+        for session in list(self._open_logs.values()):
+            self._close_log(session)
+        if self._closing_logs:
+            await asyncio.gather(*self._closing_logs.values())
+
+    async def _record(
+        self,
+        session: Session,
+        new_turns: List[Turn],
+        name: str,
+        speaker: str,
+        text: str,
+        response: Any,
+        latency: float,
+        save: bool = True,
+    ) -> None:
+        arena = session.arena
+        text = arena.intern(text) if isinstance(text, str) else text
+        response = arena.intern(response) if isinstance(response, str) else response
+        self.log.append((session.session_id, speaker, text, response))
+        await self._write_log(session, name, speaker, text, response, latency)
+        turn = (name, response)
+        session.turns.append(turn)
+        new_turns.append(turn)
+        self.turns_completed += 1
+        if save:
+            self._save(session)
+        if self.on_turn is not None:
+            self.on_turn(session.session_id, name, latency)
+
+    def _save(self, session: Session) -> None:
+        if self.checkpoint is None:
+            return
+        entries = [("turns", seq, list(session.turns[seq])) for seq in range(session.saved_turns, len(session.turns))]
+        states = []
+        for index, chatbot in enumerate(session.chatbots):
+            history = chatbot.history or []
+            saved = session.saved_history[index]
+            entries.extend((f"history:{index}", seq, list(history[seq])) for seq in range(saved, len(history)))
+            states.append(chatbot.snapshot(include_history=False))
+        with self.tracer.span("conversation.checkpoint", session=session.session_id):
+            document = session.document.sections if session.document is not None else None
+            state = {"plan": session.plan, "chatbots": states, "document": document}
+            self.checkpoint.save(session.session_id, len(session.turns), state, entries)
+        session.saved_turns = len(session.turns)
+        session.saved_history = [len(chatbot.history or []) for chatbot in session.chatbots]
+
+    def _restore(self, session: Session) -> None:
+        saved = self.checkpoint.load(session.session_id)
+        if saved is None:
+            return
+        _, state = saved
+        session.plan = state["plan"]
+        if state.get("document") is not None:
+            from draft_document import DraftDocument
+
+            session.document = DraftDocument(state["document"], self.drafts.level if self.drafts else 3)
+        session.turns = [
+            (sys.intern(name), session.arena.share(response))
+            for name, response in self.checkpoint.entries(session.session_id, "turns")
+        ]
+        for index, (chatbot, chatbot_state) in enumerate(zip(session.chatbots, state["chatbots"])):
+            chatbot.restore(chatbot_state, self.checkpoint.entries(session.session_id, f"history:{index}"))
+        session.saved_turns = len(session.turns)
+        session.saved_history = [len(chatbot.history or []) for chatbot in session.chatbots]
+
+    def _check_exclusive(self, session: Session) -> None:
+        # Without a factory every session talks to the same chatbot objects; running two at
+        # once would interleave their turns into one history, context window and buffer.
+        if self.chatbot_factory is not None or not isinstance(self.sessions, dict):
+            return
+        for other in self.sessions.values():
+            if other is not session and other.lock.locked():
+                raise RuntimeError(
+                    f"Session {other.session_id!r} is using the shared chatbots; "
+                    "pass a chatbot_factory to run sessions concurrently."
+                )
+
+    def _evict_idle(self) -> None:
+        """Drops least recently used idle sessions beyond ``max_resident_sessions``; they are checkpointed."""
+        if self.checkpoint is None or self.max_resident_sessions is None:
+            return
+        excess = len(self.sessions) - self.max_resident_sessions
+        for session_id in list(self.sessions):
+            if excess <= 0:
+                break
+            session = self.sessions[session_id]
+            if session.lock.locked() or (session.task is not None and not session.task.done()):
+                continue
+            self._close_log(session)
+            del self.sessions[session_id]
+            excess -= 1
+
+    @staticmethod
+    def _agent_name(chatbot: Any, index: int) -> str:
+        name = getattr(chatbot, "name", None) or f"agent{index}"
+        return sys.intern(name) if isinstance(name, str) else name
+
+    def _speculates(self, name: str) -> bool:
+        config = self.speculation
+        return config is not None and (config.agents is None or name in config.agents)
+
+    async def _write_log(
+        self, session: Session, agent: str, user: str, message: str, response: Any, latency: float
+    ) -> None:
+        if self.log_dir is None:
+            return
+        if session.log_writer is None:
+            await self._open_log(session)
+        self._open_logs[session.session_id] = session
+        self._open_logs.move_to_end(session.session_id)
+        text = response if isinstance(response, str) else str(response)
+        await session.log_writer.write({
+            "ts": time.time(),
+            "session": session.session_id,
+            "agent": agent,
+            "user": user,
+            "message": message,
+            "response": text,
+            "tokens": self.token_counter.count(text),
+            "latency": round(latency, 6),
+        })
+
+    async def _open_log(self, session: Session) -> None:
+        from conversation_log import AsyncLogWriter, ConversationLogWriter
+
+        # One open file per session would exhaust file descriptors with thousands of sessions,
+        # so the least recently written log is closed before another is opened. Opening is
+        # serialised so concurrent sessions cannot all pass the check while awaiting.
+        async with self._log_open_lock:
+            evicted = []
+            while len(self._open_logs) >= self.max_open_logs:
+                evicted.append(self._close_log(next(iter(self._open_logs.values()))))
+            # An evicted writer for this file must also finish first so records stay in order.
+            evicted.append(self._closing_logs.get(session.session_id))
+            await asyncio.shield(asyncio.gather(*(closing for closing in evicted if closing is not None)))
+            path = self._log_path(session.session_id)
+            writer = await asyncio.to_thread(ConversationLogWriter, path, **self.log_options)
+            session.log_writer = AsyncLogWriter(writer)
+            self._open_logs[session.session_id] = session
+
+    def _close_log(self, session: Session) -> Optional["asyncio.Future[None]"]:
+        # Detaches the writer now; it drains and closes in the background.
+        if self._open_logs.get(session.session_id) is session:
+            del self._open_logs[session.session_id]
+        writer, session.log_writer = session.log_writer, None
+        if writer is None:
+            return self._closing_logs.get(session.session_id)
+        session_id = session.session_id
+        previous = self._closing_logs.get(session_id)
+
+        async def close() -> None:
+            if previous is not None:
+                await asyncio.shield(previous)
+            try:
+                await writer.close()
+            finally:
+                if self._closing_logs.get(session_id) is closing:
+                    del self._closing_logs[session_id]
+
+        closing = self._closing_logs[session_id] = asyncio.ensure_future(close())
+        return closing
+
+    def _log_path(self, session_id: str) -> str:
+        from urllib.parse import quote
+
+        # Session ids come from callers (CLI --session, sharded assignments): percent-quote
+        # path separators and other unsafe characters so every id maps to one file in log_dir.
+        root = os.path.realpath(self.log_dir)
+        path = os.path.realpath(os.path.join(root, f"{quote(session_id, safe='')}.jsonl"))
+        if os.path.dirname(path) != root:
+            raise ValueError(f"Session id {session_id!r} does not map to a file inside log_dir.")
+        return path
+
+    def _get_session(self, session_id: str) -> Session:
+        if not isinstance(self.sessions, dict):
+            raise TypeError("Session store is corrupted.")
+        session = self.sessions.get(session_id)
+        if session is None:
+            chatbots = self.chatbot_factory() if self.chatbot_factory else self.chatbots
+            if not chatbots:
+                raise ValueError("ConversationManager requires at least one chatbot.")
+            session = self.sessions[session_id] = Session(session_id, list(chatbots))
+            session.saved_history = [0] * len(session.chatbots)
+            if self.chatbot_factory:
+                for chatbot in session.chatbots:
+                    if hasattr(chatbot, "arena"):
+                        chatbot.arena = session.arena
+            if self.checkpoint is not None:
+                self._restore(session)
+        elif isinstance(self.sessions, OrderedDict):
+            self.sessions.move_to_end(session_id)
+        return session
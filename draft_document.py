@@ -0,0 +1,211 @@
+import difflib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sections import SectionSplitter
+
+DEFAULT_PATCH_INSTRUCTIONS = """The current blog post is below. Do NOT rewrite the whole post.
+After "Blog Post:", send only patches:
+@@ REPLACE <section heading>   followed by the new text of that section
+@@ INSERT AFTER <section heading>   followed by a new section starting with its heading
+@@ DELETE <section heading>
+@@ APPEND   followed by new sections to add at the end
+Section headings: {titles}
+
+Current blog post:
+{draft}"""
+
+_PATCH_LINE = re.compile(r"^@@\s*(REPLACE|INSERT AFTER|DELETE|APPEND)\b\s*(.*)$", re.IGNORECASE)
+_HEADING = re.compile(r"^\s*(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+class PatchError(ValueError):
+    """Raised when a patch cannot be parsed or does not apply to the draft."""
+
+
+@dataclass
+class Patch:
+    op: str
+    target: Optional[str]
+    content: str = ""
+
+
+@dataclass
+class DraftConfig:
+    """
+    Settings for diff-based draft transport: ``writer`` names the agent whose replies carry
+    the blog post; from its second draft on it is shown the current post and asked for
+    patches, which are applied to the session's DraftDocument. ``retries`` bounds how often
+    an invalid patch is sent back for correction before the next agent is sent the unchanged
+    post with a note that the patch failed.
+    """
+
+    writer: str = "Miss Writer"
+    level: int = 3
+    instructions: str = DEFAULT_PATCH_INSTRUCTIONS
+    retries: int = 1
+    marker: str = "Blog Post:"
+
+
+def heading(section: str) -> Optional[str]:
+    """
+    Args:
+        section: Section text.
+    Returns:
+        The section's heading text, or None for text before the first heading.
+    """
+    match = _HEADING.match(section.split("\n", 1)[0])
+    return match.group(2) if match else None
+
+
+def _normalise(title: str) -> str:
+    return " ".join(title.lstrip("#").split()).casefold()
+
+
+class DraftDocument:
+    """
+    Canonical copy of a Markdown draft as a flat list of sections, one per heading of
+    ``level`` or above (plus any text before the first heading).
+    """
+
+    def __init__(self, sections: Optional[List[str]] = None, level: int = 3):
+        """
+        Args:
+            sections: Section texts, each starting with its heading.
+            level: Deepest heading level that starts a section.
+        """
+        self.sections: List[str] = list(sections or [])
+        self.level = level
+
+    @classmethod
+    def from_text(cls, text: str, level: int = 3) -> "DraftDocument":
+        splitter = SectionSplitter(level)
+        sections = splitter.feed(text + "\n")
+        last = splitter.flush()
+        return cls(sections + ([last] if last is not None else []), level)
+
+    @property
+    def titles(self) -> List[str]:
+        return [title for title in map(heading, self.sections) if title is not None]
+
+    def render(self) -> str:
+        return "\n\n".join(self.sections)
+
+    def section(self, title: str) -> str:
+        return self.sections[self.find(title)]
+
+    def find(self, title: str) -> int:
+        """
+        Args:
+            title: Heading text (case and surrounding ``#`` are ignored).
+        Returns:
+            Index of the first section with that heading.
+        Raises:
+            PatchError: If no section has that heading.
+        """
+        wanted = _normalise(title)
+        for index, section in enumerate(self.sections):
+            found = heading(section)
+            if found is not None and _normalise(found) == wanted:
+                return index
+        raise PatchError(f"No section titled {title!r}; sections are: {', '.join(self.titles)}.")
+
+    def apply(self, patches: List[Patch]) -> List[str]:
+        """
+        Applies patches atomically: either all apply or the document is left unchanged.
+        Args:
+            patches: Parsed patches.
+        Returns:
+            The headings of the sections that were replaced or inserted.
+        Raises:
+            PatchError: If a patch targets a missing section or carries invalid content.
+        """
+        staged = DraftDocument(self.sections, self.level)
+        sections = staged.sections
+        changed: List[str] = []
+        for patch in patches:
+            new = DraftDocument.from_text(patch.content, self.level).sections if patch.content.strip() else []
+            if patch.op == "DELETE":
+                del sections[staged.find(patch.target)]
+                continue
+            if not new:
+                raise PatchError(f"{patch.op} {patch.target or ''}".rstrip() + " has no content.")
+            if patch.op == "REPLACE":
+                index = staged.find(patch.target)
+                if heading(new[0]) is None:
+                    # Body-only replacement: keep the original heading line.
+                    new[0] = sections[index].split("\n", 1)[0] + "\n" + new[0]
+                sections[index:index + 1] = new
+            else:
+                if any(heading(section) is None for section in new):
+                    raise PatchError(f"{patch.op} content must start with a section heading.")
+                index = staged.find(patch.target) + 1 if patch.op == "INSERT AFTER" else len(sections)
+                sections[index:index] = new
+            changed.extend(title for title in map(heading, new) if title is not None)
+        self.sections = sections
+        return changed
+
+
+def parse_patches(text: str) -> List[Patch]:
+    """
+    Parses ``@@ OP <heading>`` blocks; text before the first block is ignored.
+    Args:
+        text: The writer's patch reply.
+    Returns:
+        The patches in order.
+    Raises:
+        PatchError: If the text contains no patch block or a block lacks its target.
+    """
+    patches: List[Patch] = []
+    body: List[str] = []
+    for line in text.split("\n"):
+        match = _PATCH_LINE.match(line.strip())
+        if match is None:
+            body.append(line)
+            continue
+        if patches:
+            patches[-1].content = "\n".join(body).strip()
+        body = []
+        op, target = match.group(1).upper(), match.group(2).strip() or None
+        if op != "APPEND" and target is None:
+            raise PatchError(f"{op} needs a section heading.")
+        patches.append(Patch(op, target))
+    if not patches:
+        raise PatchError("No patches found.")
+    patches[-1].content = "\n".join(body).strip()
+    return patches
+
+
+def has_patches(text: str) -> bool:
+    return any(_PATCH_LINE.match(line.strip()) for line in text.split("\n"))
+
+
+def split_reply(text: str, marker: str = "Blog Post:") -> Tuple[str, str]:
+    """
+    Splits a writer reply in the "Response: ... Blog Post: ..." structure.
+    Args:
+        text: The reply.
+        marker: Text that introduces the post.
+    Returns:
+        (response to the editor, post or patches); the response is empty without a marker.
+    """
+    head, found, tail = text.partition(marker)
+    if not found:
+        return "", text.strip()
+    return head.strip(), tail.strip()
+
+
+def unified_diff(old: str, new: str, context: int = 1) -> str:
+    """
+    Args:
+        old: Previous draft.
+        new: Updated draft.
+        context: Unchanged lines shown around each change.
+    Returns:
+        A compact unified diff.
+    """
+    lines = difflib.unified_diff(
+        old.split("\n"), new.split("\n"), "previous draft", "current draft", n=context, lineterm=""
+    )
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import Histogram
+
+Vector = List[float]
+EmbedFn = Callable[[List[str]], Awaitable[Sequence[Sequence[float]]]]
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+def text_key(model: str, text: str) -> str:
+    """
+    Args:
+        model: Embedding model name.
+        text: Input text.
+    Returns:
+        Content hash identifying the embedding of ``text`` under ``model``.
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache keyed by content hash: an LRU-bounded in-memory tier with an optional
+    SQLite file behind it, which keeps every embedding and refills the memory tier on demand.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 4096):
+        """
+        Args:
+            path: Optional SQLite file that keeps embeddings across restarts.
+            max_entries: Maximum embeddings held in memory; least recently used go first.
+        Raises:
+            ValueError: If ``max_entries`` is less than 1.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Vector]" = OrderedDict()
+        self._db = None
+        if path is not None:
+            import sqlite3
+
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Vector]:
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                vector = array("f", row[0]).tolist()
+                self._remember(key, vector)
+        return vector
+
+    def put_many(self, items: Iterable[Tuple[str, Vector]]) -> None:
+        rows = []
+        for key, vector in items:
+            self._remember(key, vector)
+            rows.append((key, array("f", vector).tobytes()))
+        if self._db is not None and rows:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, vector: Vector) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@dataclass
+class BatcherStats:
+    """Batching counters and histograms (batch sizes, per-text wait before dispatch)."""
+
+    requested: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    embedded: int = 0
+    batches: int = 0
+    batch_sizes: Histogram = field(default_factory=lambda: Histogram(BATCH_SIZE_BUCKETS))
+    wait_times: Histogram = field(default_factory=Histogram)
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts from any number of concurrent callers for up to ``max_wait`` seconds,
+    drops texts already cached or already in flight, and sends the rest to ``embed_fn`` in
+    batches of at most ``max_batch_size``. Each caller gets its own vector back.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        max_batch_size: int = 256,
+        max_wait: float = 0.01,
+        cache: Optional[EmbeddingCache] = None,
+        model: str = "text-embedding-3-small",
+    ):
+        """
+        Args:
+            embed_fn: Async callable embedding a list of texts (e.g. OpenAIClient.embed).
+            max_batch_size: Maximum texts per upstream call.
+            max_wait: Seconds the first text of a batch may wait for companions.
+            cache: Optional EmbeddingCache; a private in-memory cache is used by default.
+            model: Model name mixed into cache keys.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.model = model
+        self.stats = BatcherStats()
+        self._pending: Dict[str, Tuple[str, "asyncio.Future[Vector]", float]] = {}
+        self._in_flight: Dict[str, "asyncio.Future[Vector]"] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def embed(self, text: str) -> Vector:
+        """
+        Args:
+            text: Text to embed.
+        Returns:
+            Its embedding.
+        """
+        self.stats.requested += 1
+        key = text_key(self.model, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return cached
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.coalesced += 1
+        else:
+            future = self._enqueue(key, text)
+        return await asyncio.shield(future)
+
+    async def embed_many(self, texts: Iterable[str]) -> List[Vector]:
+        """
+        Args:
+            texts: Texts to embed.
+        Returns:
+            One embedding per text, in order.
+        """
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    async def flush(self) -> None:
+        """Dispatches everything pending immediately and waits for it to finish."""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _enqueue(self, key: str, text: str) -> "asyncio.Future[Vector]":
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Vector]" = loop.create_future()
+        self._pending[key] = (text, future, time.perf_counter())
+        self._in_flight[key] = future
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = []
+            for key in list(self._pending)[: self.max_batch_size]:
+                batch.append((key, *self._pending.pop(key)))
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, str, "asyncio.Future[Vector]", float]]) -> None:
+        now = time.perf_counter()
+        for _, _, _, enqueued in batch:
+            self.stats.wait_times.observe(now - enqueued)
+        self.stats.batches += 1
+        self.stats.batch_sizes.observe(len(batch))
+        try:
+            vectors = await self.embed_fn([text for _, text, _, _ in batch])
+            if len(vectors) != len(batch):
+                raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(batch)} texts.")
+        except BaseException as exc:
+            for key, _, future, _ in batch:
+                self._in_flight.pop(key, None)
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        results = [(key, list(vector)) for (key, _, _, _), vector in zip(batch, vectors)]
+        self.cache.put_many(results)
+        self.stats.embedded += len(results)
+        for (key, _, future, _), (_, vector) in zip(batch, results):
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result(vector)
@@ -0,0 +1,246 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from rate_limiter import Clock, RateLimiter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint health tracker. After ``failure_threshold`` consecutive failures the
+    circuit opens and the endpoint is skipped; once ``reset_timeout`` has passed a single
+    probe request is let through (half-open), and its outcome closes or re-opens the circuit.
+    A threshold of None disables the breaker.
+    """
+
+    def __init__(self, failure_threshold: Optional[int] = 5, reset_timeout: float = 30.0, clock: Clock = time.monotonic):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit, or None to never open.
+            reset_timeout: Seconds an open circuit waits before allowing a probe.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if self._probing or self._clock() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def available(self) -> bool:
+        """
+        Returns:
+            True if a request may be sent now (closed, or half-open with no probe in flight).
+        """
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and not self._probing)
+
+    def begin(self) -> None:
+        """Marks a request as sent; in the half-open state it becomes the probe."""
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or (self.failure_threshold is not None and self.failures >= self.failure_threshold):
+            self.trip()
+
+    def trip(self) -> None:
+        """Opens the circuit immediately (e.g. after the endpoint rejected its credentials)."""
+        if self.failure_threshold is not None:
+            self._opened_at = self._clock()
+        self._probing = False
+
+    def release(self) -> None:
+        """Ends a request whose outcome says nothing about the endpoint (e.g. it was cancelled)."""
+        self._probing = False
+
+
+@dataclass(eq=False)
+class Endpoint:
+    """
+    One credential at one OpenAI-compatible API root. Each endpoint has its own rate
+    budget, since limits are enforced per key; ``model`` optionally overrides the model
+    name for servers that serve it under a different one.
+    """
+
+    base_url: str
+    api_key: str
+    weight: float = 1.0
+    name: Optional[str] = None
+    model: Optional[str] = None
+    rate_limiter: RateLimiter = None  # type: ignore[assignment]
+    breaker: CircuitBreaker = None  # type: ignore[assignment]
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    _index: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.weight <= 0:
+            raise ValueError("Endpoint weight must be positive.")
+        self.base_url = self.base_url.rstrip("/")
+        if self.name is None:
+            self.name = self.base_url
+        if self.rate_limiter is None:
+            self.rate_limiter = RateLimiter()
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    def finish(self, ok: Optional[bool], trip: bool = False) -> None:
+        """
+        Ends a request started by EndpointPool.select.
+        Args:
+            ok: True if the endpoint answered, False if it failed, None if the request was
+                abandoned for reasons unrelated to the endpoint.
+            trip: Open the circuit regardless of the failure count.
+        """
+        self.outstanding -= 1
+        if ok:
+            self.breaker.record_success()
+        elif ok is None:
+            self.breaker.release()
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+        if trip:
+            self.breaker.trip()
+
+
+class EndpointPool:
+    """
+    Routes requests across several API keys and endpoints. Each request goes to the
+    available endpoint with the fewest outstanding requests relative to its weight,
+    preferring endpoints whose rate budget admits it right away; ties rotate. Endpoints
+    with an open circuit are skipped until their probe succeeds.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[Endpoint],
+        failure_threshold: Optional[int] = 5,
+        reset_timeout: float = 30.0,
+        clock: Clock = time.monotonic,
+    ):
+        """
+        Args:
+            endpoints: Endpoints to balance over.
+            failure_threshold: Consecutive failures that open an endpoint's circuit (None disables).
+            reset_timeout: Seconds before an open circuit is probed again.
+            clock: Monotonic clock, injectable for tests.
+        Raises:
+            ValueError: If no endpoints are given.
+        """
+        self.endpoints: List[Endpoint] = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint.")
+        for index, endpoint in enumerate(self.endpoints):
+            endpoint._index = index
+            if endpoint.breaker is None:
+                endpoint.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self._turn = 0
+
+    @classmethod
+    def from_config(cls, config_manager: Any, base_url: str, **options: Any) -> "EndpointPool":
+        """
+        Builds a pool from configuration. ``OPENAI_ENDPOINTS`` is a JSON list of objects with
+        ``base_url``, ``api_key`` and optional ``weight``, ``name`` and ``model``; otherwise
+        ``OPENAI_API_KEYS`` (comma separated) or ``OPENAI_API_KEY`` are used at ``base_url``.
+        Args:
+            config_manager: ConfigManager or compatible provider.
+            base_url: API root for keys listed without one.
+            **options: EndpointPool options (failure_threshold, reset_timeout, clock).
+        Returns:
+            The pool.
+        Raises:
+            KeyError: If no credentials are configured.
+            ValueError: If ``OPENAI_ENDPOINTS`` is malformed.
+        """
+        spec = _lookup(config_manager, "OPENAI_ENDPOINTS")
+        if spec:
+            try:
+                endpoints = [Endpoint(**item) for item in json.loads(spec)]
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Invalid OPENAI_ENDPOINTS: {exc}") from exc
+            return cls(endpoints, **options)
+        keys = _lookup(config_manager, "OPENAI_API_KEYS")
+        if keys:
+            names = [key.strip() for key in keys.split(",") if key.strip()]
+        else:
+            names = [config_manager.get("OPENAI_API_KEY")]
+        return cls([Endpoint(base_url, key, name=f"key{i}") for i, key in enumerate(names)], **options)
+
+    def select(self, tokens: int = 0, exclude: Iterable[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Picks an endpoint and counts a request against it; pair with Endpoint.finish.
+        Args:
+            tokens: Estimated request tokens, used to prefer endpoints with budget left.
+            exclude: Endpoints not to use (e.g. already tried for this request).
+        Returns:
+            The endpoint, or None if every candidate's circuit is open.
+        """
+        skipped = {id(endpoint) for endpoint in exclude}
+        candidates = [e for e in self.endpoints if id(e) not in skipped and e.breaker.available()]
+        if not candidates:
+            return None
+        count = len(self.endpoints)
+        turn = self._turn
+        endpoint = min(
+            candidates,
+            key=lambda e: (
+                e.rate_limiter.wait_time(tokens) > 0,
+                (e.outstanding + 1) / e.weight,
+                (e._index - turn) % count,
+            ),
+        )
+        self._turn = (endpoint._index + 1) % count
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        endpoint.breaker.begin()
+        return endpoint
+
+    def has_available(self, exclude: Iterable[Endpoint] = ()) -> bool:
+        skipped = {id(endpoint) for endpoint in exclude}
+        return any(id(e) not in skipped and e.breaker.available() for e in self.endpoints)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            Per-endpoint health and load: name, circuit state, outstanding, requests, failures.
+        """
+        return [
+            {
+                "name": e.name,
+                "state": e.breaker.state,
+                "outstanding": e.outstanding,
+                "requests": e.requests,
+                "failures": e.failures,
+            }
+            for e in self.endpoints
+        ]
+
+
+def _lookup(config_manager: Any, key: str) -> Optional[str]:
+    try:
+        return config_manager.get(key)
+    except KeyError:
+        return None
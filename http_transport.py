@@ -0,0 +1,427 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+
+class TransportError(ConnectionError):
+    """Raised when a request cannot be completed at the connection level."""
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how the pool has used its connections."""
+
+    requests: int = 0
+    connections_created: int = 0
+    connections_reused: int = 0
+    connections_closed: int = 0
+
+
+HostKey = Tuple[str, str, int]
+
+
+class _Connection:
+    """A single keep-alive capable HTTP/1.1 connection."""
+
+    def __init__(self, key: HostKey, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+
+    def is_usable(self, keepalive_timeout: float) -> bool:
+        if self.reader.at_eof() or self.writer.is_closing():
+            return False
+        return time.monotonic() - self.last_used < keepalive_timeout
+
+    def close(self) -> None:
+        if not self.writer.is_closing():
+            self.writer.close()
+
+
+class HTTPResponse:
+    """
+    Response whose body is read lazily from the underlying pooled connection.
+    The connection is handed back to the pool once the body is fully consumed;
+    closing the response early discards the connection instead.
+    """
+
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: Dict[str, str],
+        connection: _Connection,
+        pool: "ConnectionPool",
+        read_timeout: Optional[float],
+        no_body: bool = False,
+    ):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._connection: Optional[_Connection] = connection
+        self._pool = pool
+        self._read_timeout = read_timeout
+        self._keep_alive = headers.get("connection", "").lower() != "close"
+        self._body: Optional[bytes] = b"" if no_body else None
+        if no_body:
+            self._finish()
+
+    async def read(self) -> bytes:
+        """
+        Reads the whole body and releases the connection.
+        Returns:
+            The raw response body.
+        """
+        if self._body is None:
+            chunks = [chunk async for chunk in self.iter_chunks()]
+            self._body = b"".join(chunks)
+        return self._body
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """
+        Yields body chunks as they arrive from the network.
+        Returns:
+            An async iterator of raw body chunks.
+        """
+        if self._body is not None:
+            if self._body:
+                yield self._body
+            return
+        if self._connection is None:
+            raise TransportError("Response body already consumed")
+        reader = self._connection.reader
+        try:
+            if self.headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size_line = await self._read(reader.readline())
+                    size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                    if size == 0:
+                        # Skip trailers up to the terminating blank line.
+                        while (await self._read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                            pass
+                        break
+                    chunk = await self._read(reader.readexactly(size))
+                    await self._read(reader.readline())
+                    yield chunk
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining > 0:
+                    chunk = await self._read(reader.read(min(remaining, 65536)))
+                    if not chunk:
+                        raise TransportError("Connection closed before body was complete")
+                    remaining -= len(chunk)
+                    yield chunk
+            else:
+                self._keep_alive = False
+                while True:
+                    chunk = await self._read(reader.read(65536))
+                    if not chunk:
+                        break
+                    yield chunk
+        except (asyncio.IncompleteReadError, ValueError) as exc:
+            self._keep_alive = False
+            self.close()
+            raise TransportError(f"Malformed response body: {exc}") from exc
+        except BaseException:
+            self._keep_alive = False
+            self.close()
+            raise
+        self._finish()
+
+    def json(self) -> Any:
+        """
+        Decodes the already-read body as JSON.
+        Returns:
+            The decoded JSON value.
+        Raises:
+            TransportError: If the body has not been read yet.
+        """
+        import json
+
+        if self._body is None:
+            raise TransportError("Response body has not been read")
+        return json.loads(self._body)
+
+    def close(self) -> None:
+        """Releases the response, discarding the connection if the body is unread."""
+        if self._connection is not None:
+            self._pool._release(self._connection, reusable=False)
+            self._connection = None
+
+    async def _read(self, awaitable: Any) -> Any:
+        if self._read_timeout is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, self._read_timeout)
+        except asyncio.TimeoutError as exc:
+            raise TransportError("Timed out reading response body") from exc
+
+    def _finish(self) -> None:
+        if self._connection is not None:
+            self._pool._release(self._connection, reusable=self._keep_alive)
+            self._connection = None
+
+
+class ConnectionPool:
+    """
+    Size-bounded pool of persistent HTTP/1.1 connections shared by any number of clients.
+    Connections are kept alive between requests and reused per (scheme, host, port); the
+    total number of checked-out connections and the number per host are both capped.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        ssl_context: Any = None,
+    ):
+        """
+        Args:
+            max_connections: Upper bound on simultaneously checked-out connections.
+            max_connections_per_host: Upper bound on checked-out connections per host.
+            keepalive_timeout: Seconds an idle connection is kept before being discarded.
+            connect_timeout: Seconds allowed for establishing a new connection.
+            ssl_context: Optional ssl.SSLContext for https hosts; a default one is created lazily.
+        """
+        if max_connections < 1 or max_connections_per_host < 1:
+            raise ValueError("Connection limits must be at least 1.")
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.stats = PoolStats()
+        self._ssl_context = ssl_context
+        self._slots = asyncio.Semaphore(max_connections)
+        self._host_slots: Dict[HostKey, asyncio.Semaphore] = {}
+        self._idle: Dict[HostKey, Deque[_Connection]] = {}
+        self._closed = False
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def idle_count(self) -> int:
+        """
+        Returns:
+            Number of idle keep-alive connections currently held.
+        """
+        return sum(len(conns) for conns in self._idle.values())
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> HTTPResponse:
+        """
+        Sends a request and reads the full response body.
+        Args:
+            method: HTTP method.
+            url: Absolute http(s) URL.
+            headers: Extra request headers.
+            body: Optional request body.
+            timeout: Optional per-read timeout in seconds.
+        Returns:
+            The response, with its body already read.
+        """
+        async with self.stream(method, url, headers=headers, body=body, timeout=timeout) as response:
+            await response.read()
+        return response
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[HTTPResponse]:
+        """
+        Sends a request and yields the response before its body is read.
+        Args:
+            method: HTTP method.
+            url: Absolute http(s) URL.
+            headers: Extra request headers.
+            body: Optional request body.
+            timeout: Optional per-read timeout in seconds.
+        Returns:
+            An async context manager yielding the response.
+        Raises:
+            TransportError: If the request cannot be sent or no response is received.
+        """
+        if self._closed:
+            raise TransportError("Connection pool is closed")
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url!r}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key: HostKey = (parts.scheme, parts.hostname, port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        request_bytes = self._encode_request(method, target, parts.netloc, headers, body)
+
+        host_slot = self._host_slots.setdefault(key, asyncio.Semaphore(self.max_connections_per_host))
+        await host_slot.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            host_slot.release()
+            raise
+        response: Optional[HTTPResponse] = None
+        try:
+            self.stats.requests += 1
+            response = await self._send(key, request_bytes, method, timeout)
+            yield response
+        finally:
+            if response is not None:
+                response.close()
+            self._slots.release()
+            host_slot.release()
+
+    async def close(self) -> None:
+        """Closes all idle connections; the pool rejects new requests afterwards."""
+        self._closed = True
+        for conns in self._idle.values():
+            while conns:
+                self._discard(conns.pop())
+        self._idle.clear()
+
+    async def _send(self, key: HostKey, request_bytes: bytes, method: str, timeout: Optional[float]) -> HTTPResponse:
+        # A pooled connection may have been closed by the server while idle; such a failure
+        # is only detectable on use, so retry once on a fresh connection -- but only when the
+        # server cannot have processed the request: the write failed, or the connection
+        # closed before any response byte arrived. Timeouts and protocol errors are raised,
+        # since the request may already be in progress and is not necessarily idempotent.
+        retried = False
+        while True:
+            connection, reused = await self._checkout(key, fresh=retried)
+            stale = False
+            try:
+                try:
+                    connection.writer.write(request_bytes)
+                    await connection.writer.drain()
+                except ConnectionError:
+                    stale = True
+                    raise
+                try:
+                    status, reason, headers = await self._read_head(connection, timeout)
+                except asyncio.IncompleteReadError as exc:
+                    stale = not exc.partial
+                    raise
+                except TransportError:
+                    raise
+                except ConnectionError:
+                    stale = True
+                    raise
+            except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                self._discard(connection)
+                if stale and reused and not retried:
+                    retried = True
+                    continue
+                raise TransportError(f"Request to {key[1]}:{key[2]} failed: {exc}") from exc
+            except BaseException:
+                self._discard(connection)
+                raise
+            no_body = method.upper() == "HEAD" or status in (204, 304) or 100 <= status < 200
+            return HTTPResponse(status, reason, headers, connection, self, timeout, no_body=no_body)
+
+    async def _checkout(self, key: HostKey, fresh: bool = False) -> Tuple[_Connection, bool]:
+        idle = self._idle.get(key)
+        while idle and not fresh:
+            connection = idle.pop()
+            if connection.is_usable(self.keepalive_timeout):
+                self.stats.connections_reused += 1
+                return connection, True
+            self._discard(connection)
+        return await self._connect(key), False
+
+    async def _connect(self, key: HostKey) -> _Connection:
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                import ssl
+
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_context), self.connect_timeout
+            )
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise TransportError(f"Could not connect to {host}:{port}: {exc}") from exc
+        self.stats.connections_created += 1
+        return _Connection(key, reader, writer)
+
+    async def _read_head(self, connection: _Connection, timeout: Optional[float]) -> Tuple[int, str, Dict[str, str]]:
+        async def read_head() -> bytes:
+            return await connection.reader.readuntil(b"\r\n\r\n")
+
+        try:
+            raw = await (asyncio.wait_for(read_head(), timeout) if timeout is not None else read_head())
+        except asyncio.TimeoutError as exc:
+            raise TransportError("Timed out waiting for response headers") from exc
+        except asyncio.LimitOverrunError as exc:
+            raise TransportError("Response headers too large") from exc
+        lines = raw.decode("latin-1").split("\r\n")
+        try:
+            _, status, *reason = lines[0].split(" ", 2)
+            status_code = int(status)
+        except ValueError as exc:
+            raise TransportError(f"Malformed status line: {lines[0]!r}") from exc
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return status_code, reason[0] if reason else "", headers
+
+    def _release(self, connection: _Connection, reusable: bool) -> None:
+        if not reusable or self._closed or not connection.is_usable(self.keepalive_timeout):
+            self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        self._idle.setdefault(connection.key, deque()).append(connection)
+        if self.idle_count() > self.max_connections:
+            oldest = min(
+                (conns for conns in self._idle.values() if conns),
+                key=lambda conns: conns[0].last_used,
+            )
+            self._discard(oldest.popleft())
+
+    def _discard(self, connection: _Connection) -> None:
+        connection.close()
+        self.stats.connections_closed += 1
+
+    @staticmethod
+    def _encode_request(
+        method: str,
+        target: str,
+        host: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+    ) -> bytes:
+        merged = {"Host": host, "Connection": "keep-alive", "Accept-Encoding": "identity"}
+        if headers:
+            merged.update(headers)
+        if body is not None:
+            merged["Content-Length"] = str(len(body))
+        head = f"{method.upper()} {target} HTTP/1.1\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in merged.items())
+        return head.encode("latin-1") + b"\r\n" + (body or b"")
@@ -0,0 +1,31 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access, so importing
+    a module that depends on a heavy library (e.g. NumPy) stays cheap until it is used.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Fully qualified module name.
+        """
+        self.__name = name
+        self.__module: Optional[ModuleType] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.__module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<LazyModule {self.__name!r} ({state})>"
@@ -0,0 +1,241 @@
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from token_counter import TokenCounter
+
+Message = Dict[str, str]
+
+
+class BufferMemory:
+    """
+    In-memory buffer of recent messages with a running token count.
+    Each message is counted once on insert; the buffer is bounded by message
+    count and/or total tokens, dropping the oldest messages first.
+    """
+
+    def __init__(
+        self,
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        """
+        Args:
+            max_messages: Optional cap on stored messages.
+            max_tokens: Optional cap on the total tokens of stored messages.
+            token_counter: Counter used for each message; defaults to TokenCounter().
+        """
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter or TokenCounter()
+        self.total_tokens = 0
+        self._messages: Deque[str] = deque()
+        self._tokens: Deque[int] = deque()
+
+    @property
+    def messages(self) -> List[str]:
+        return list(self._messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def add_message(self, msg: str) -> None:
+        """
+        Stores a message and evicts the oldest ones beyond the configured limits.
+        Args:
+            msg: Message text.
+        """
+        tokens = self.token_counter.count(msg)
+        self._messages.append(msg)
+        self._tokens.append(tokens)
+        self.total_tokens += tokens
+        while self._messages and (
+            (self.max_messages is not None and len(self._messages) > self.max_messages)
+            or (self.max_tokens is not None and self.total_tokens > self.max_tokens and len(self._messages) > 1)
+        ):
+            self._messages.popleft()
+            self.total_tokens -= self._tokens.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            JSON-serialisable state: the messages and their token counts.
+        """
+        return {"messages": list(self._messages), "tokens": list(self._tokens)}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Replaces the buffer's contents with a ``snapshot``; stored token counts are reused.
+        Args:
+            state: A dict produced by ``snapshot``.
+        """
+        self._messages = deque(state["messages"])
+        self._tokens = deque(state["tokens"])
+        self.total_tokens = sum(self._tokens)
+
+    def get_window(self, size: int) -> List[str]:
+        """
+        Args:
+            size: Number of most recent messages to return.
+        Returns:
+            Up to ``size`` most recent messages, oldest first.
+        """
+        if size <= 0:
+            return []
+        start = max(len(self._messages) - size, 0)
+        return [self._messages[i] for i in range(start, len(self._messages))]
+
+    def get_token_window(self, max_tokens: int) -> List[str]:
+        """
+        Args:
+            max_tokens: Token budget for the returned messages.
+        Returns:
+            The most recent messages whose combined tokens fit ``max_tokens``, oldest first.
+        """
+        window: List[str] = []
+        used = 0
+        for msg, tokens in zip(reversed(self._messages), reversed(self._tokens)):
+            if used + tokens > max_tokens:
+                break
+            window.append(msg)
+            used += tokens
+        window.reverse()
+        return window
+
+
+Summarizer = Callable[[Optional[str], List[Message]], Awaitable[str]]
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the running summary of a writer/editor conversation. Merge the new messages "
+    "into the previous summary. Keep the assignment status, decisions taken and the editor's "
+    "open critique points; drop superseded drafts. Answer with the updated summary only, "
+    "in at most {max_words} words."
+)
+
+
+def make_summarizer(openai_client: Any, max_words: int = 250, **params: Any) -> Summarizer:
+    """
+    Builds a summarizer that folds messages into the previous summary with one completion.
+    Args:
+        openai_client: Client with async complete_prompt.
+        max_words: Length limit given to the model, which keeps the summary bounded.
+        **params: Extra completion parameters (e.g. a cheaper model).
+    Returns:
+        An async callable (previous summary, new messages) -> updated summary.
+    """
+    system = SUMMARY_INSTRUCTIONS.format(max_words=max_words)
+    params.setdefault("temperature", 0)
+
+    async def summarize(previous: Optional[str], messages: List[Message]) -> str:
+        transcript = "\n\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        user = f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"
+        reply = await openai_client.complete_prompt(
+            [{"role": "system", "content": system}, {"role": "user", "content": user}], **params
+        )
+        return reply or previous or ""
+
+    return summarize
+
+
+class SummaryMemory:
+    """
+    Rolling summary of older turns for a Chatbot (``memory_modules["summary"]``). Only the
+    latest ``keep_turns`` turns stay verbatim in the chatbot's ContextWindow; older turns
+    are folded into the summary by a background task. They leave the window only once the
+    summary covering them is installed, so every prompt sees each turn either verbatim or
+    summarized, and the summarization call never sits on a turn's critical path.
+    """
+
+    def __init__(self, summarize: Summarizer, keep_turns: int = 1):
+        """
+        Args:
+            summarize: Async callable (previous summary, messages) -> updated summary,
+                e.g. ``make_summarizer(client)``.
+            keep_turns: Most recent turns (user message plus reply) kept verbatim.
+        """
+        if keep_turns < 0:
+            raise ValueError("keep_turns must not be negative.")
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.summary: Optional[str] = None
+        self.updates = 0
+        self.last_error: Optional[BaseException] = None
+        self.window: Any = None
+        self._evicted: List[Message] = []
+        self._in_flight: List[Message] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def bind(self, window: Any) -> None:
+        """
+        Attaches the ContextWindow to summarize; messages it trims for budget reasons
+        are folded into the next summary as well.
+        Args:
+            window: The chatbot's ContextWindow.
+        """
+        self.window = window
+        previous = window.on_evict
+
+        def on_evict(messages: List[Message]) -> None:
+            in_flight = {id(message) for message in self._in_flight}
+            self._evicted.extend(message for message in messages if id(message) not in in_flight)
+            if previous is not None:
+                previous(messages)
+
+        window.on_evict = on_evict
+
+    @property
+    def pending(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def update(self) -> None:
+        """Starts a background summarization if older turns are waiting and none is running."""
+        if self.window is None or self.pending:
+            return
+        older = max(len(self.window) - 2 * self.keep_turns, 0)
+        if not older and not self._evicted:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._in_flight = self._evicted + list(itertools.islice(iter(self.window), older))
+        self._evicted = []
+        self._task = loop.create_task(self._run(self._in_flight))
+
+    async def wait(self) -> None:
+        """Waits for the running summarization, if any."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"summary": self.summary, "evicted": list(self._evicted)}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        self.summary = state.get("summary")
+        self._evicted = list(state.get("evicted", []))
+
+    async def _run(self, batch: List[Message]) -> None:
+        try:
+            summary = await self.summarize(self.summary, batch)
+        except Exception as exc:
+            # Keep the turns verbatim and retry on the next update.
+            self.last_error = exc
+            self._evicted = [m for m in batch if not self._in_window(m)] + self._evicted
+            self._in_flight = []
+            return
+        count = 0
+        for message in self.window:
+            if count == len(batch) or not any(message is m for m in batch):
+                break
+            count += 1
+        self.window.evict(count)
+        self.window.set_summary(summary)
+        self.summary = summary
+        self.updates += 1
+        self.last_error = None
+        self._in_flight = []
+
+    def _in_window(self, message: Message) -> bool:
+        return any(message is m for m in self.window)
@@ -0,0 +1,481 @@
+import asyncio
+import bisect
+import itertools
+import json
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram in the Prometheus style: per-bucket counts plus a running
+    count and sum, so recording a value is a bisect and two additions.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Sorted upper bounds; values above the last bound land in "+Inf".
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Adds another histogram's observations (e.g. one recorded in a worker process).
+        Args:
+            other: Histogram with the same buckets.
+        Raises:
+            ValueError: If the buckets differ.
+        """
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Args:
+            q: Quantile in [0, 1].
+        Returns:
+            Upper bound of the bucket containing the quantile (``inf`` for the overflow bucket).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Returns:
+            Cumulative bucket counts keyed by upper bound, plus count and sum.
+        """
+        cumulative: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by metric name and label set."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Bucket bounds used for histograms created on first observation.
+        """
+        self.buckets = tuple(buckets)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + amount
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def merge(self, other: "MetricsRegistry") -> None:
+        """
+        Adds every counter and histogram of ``other`` into this registry. Gauges are summed,
+        so e.g. queue depths reported by several worker processes add up.
+        Args:
+            other: Registry to fold in (e.g. one shipped back from a worker process).
+        """
+        for name, series in other.counters.items():
+            target = self.counters.setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0.0) + value
+        for name, series in other.gauges.items():
+            target = self.gauges.setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0.0) + value
+        for name, series in other.histograms.items():
+            target_histograms = self.histograms.setdefault(name, {})
+            for key, histogram in series.items():
+                if key not in target_histograms:
+                    target_histograms[key] = Histogram(histogram.buckets)
+                target_histograms[key].merge(histogram)
+        for name, text in other.help.items():
+            self.help.setdefault(name, text)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            JSON-serialisable view of every series.
+        """
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            },
+            "gauges": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.gauges.items()
+            },
+            "histograms": {
+                name: [{"labels": dict(key), **histogram.snapshot()} for key, histogram in series.items()]
+                for name, series in self.histograms.items()
+            },
+        }
+
+
+class Span:
+    """
+    A timed operation; use as a context manager. Spans opened inside another span (in the
+    same task or a task created within it) record it as their parent.
+    """
+
+    __slots__ = (
+        "tracer", "name", "attributes", "span_id", "parent", "start", "end", "wall_start", "error", "_previous", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = 0
+        self.parent: Optional[Span] = None
+        self.start = 0.0
+        self.end: Optional[float] = None
+        self.wall_start = 0.0
+        self.error: Optional[str] = None
+        self._previous: Optional[Span] = None
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> "Span":
+        self.tracer._start(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._finish(self)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.tracer.clock()) - self.start
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "start": self.wall_start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """
+    Creates nested spans and records metrics. Every finished span's duration is observed
+    in the ``span_duration_seconds{span=...}`` histogram; exporters with ``on_start`` /
+    ``on_end`` hooks receive spans as they open and close.
+    """
+
+    enabled = True
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        exporters: Sequence[Any] = (),
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        """
+        Args:
+            registry: Metrics registry; a new one is created if omitted.
+            exporters: Span exporters (e.g. JSONExporter, OpenTelemetryExporter).
+            clock: Monotonic clock used for durations.
+        """
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.exporters = list(exporters)
+        self.clock = clock
+        self._current: ContextVar[Optional[Span]] = ContextVar(f"current_span_{id(self)}", default=None)
+        self._ids = itertools.count(1)
+
+    def span(self, name: str, **attributes: Any) -> Span:
+        return Span(self, name, attributes)
+
+    def current(self) -> Optional[Span]:
+        return self._current.get()
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        self.registry.inc(name, amount, **labels)
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        self.registry.gauge(name, value, **labels)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        self.registry.observe(name, value, **labels)
+
+    def _start(self, span: Span) -> None:
+        span.span_id = next(self._ids)
+        span.parent = span._previous = self._current.get()
+        span.wall_start = time.time()
+        span.start = self.clock()
+        span._token = self._current.set(span)
+        for exporter in self.exporters:
+            on_start = getattr(exporter, "on_start", None)
+            if on_start is not None:
+                on_start(span)
+
+    def _finish(self, span: Span) -> None:
+        span.end = self.clock()
+        try:
+            self._current.reset(span._token)
+        except ValueError:
+            # Closed in another context (e.g. a different task); there, restore by value.
+            self._current.set(span._previous)
+        span._token = None
+        self.registry.observe("span_duration_seconds", span.end - span.start, span=span.name)
+        for exporter in self.exporters:
+            on_end = getattr(exporter, "on_end", None)
+            if on_end is not None:
+                on_end(span)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer that records nothing; its spans are one shared no-op object."""
+
+    enabled = False
+
+    def span(self, name: str, **attributes: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+    def current(self) -> None:
+        return None
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        pass
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        pass
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        pass
+
+
+# Stateless default used by components constructed without a tracer.
+NULL_TRACER = NullTracer()
+
+
+def prometheus_text(registry: MetricsRegistry) -> str:
+    """
+    Args:
+        registry: Metrics to render.
+    Returns:
+        The registry in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for name, series in sorted(registry.counters.items()):
+        if name in registry.help:
+            lines.append(f"# HELP {name} {registry.help[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in series.items():
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    for name, series in sorted(registry.gauges.items()):
+        if name in registry.help:
+            lines.append(f"# HELP {name} {registry.help[name]}")
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in series.items():
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    for name, series in sorted(registry.histograms.items()):
+        if name in registry.help:
+            lines.append(f"# HELP {name} {registry.help[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in series.items():
+            for bound, count in histogram.snapshot()["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in key)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class PrometheusExporter:
+    """Serves a registry on ``GET /metrics`` for Prometheus to scrape."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        """
+        Args:
+            registry: Metrics to expose.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free port.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n", 1)[0].decode("latin-1")
+            path = request_line.split(" ")[1] if " " in request_line else ""
+            if path.split("?")[0] == "/metrics":
+                status, body = "200 OK", prometheus_text(self.registry).encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class JSONExporter:
+    """Writes finished spans as JSON lines (with rotation) and dumps metric snapshots."""
+
+    def __init__(self, path: str, **writer_options: Any):
+        """
+        Args:
+            path: Span log path.
+            **writer_options: ConversationLogWriter options (max_bytes, compress, ...).
+        """
+        from conversation_log import ConversationLogWriter
+
+        self.writer = ConversationLogWriter(path, **writer_options)
+
+    def on_end(self, span: Span) -> None:
+        self.writer.write(span.to_dict())
+
+    def dump(self, registry: MetricsRegistry, path: str) -> None:
+        """
+        Args:
+            registry: Metrics to dump.
+            path: Target JSON file.
+        """
+        self.writer.flush()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(registry.snapshot(), f, indent=2)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class OpenTelemetryExporter:
+    """
+    Mirrors spans into OpenTelemetry, keeping parent/child links, so they reach any
+    configured OTel backend. Requires the ``opentelemetry-api`` package.
+    """
+
+    def __init__(self, otel_tracer: Any = None, instrumentation_name: str = "chatgpt-writer-editor-agents"):
+        """
+        Args:
+            otel_tracer: OpenTelemetry tracer; defaults to one from the global tracer provider.
+            instrumentation_name: Name used when creating the default tracer.
+        Raises:
+            ImportError: If opentelemetry is not installed.
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError as exc:
+            raise ImportError("OpenTelemetryExporter requires the 'opentelemetry-api' package.") from exc
+        self._trace = trace
+        self.otel_tracer = otel_tracer if otel_tracer is not None else trace.get_tracer(instrumentation_name)
+        self._open: Dict[int, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._open.get(span.parent.span_id) if span.parent is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._open[span.span_id] = self.otel_tracer.start_span(
+            span.name, context=context, start_time=int(span.wall_start * 1e9)
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        if span.error is not None:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.wall_start + span.duration) * 1e9))
@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from token_counter import TokenCounter
+
+LatencyModel = Callable[[random.Random], float]
+
+_WORDS = (
+    "prompt engineering research chatgpt model paper framework summary step test reasoning "
+    "language plugin sequence benchmark result method idea context writer editor draft"
+).split()
+
+
+def fixed(seconds: float) -> LatencyModel:
+    """Latency model that always waits ``seconds``."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> LatencyModel:
+    """Latency model drawing uniformly from [low, high]."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> LatencyModel:
+    """Heavy-tailed latency model with the given median, typical of real API first-token times."""
+    mu = math.log(median) if median > 0 else float("-inf")
+    return lambda rng: rng.lognormvariate(mu, sigma) if median > 0 else 0.0
+
+
+@dataclass
+class MockServerStats:
+    """Request counters of a MockOpenAIServer."""
+
+    connections: int = 0
+    requests: int = 0
+    completions: int = 0
+    streams: int = 0
+    embeddings: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+
+
+class MockOpenAIServer:
+    """
+    Deterministic, OpenAI-compatible HTTP/1.1 server for offline tests and load tests.
+    Serves ``/v1/chat/completions`` (plain and SSE streaming) and ``/v1/embeddings``.
+    Replies are generated from a hash of the request, so identical requests get identical
+    text; latency, token throughput and 429/5xx injection are drawn from a seeded RNG.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: LatencyModel = fixed(0.0),
+        tokens_per_second: Optional[float] = None,
+        completion_tokens: int = 256,
+        section_tokens: int = 64,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.05,
+        chunk_tokens: int = 4,
+        embedding_dim: int = 64,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free port.
+            latency: Time-to-first-token model.
+            tokens_per_second: Generation speed after the first token; None means instant.
+            completion_tokens: Reply length in tokens when the request has no ``max_tokens``.
+            section_tokens: Tokens per "## Section" of generated text (0 disables headings).
+            error_rate: Probability of answering a request with HTTP 500.
+            rate_limit_rate: Probability of answering a request with HTTP 429.
+            retry_after: ``retry-after`` seconds sent with injected 429s.
+            chunk_tokens: Tokens per SSE chunk when streaming.
+            embedding_dim: Dimensionality of returned embeddings.
+            seed: Seed for latency and fault injection.
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.section_tokens = section_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.embedding_dim = embedding_dim
+        self.stats = MockServerStats()
+        self.token_counter = TokenCounter()
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def __aenter__(self) -> "MockOpenAIServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> None:
+        """Runs the server on its own event loop in a daemon thread, so load tests do not share the client's loop."""
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-openai-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop_thread(self) -> None:
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def reply_for(self, payload: Dict[str, Any]) -> str:
+        """
+        Args:
+            payload: Chat completion request body.
+        Returns:
+            The deterministic reply text for this request.
+        """
+        digest = hashlib.sha256(json.dumps(payload.get("messages", []), sort_keys=True).encode("utf-8")).digest()
+        rng = random.Random(digest)
+        n_tokens = int(payload.get("max_tokens") or self.completion_tokens)
+        words: List[str] = []
+        for i in range(n_tokens):
+            if self.section_tokens and i % self.section_tokens == 0:
+                words.append(f"\n\n## Section {i // self.section_tokens + 1}\n")
+            words.append(rng.choice(_WORDS))
+        return " ".join(words).strip()
+
+    def _fault(self) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            self.stats.rate_limited += 1
+            body = {"error": {"message": "Rate limit reached (injected).", "type": "rate_limit_exceeded"}}
+            return 429, {"retry-after": str(self.retry_after)}, json.dumps(body).encode()
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats.errors += 1
+            body = {"error": {"message": "Internal server error (injected).", "type": "server_error"}}
+            return 500, {}, json.dumps(body).encode()
+        return None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats.connections += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                _, path, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.stats.requests += 1
+                await self._handle(path, body, writer)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self._send(writer, 400, {}, b'{"error": {"message": "Invalid JSON body."}}')
+            return
+        fault = self._fault()
+        if fault is not None:
+            self._send(writer, *fault)
+            return
+        if path.endswith("/embeddings"):
+            self.stats.embeddings += 1
+            self._send(writer, 200, {}, json.dumps(self._embeddings(payload)).encode())
+            return
+        if not path.endswith("/chat/completions"):
+            self._send(writer, 404, {}, b'{"error": {"message": "Not found."}}')
+            return
+        text = self.reply_for(payload)
+        prompt_tokens = sum(self.token_counter.count_message(m) for m in payload.get("messages", []))
+        completion_tokens = self.token_counter.count(text)
+        await asyncio.sleep(self.latency(self._rng))
+        if payload.get("stream"):
+            self.stats.streams += 1
+            await self._stream(writer, text)
+            return
+        self.stats.completions += 1
+        await self._generate(completion_tokens)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        data = {
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+        self._send(writer, 200, {}, json.dumps(data).encode())
+
+    async def _stream(self, writer: asyncio.StreamWriter, text: str) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+        words = text.split(" ")
+        for i in range(0, len(words), self.chunk_tokens):
+            piece = " ".join(words[i:i + self.chunk_tokens]) + (" " if i + self.chunk_tokens < len(words) else "")
+            event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+            self._write_chunk(writer, b"data: " + json.dumps(event).encode() + b"\n\n")
+            await writer.drain()
+            await self._generate(self.chunk_tokens)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _generate(self, tokens: int) -> None:
+        if self.tokens_per_second:
+            await asyncio.sleep(tokens / self.tokens_per_second)
+
+    def _embeddings(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        for index, text in enumerate(inputs):
+            seed = hashlib.sha256(str(text).encode("utf-8")).digest()
+            rng = random.Random(struct.unpack("<Q", seed[:8])[0])
+            data.append({"index": index, "embedding": [rng.gauss(0.0, 1.0) for _ in range(self.embedding_dim)]})
+        return {"object": "list", "data": data, "model": payload.get("model")}
+
+    @staticmethod
+    def _send(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str], body: bytes) -> None:
+        head = [f"HTTP/1.1 {status} MOCK", "Content-Type: application/json", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median time to first token (seconds).")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = MockOpenAIServer(
+        args.host,
+        args.port,
+        latency=lognormal(args.latency),
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+
+    async def serve() -> None:
+        await server.start()
+        print(f"Mock OpenAI server listening on {server.base_url}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+            print(json.dumps(asdict(server.stats)))
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,424 @@
-from typing import Any
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from endpoint_pool import Endpoint, EndpointPool
+from http_transport import ConnectionPool, HTTPResponse, PoolStats, TransportError
+from metrics import NULL_TRACER
+from rate_limiter import RateLimiter, RetryPolicy, estimate_tokens, parse_reset
+from response_cache import ResponseCache, cache_key
+from singleflight import SingleFlight
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+Messages = Sequence[Dict[str, str]]
+
+
+class OpenAIError(RuntimeError):
+    """Base class for errors reported by the OpenAI API."""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitError(OpenAIError):
+    """Raised when the API rejects a request with HTTP 429."""
+
+
+class AuthenticationError(OpenAIError, PermissionError):
+    """Raised when the API key is missing, invalid or lacks permission."""
+
+
+class APIConnectionError(OpenAIError, ConnectionError):
+    """Raised when the API cannot be reached or the connection drops."""
+
 
 class OpenAIClient:
     """
     Abstracts all interactions with the OpenAI GPT API, handling asynchronous requests and error management.
-    Loads API keys securely from configuration.
+    Loads API keys securely from configuration. Requests go through a pooled keep-alive
+    transport; pass the same ``pool`` to several clients (or share one client between
+    several Chatbots) so they reuse warm connections instead of re-handshaking per turn.
+    With an EndpointPool, requests are balanced over several keys and endpoints and fail
+    over to another one when an endpoint is throttled, unreachable or unhealthy.
     """
 
-    def __init__(self, config_manager: Any):
+    def __init__(
+        self,
+        config_manager: Any,
+        model: str = "gpt-4",
+        base_url: str = DEFAULT_BASE_URL,
+        pool: Optional[ConnectionPool] = None,
+        max_connections: int = 100,
+        max_connections_per_host: int = 20,
+        timeout: Optional[float] = 120.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[ResponseCache] = None,
+        tracer: Any = NULL_TRACER,
+        endpoints: Optional[EndpointPool] = None,
+        singleflight: Optional[SingleFlight] = None,
+    ):
         """
         Args:
             config_manager: Instance of ConfigManager or compatible config provider.
+            model: Default chat model used when a call does not specify one.
+            base_url: API root, e.g. a local OpenAI-compatible server for tests.
+            pool: Optional shared ConnectionPool; if omitted the client owns a private one.
+            max_connections: Pool-wide connection cap for a privately owned pool.
+            max_connections_per_host: Per-host connection cap for a privately owned pool.
+            timeout: Per-read timeout in seconds for API responses.
+            rate_limiter: Optional shared RateLimiter; by default budgets are learned from response headers.
+            retry_policy: Backoff policy for rate-limited, failed or 5xx requests.
+            cache: Optional ResponseCache consulted before deterministic requests.
+            tracer: metrics.Tracer recording request spans, queue waits, tokens and cache hits.
+            endpoints: Optional EndpointPool (e.g. EndpointPool.from_config); replaces the single
+                ``OPENAI_API_KEY`` at ``base_url``, and each endpoint keeps its own rate budget.
+            singleflight: Optional SingleFlight; concurrent identical deterministic requests
+                then share one upstream call (or stream) instead of each sending their own.
         """
-        self.api_key = config_manager.get("OPENAI_API_KEY")
+        if endpoints is None:
+            self.api_key = config_manager.get("OPENAI_API_KEY")
         # Additional state as needed for error simulation in tests
         self.fail_mode = None
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else ConnectionPool(
+            max_connections=max_connections,
+            max_connections_per_host=max_connections_per_host,
+        )
+        self._unsubscribe = None
+        if endpoints is None:
+            self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+            # A single endpoint has nothing to fail over to, so its circuit never opens.
+            endpoints = EndpointPool(
+                [Endpoint(self.base_url, self.api_key, rate_limiter=self.rate_limiter)], failure_threshold=None
+            )
+            if callable(getattr(config_manager, "subscribe", None)):
+                # Pick up a rotated key on reload; requests already sent keep their headers.
+                # A caller-supplied pool owns its keys, so only the key read above is tracked.
+                self._unsubscribe = config_manager.subscribe(self._on_config_change)
+        else:
+            self.api_key = endpoints.endpoints[0].api_key
+            self.rate_limiter = endpoints.endpoints[0].rate_limiter
+        self.endpoints = endpoints
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.cache = cache
+        self.singleflight = singleflight
+        self.tracer = tracer
+
+    async def __aenter__(self) -> "OpenAIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the connection pool if this client owns it."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self._owns_pool:
+            await self.pool.close()
+
+    def _on_config_change(self, old: Any, new: Any) -> None:
+        api_key = new.get("OPENAI_API_KEY", None)
+        if api_key and api_key != self.api_key:
+            self.api_key = self.endpoints.endpoints[0].api_key = api_key
 
-    async def complete_prompt(self, prompt: str) -> Any:
+    @property
+    def stats(self) -> PoolStats:
+        """Connection pool counters, including how many requests reused a connection."""
+        return self.pool.stats
+
+    async def complete_prompt(self, prompt: Union[str, Messages], **params: Any) -> Optional[str]:
         """
         Sends a prompt to the OpenAI API asynchronously and returns the completion.
         Args:
-            prompt: The prompt string to send.
+            prompt: The prompt string to send, or a list of chat messages.
+            **params: Extra request parameters (model, temperature, max_tokens, ...).
         Returns:
             The completion result (string or None).
+        Raises:
+            RateLimitError: If the API responds with HTTP 429.
+            AuthenticationError: If the API key is rejected.
+            APIConnectionError: If the API cannot be reached.
+            OpenAIError: For any other unsuccessful response.
+        """
+        payload = self._build_payload(prompt, params)
+        with self.tracer.span("openai.complete", model=payload["model"]) as span:
+            cached = self._lookup(payload)
+            if cached is not None:
+                span.set("cached", True)
+                return cached
+            key = self._flight_key(payload)
+            if key is None:
+                return await self._complete(payload, span)
+            if self.singleflight.joins(key):
+                span.set("coalesced", True)
+                self.tracer.inc("openai_coalesced_total", kind="complete")
+            return await self.singleflight.do(key, lambda: self._complete(payload, span))
+
+    async def stream_prompt(self, prompt: Union[str, Messages], **params: Any) -> AsyncIterator[str]:
         """
-        pass
\ No newline at end of file
+        Streams a completion, yielding content deltas as soon as they arrive.
+        Retries only happen before the first delta; a failure mid-stream is raised.
+        Args:
+            prompt: The prompt string to send, or a list of chat messages.
+            **params: Extra request parameters (model, temperature, max_tokens, ...).
+        Returns:
+            An async iterator of content deltas.
+        Raises:
+            RateLimitError: If the API responds with HTTP 429.
+            AuthenticationError: If the API key is rejected.
+            APIConnectionError: If the API cannot be reached or the stream breaks.
+            OpenAIError: For any other unsuccessful response.
+        """
+        payload = self._build_payload(prompt, params)
+        cached = self._lookup(payload)
+        if cached is not None:
+            yield cached
+            return
+        key = self._flight_key(payload)
+        if key is None:
+            deltas = self._stream(payload)
+        else:
+            if self.singleflight.joins("stream:" + key):
+                self.tracer.inc("openai_coalesced_total", kind="stream")
+            deltas = self.singleflight.stream("stream:" + key, lambda: self._stream(payload))
+        async for delta in deltas:
+            yield delta
+
+    async def _complete(self, payload: Dict[str, Any], span: Any) -> Optional[str]:
+        tokens = estimate_tokens(payload["messages"], payload.get("max_tokens") or 0)
+        async with self._open("/chat/completions", payload, tokens, preload=True) as (response, endpoint):
+            data = self._decode(await response.read())
+        usage = self._usage(data)
+        endpoint.rate_limiter.reconcile(tokens, usage)
+        self._count_tokens(span, payload["model"], tokens, usage)
+        content = self._extract_content(data)
+        if self.cache is not None:
+            self.cache.store(payload, content)
+        return content
+
+    async def _stream(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        payload = dict(payload, stream=True)
+        tokens = estimate_tokens(payload["messages"], payload.get("max_tokens") or 0)
+        parts: List[str] = []
+        # No span here: it would stay open across yields, in the consumer's context.
+        started = time.perf_counter()
+        async with self._open("/chat/completions", payload, tokens) as (response, _):
+            async for data in self._iter_events(response):
+                if data == "[DONE]":
+                    # Keep reading so the body ends cleanly and the connection can be reused.
+                    continue
+                delta = self._extract_delta(self._decode(data.encode("utf-8")))
+                if delta:
+                    if not parts:
+                        self.tracer.observe("openai_first_token_seconds", time.perf_counter() - started)
+                    parts.append(delta)
+                    yield delta
+        self.tracer.observe("openai_stream_seconds", time.perf_counter() - started)
+        # A stream that produced no content is treated like None from _complete: not cached.
+        if self.cache is not None and parts:
+            self.cache.store(payload, "".join(parts))
+
+    async def embed(self, texts: Sequence[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+        """
+        Embeds a batch of texts with one API call.
+        Args:
+            texts: Texts to embed.
+            model: Embedding model.
+        Returns:
+            One embedding per text, in input order.
+        Raises:
+            OpenAIError: If the API call fails or the response is malformed.
+        """
+        payload = {"model": model, "input": list(texts)}
+        tokens = estimate_tokens({"content": text} for text in texts)
+        with self.tracer.span("openai.embed", model=model, texts=len(payload["input"])):
+            async with self._open("/embeddings", payload, tokens, preload=True) as (response, _):
+                data = self._decode(await response.read())
+        try:
+            items = sorted(data["data"], key=lambda item: item["index"])
+            return [item["embedding"] for item in items]
+        except (KeyError, TypeError) as exc:
+            raise OpenAIError("Malformed embeddings response") from exc
+
+    def _lookup(self, payload: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        cached = self.cache.lookup(payload)
+        if self.cache.is_cacheable(payload):
+            self.tracer.inc("openai_cache_lookups_total", result="miss" if cached is None else "hit")
+        return cached
+
+    def _flight_key(self, payload: Dict[str, Any]) -> Optional[str]:
+        if self.singleflight is None:
+            return None
+        if not self.singleflight.is_coalescable(payload):
+            self.singleflight.stats.bypassed += 1
+            return None
+        return cache_key(payload)
+
+    def _count_tokens(self, span: Any, model: str, estimated: int, usage: Optional[int]) -> None:
+        span.set("tokens", usage if usage is not None else estimated)
+        self.tracer.inc("openai_tokens_total", usage if usage is not None else estimated, model=model)
+
+    def _build_payload(self, prompt: Union[str, Messages], params: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(prompt, str):
+            messages: List[Dict[str, str]] = [{"role": "user", "content": prompt}]
+        else:
+            messages = list(prompt)
+        payload: Dict[str, Any] = {"model": self.model, "messages": messages}
+        payload.update(params)
+        return payload
+
+    @asynccontextmanager
+    async def _open(
+        self, path: str, payload: Dict[str, Any], tokens: int = 0, preload: bool = False
+    ) -> AsyncIterator[Tuple[HTTPResponse, Endpoint]]:
+        body = json.dumps(payload).encode("utf-8")
+        attempt = 0
+        tried: List[Endpoint] = []
+        error: Optional[OpenAIError] = None
+        while True:
+            endpoint = self.endpoints.select(tokens, exclude=tried)
+            if endpoint is None:
+                raise error or APIConnectionError("No healthy API endpoint available.")
+            tried.append(endpoint)
+            started = reserved = False
+            try:
+                queued = time.perf_counter()
+                await endpoint.rate_limiter.acquire(tokens)
+                reserved = True
+                sent = time.perf_counter()
+                self.tracer.observe("openai_queue_wait_seconds", sent - queued)
+                async with self.pool.stream(
+                    "POST", endpoint.base_url + path, headers=endpoint.headers(),
+                    body=self._body(payload, body, endpoint), timeout=self.timeout,
+                ) as response:
+                    self.tracer.observe("openai_response_header_seconds", time.perf_counter() - sent)
+                    self.tracer.inc("openai_requests_total", status=response.status)
+                    endpoint.rate_limiter.update_from_headers(response.headers)
+                    if response.status >= 400 or preload:
+                        data = await response.read()
+                    if response.status < 400:
+                        started = True
+                        yield response, endpoint
+                        endpoint.finish(True)
+                        return
+            except TransportError as exc:
+                endpoint.finish(False)
+                error = APIConnectionError(str(exc))
+                error.__cause__ = exc
+                if started:
+                    raise error
+            except BaseException:
+                endpoint.finish(None)
+                if reserved and not started:
+                    endpoint.rate_limiter.reconcile(tokens, 0)
+                raise
+            else:
+                try:
+                    self._raise_for_status(response.status, data, response.headers)
+                except OpenAIError as exc:
+                    error = exc
+                # Throttling and client errors say nothing about the endpoint's health.
+                rejected = isinstance(error, AuthenticationError)
+                healthy = isinstance(error, RateLimitError) or not (rejected or self._is_retryable(error))
+                endpoint.finish(healthy, trip=rejected)
+            if reserved:
+                # The attempt failed before any usage was reported; give its tokens back so
+                # retries and failovers charge the request's budget only once.
+                endpoint.rate_limiter.reconcile(tokens, 0)
+            if isinstance(error, RateLimitError):
+                endpoint.rate_limiter.record_throttle(error.retry_after)
+            if (self._is_retryable(error) or isinstance(error, AuthenticationError)) and self.endpoints.has_available(tried):
+                # Another endpoint can take the request right away; no backoff needed.
+                self.tracer.inc("openai_failovers_total", status=error.status)
+                continue
+            if not self._is_retryable(error) or attempt >= self.retry_policy.max_retries:
+                raise error
+            self.tracer.inc("openai_retries_total", status=error.status)
+            if not (isinstance(error, RateLimitError) and error.retry_after):
+                # A 429 with retry-after has already paused the limiter; the next acquire()
+                # waits that pause out, so sleeping here as well would double the backoff.
+                await asyncio.sleep(self.retry_policy.delay(attempt, error.retry_after))
+            attempt += 1
+            tried = []
+
+    @staticmethod
+    def _body(payload: Dict[str, Any], body: bytes, endpoint: Endpoint) -> bytes:
+        if endpoint.model is None or payload.get("model") == endpoint.model:
+            return body
+        return json.dumps(dict(payload, model=endpoint.model)).encode("utf-8")
+
+    @staticmethod
+    def _is_retryable(error: OpenAIError) -> bool:
+        if isinstance(error, (RateLimitError, APIConnectionError)):
+            return True
+        return error.status is not None and (error.status >= 500 or error.status == 408)
+
+    @staticmethod
+    def _raise_for_status(status: int, body: bytes, headers: Optional[Mapping[str, str]] = None) -> None:
+        if status < 400:
+            return
+        try:
+            message = json.loads(body)["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = body.decode("utf-8", "replace")[:200] or f"HTTP {status}"
+        retry_after = parse_reset(headers["retry-after"]) if headers and "retry-after" in headers else None
+        if status == 429:
+            raise RateLimitError(message, status, retry_after)
+        if status in (401, 403):
+            raise AuthenticationError(message, status)
+        raise OpenAIError(message, status, retry_after)
+
+    @staticmethod
+    async def _iter_events(response: HTTPResponse) -> AsyncIterator[str]:
+        # Server-sent events: each "data:" line carries one JSON chunk.
+        buffer = b""
+        async for chunk in response.iter_chunks():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    yield line[5:].strip().decode("utf-8")
+        if buffer.strip().startswith(b"data:"):
+            yield buffer.strip()[5:].strip().decode("utf-8")
+
+    @staticmethod
+    def _decode(body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _usage(data: Any) -> Optional[int]:
+        try:
+            return int(data["usage"]["total_tokens"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _extract_content(data: Any) -> Optional[str]:
+        try:
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            return None
+
+    @staticmethod
+    def _extract_delta(data: Any) -> Optional[str]:
+        try:
+            return data["choices"][0]["delta"].get("content")
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return None
@@ -0,0 +1,119 @@
+from string import Formatter
+from typing import Any, List, Optional, Tuple
+
+from token_counter import TokenCounter
+
+# (literal text, field name or None, conversion or None, format spec)
+Segment = Tuple[str, Optional[str], Optional[str], str]
+
+
+class PromptTemplateError(ValueError):
+    """Raised when a template contains invalid or unsupported placeholders."""
+
+
+class PromptTemplate:
+    """
+    Prompt template compiled once into static text segments and named slots.
+    Rendering only formats the slots and joins precomputed literals, and the token
+    count of the static text is computed once, so long system prompts such as
+    chatbot6.txt/chatbot7.txt cost almost nothing per turn. Placeholders use
+    ``str.format`` syntax and are validated when the template is created.
+    """
+
+    def __init__(self, template: str, token_counter: Optional[TokenCounter] = None, name: Optional[str] = None):
+        """
+        Args:
+            template: Template text with ``{name}`` placeholders (``{{``/``}}`` for literal braces).
+            token_counter: Counter used for token budgeting; defaults to TokenCounter().
+            name: Optional label, e.g. the source file name.
+        Raises:
+            PromptTemplateError: If a placeholder is malformed, positional or uses attribute/index access.
+        """
+        self.template = template
+        self.name = name
+        self.token_counter = token_counter or TokenCounter()
+        self.segments: List[Segment] = self._compile(template)
+        self.fields: Tuple[str, ...] = tuple(dict.fromkeys(f for _, f, _, _ in self.segments if f is not None))
+        self.static_text = "".join(literal for literal, _, _, _ in self.segments)
+        self._static_tokens: Optional[int] = None
+        # A template without slots renders to the same string object every time.
+        self._constant: Optional[str] = self.static_text if not self.fields else None
+
+    @classmethod
+    def from_file(cls, path: str, token_counter: Optional[TokenCounter] = None) -> "PromptTemplate":
+        """
+        Args:
+            path: UTF-8 template file.
+            token_counter: Optional counter for token budgeting.
+        Returns:
+            The compiled template.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(f.read(), token_counter=token_counter, name=path)
+
+    @property
+    def static_tokens(self) -> int:
+        """Token count of the static text, computed on first use and cached."""
+        if self._static_tokens is None:
+            self._static_tokens = self.token_counter.count(self.static_text)
+        return self._static_tokens
+
+    def render(self, **kwargs: Any) -> str:
+        """
+        Fills the slots; extra keyword arguments are ignored, as with ``str.format``.
+        Args:
+            **kwargs: Slot values.
+        Returns:
+            The rendered prompt.
+        Raises:
+            KeyError: If a slot has no value.
+        """
+        if self._constant is not None:
+            return self._constant
+        parts = []
+        for literal, field, conversion, spec in self.segments:
+            parts.append(literal)
+            if field is not None:
+                value = kwargs[field]
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                elif conversion == "a":
+                    value = ascii(value)
+                parts.append(format(value, spec))
+        return "".join(parts)
+
+    # Compatible with the ``.format(**kwargs)`` interface Chatbot expects.
+    format = render
+
+    def count_tokens(self, **kwargs: Any) -> int:
+        """
+        Estimates the rendered prompt's tokens without re-tokenizing the static text.
+        Args:
+            **kwargs: Slot values.
+        Returns:
+            Cached static tokens plus the tokens of the rendered slot values.
+        """
+        dynamic = 0
+        for field in self.fields:
+            dynamic += self.token_counter.count(str(kwargs[field]))
+        return self.static_tokens + dynamic
+
+    @staticmethod
+    def _compile(template: str) -> List[Segment]:
+        segments: List[Segment] = []
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as exc:
+            raise PromptTemplateError(f"Malformed template: {exc}") from exc
+        for literal, field, spec, conversion in parsed:
+            if field is not None:
+                if not field.isidentifier():
+                    raise PromptTemplateError(
+                        f"Unsupported placeholder {{{field}}}: use named fields without attribute or index access."
+                    )
+                if spec and ("{" in spec or "}" in spec):
+                    raise PromptTemplateError(f"Nested placeholders are not supported in {{{field}:{spec}}}.")
+            segments.append((literal, field, conversion, spec or ""))
+        return segments
@@ -0,0 +1,281 @@
+import asyncio
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Optional
+
+Clock = Callable[[], float]
+Sleep = Callable[[float], Awaitable[Any]]
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """
+    Parses a rate-limit reset value such as ``"1s"``, ``"6m0s"``, ``"20ms"`` or ``"0.5"``.
+    Args:
+        value: Header value.
+    Returns:
+        The duration in seconds, or None if the value cannot be parsed.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def estimate_tokens(messages: Iterable[Mapping[str, Any]], max_tokens: int = 0) -> int:
+    """
+    Cheap upper-bound token estimate used for tokens-per-minute budgeting.
+    Args:
+        messages: Chat messages that make up the request.
+        max_tokens: Completion tokens reserved by the request.
+    Returns:
+        Estimated prompt tokens plus the completion reservation.
+    """
+    messages = list(messages)
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars // 4 + 4 * len(messages) + max_tokens
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket. ``capacity`` tokens are available per
+    ``period`` seconds; a capacity of None means the bucket never limits.
+    """
+
+    def __init__(self, capacity: Optional[float], period: float = 60.0, clock: Clock = time.monotonic):
+        """
+        Args:
+            capacity: Maximum tokens (the per-period budget), or None for unlimited.
+            period: Seconds needed to refill an empty bucket.
+            clock: Monotonic clock, injectable for tests.
+        """
+        self.period = period
+        self._clock = clock
+        self.capacity = capacity
+        self.tokens = float(capacity) if capacity is not None else 0.0
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if self.capacity is not None:
+            rate = self.capacity / self.period
+            self.tokens = min(float(self.capacity), self.tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Args:
+            amount: Tokens that would be consumed.
+        Returns:
+            Seconds until ``amount`` tokens are available (0 if available now).
+        """
+        if self.capacity is None:
+            return 0.0
+        self._refill(self._clock())
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * self.period / self.capacity
+
+    def consume(self, amount: float) -> None:
+        if self.capacity is not None:
+            self._refill(self._clock())
+            self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        if self.capacity is not None:
+            self._refill(self._clock())
+            self.tokens = min(float(self.capacity), self.tokens + amount)
+
+    def update(self, limit: Optional[float] = None, remaining: Optional[float] = None) -> None:
+        """
+        Adapts the bucket to limits reported by the server.
+        Args:
+            limit: Server-side budget per period.
+            remaining: Tokens the server says are left; the local count never exceeds it.
+        """
+        self._refill(self._clock())
+        if limit is not None and limit > 0 and limit != self.capacity:
+            if self.capacity is None:
+                self.tokens = float(limit)
+            self.capacity = limit
+            self.tokens = min(self.tokens, float(limit))
+        if remaining is not None and self.capacity is not None:
+            self.tokens = min(self.tokens, float(remaining))
+
+
+@dataclass
+class LimiterStats:
+    """Counters describing how callers were throttled."""
+
+    acquired: int = 0
+    delayed: int = 0
+    total_wait: float = 0.0
+    throttled: int = 0
+
+
+class RateLimiter:
+    """
+    Client-side scheduler enforcing requests-per-minute and tokens-per-minute budgets.
+    Callers are admitted strictly in arrival order, so under pressure they queue
+    instead of racing each other into 429s. Budgets start from the configured values
+    (None means unknown/unlimited) and are adapted from ``x-ratelimit-*`` response headers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock: Clock = time.monotonic,
+        sleep: Sleep = asyncio.sleep,
+    ):
+        """
+        Args:
+            requests_per_minute: Initial RPM budget, or None until learned from headers.
+            tokens_per_minute: Initial TPM budget, or None until learned from headers.
+            clock: Monotonic clock, injectable for tests.
+            sleep: Async sleep function, injectable for tests.
+        """
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.stats = LimiterStats()
+        self._clock = clock
+        self._sleep = sleep
+        self._queue = asyncio.Lock()
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Waits until one request and ``tokens`` tokens fit the budget, then reserves them.
+        Args:
+            tokens: Estimated tokens the request will consume.
+        Returns:
+            Seconds spent waiting.
+        """
+        started = self._clock()
+        async with self._queue:
+            while True:
+                wait = self.wait_time(tokens)
+                if wait <= 0:
+                    break
+                await self._sleep(wait)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+        waited = self._clock() - started
+        self.stats.acquired += 1
+        if waited > 0:
+            self.stats.delayed += 1
+            self.stats.total_wait += waited
+        return waited
+
+    def wait_time(self, tokens: int = 0) -> float:
+        """
+        Args:
+            tokens: Estimated tokens of a request.
+        Returns:
+            Seconds until such a request would be admitted, ignoring queued callers.
+        """
+        return max(self._paused_until - self._clock(), self.requests.wait_time(1), self.tokens.wait_time(tokens), 0.0)
+
+    def reconcile(self, estimated: int, actual: Optional[int]) -> None:
+        """
+        Corrects the token budget once the real usage of a request is known.
+        Args:
+            estimated: Tokens reserved by ``acquire``.
+            actual: Tokens reported by the API, if any.
+        """
+        if actual is None or actual == estimated:
+            return
+        if actual < estimated:
+            self.tokens.refund(estimated - actual)
+        else:
+            self.tokens.consume(actual - estimated)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adapts budgets from OpenAI rate-limit headers and honours ``retry-after``.
+        Args:
+            headers: Response headers with lower-case names.
+        """
+        self.requests.update(
+            _number(headers.get("x-ratelimit-limit-requests")),
+            _number(headers.get("x-ratelimit-remaining-requests")),
+        )
+        self.tokens.update(
+            _number(headers.get("x-ratelimit-limit-tokens")),
+            _number(headers.get("x-ratelimit-remaining-tokens")),
+        )
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            self.pause(parse_reset(retry_after) or 0.0)
+            return
+        for bucket, remaining, reset in (
+            (self.requests, "x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            (self.tokens, "x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+        ):
+            if _number(headers.get(remaining)) == 0 and headers.get(reset):
+                self.pause(parse_reset(headers[reset]) or 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds every queued caller for ``seconds`` (e.g. after a 429).
+        Args:
+            seconds: Pause duration.
+        """
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def record_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Records a 429 response and holds admissions so queued callers do not pile on.
+        Args:
+            retry_after: Server-suggested delay, if the response carried one.
+        """
+        self.stats.throttled += 1
+        if retry_after:
+            self.pause(retry_after)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Jittered exponential backoff ("full jitter"): attempt ``n`` sleeps a random
+    duration in ``[0, min(max_delay, base_delay * 2**n)]``, but never less than a
+    server-provided ``retry-after``.
+    """
+
+    max_retries: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    rng: random.Random = None  # type: ignore[assignment]
+
+    def __post_init__(self) -> None:
+        if self.rng is None:
+            self.rng = random.Random()
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Args:
+            attempt: Zero-based retry attempt.
+            retry_after: Optional server-provided minimum delay.
+        Returns:
+            Seconds to wait before the next attempt.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return max(self.rng.uniform(0, ceiling), retry_after or 0.0)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
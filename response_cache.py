@@ -0,0 +1,170 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional
+
+# Request fields that do not influence the completion text.
+_TRANSPORT_FIELDS = ("stream", "user")
+
+
+def cache_key(payload: Mapping[str, Any]) -> str:
+    """
+    Content address of a completion request: a hash over model, messages (including the
+    system prompt) and sampling parameters, independent of key order.
+    Args:
+        payload: Chat completion request body.
+    Returns:
+        Hex SHA-256 digest.
+    """
+    relevant = {k: v for k, v in payload.items() if k not in _TRANSPORT_FIELDS}
+    canonical = json.dumps(relevant, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Cache counters; ``bypassed`` counts requests that were not cacheable."""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    bypassed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Two-tier cache for completion text: a bounded in-memory LRU in front of an optional
+    SQLite file that survives restarts. Only requests deterministic enough to replay are
+    cached (temperature at or below ``max_temperature``, or an explicit ``seed``).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        path: Optional[str] = None,
+        max_temperature: float = 0.0,
+        cache_seeded: bool = True,
+    ):
+        """
+        Args:
+            max_entries: Maximum entries held in memory.
+            max_bytes: Maximum UTF-8 bytes of cached text held in memory.
+            path: Optional SQLite file for the persistent tier.
+            max_temperature: Highest temperature still considered deterministic.
+            cache_seeded: Whether requests carrying a ``seed`` are cacheable at any temperature.
+        """
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("Cache limits must be positive.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_temperature = max_temperature
+        self.cache_seeded = cache_seeded
+        self.stats = CacheStats()
+        self.bytes = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._db = None
+        if path is not None:
+            import sqlite3
+
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL)"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_cacheable(self, payload: Mapping[str, Any]) -> bool:
+        """
+        Args:
+            payload: Chat completion request body.
+        Returns:
+            True if identical requests can be expected to return the same text.
+        """
+        if payload.get("n", 1) != 1:
+            return False
+        if self.cache_seeded and payload.get("seed") is not None:
+            return True
+        # The API's default temperature is 1.0.
+        return float(payload.get("temperature", 1.0)) <= self.max_temperature
+
+    def lookup(self, payload: Mapping[str, Any]) -> Optional[str]:
+        """
+        Args:
+            payload: Chat completion request body.
+        Returns:
+            The cached completion, or None on a miss or for uncacheable requests.
+        """
+        if not self.is_cacheable(payload):
+            self.stats.bypassed += 1
+            return None
+        return self.get(cache_key(payload))
+
+    def store(self, payload: Mapping[str, Any], value: Optional[str]) -> None:
+        """
+        Caches a completion if the request is cacheable.
+        Args:
+            payload: Chat completion request body.
+            value: Completion text; None (a malformed response) is never cached.
+        """
+        if value is not None and self.is_cacheable(payload):
+            self.put(cache_key(payload), value)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        self._remember(key, value)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        """Empties the in-memory tier (the persistent tier is kept)."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous.encode("utf-8"))
+        self._entries[key] = value
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted.encode("utf-8"))
+            self.stats.evictions += 1
@@ -0,0 +1,395 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from metrics import NULL_TRACER
+
+Messages = List[Dict[str, str]]
+
+# Weight of the newest sample in a class's running service-time estimate.
+_ESTIMATE_ALPHA = 0.2
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request cannot be started in time to meet its deadline."""
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    """
+    A class of requests sharing a scheduler. Classes are served strictly by ``rank``
+    (lowest first); ``max_share`` caps the fraction of the scheduler's slots a class may
+    hold, so bulk work always leaves headroom for the classes above it.
+    """
+
+    name: str
+    rank: int
+    # Default deadline, in seconds from submission; None means requests wait indefinitely.
+    timeout: Optional[float] = None
+    # What happens to a request that can no longer meet its deadline when it reaches the
+    # front of the queue: "drop" fails it with DeadlineExceeded, "degrade" sends it with
+    # ``degrade`` merged into its parameters (e.g. a smaller max_tokens or a faster model).
+    late: str = "drop"
+    degrade: Optional[Mapping[str, Any]] = None
+    max_share: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.late not in ("drop", "degrade"):
+            raise ValueError("late must be 'drop' or 'degrade'.")
+        if self.late == "degrade" and not self.degrade:
+            raise ValueError("late='degrade' requires degrade parameters.")
+        if not 0.0 < self.max_share <= 1.0:
+            raise ValueError("max_share must be in (0, 1].")
+
+
+INTERACTIVE = PriorityClass("interactive", 0)
+DEFAULT = PriorityClass("default", 1)
+BATCH = PriorityClass("batch", 2, max_share=0.75)
+DEFAULT_CLASSES = (INTERACTIVE, DEFAULT, BATCH)
+
+
+@dataclass
+class SchedulerStats:
+    """Counters; ``dropped`` includes requests whose deadline passed while queued."""
+
+    dispatched: int = 0
+    degraded: int = 0
+    dropped: int = 0
+
+
+class _Request:
+    __slots__ = ("tenant", "deadline", "future", "state", "degraded")
+
+    def __init__(self, tenant: str, deadline: Optional[float], future: "asyncio.Future[None]"):
+        self.tenant = tenant
+        self.deadline = deadline
+        self.future = future
+        self.state = "queued"
+        self.degraded = False
+
+
+class _ClassQueue:
+    """
+    Waiting requests of one priority class, one FIFO per tenant. Tenants take turns by
+    start-time fair queueing: each tenant's next request is tagged with a virtual start
+    time that advances by ``1 / weight`` per dispatched request, and the smallest tag goes
+    next, so a tenant with a deep backlog cannot crowd out one with a few requests.
+    """
+
+    def __init__(self, cls: PriorityClass, limit: int):
+        self.cls = cls
+        self.limit = limit
+        self.tenants: Dict[str, Deque[_Request]] = {}
+        self.start: Dict[str, float] = {}
+        self.vtime = 0.0
+        self.waiting = 0
+        self.in_flight = 0
+        self.estimate: Optional[float] = None
+
+    def push(self, request: _Request) -> None:
+        requests = self.tenants.get(request.tenant)
+        if requests is None:
+            # A tenant returning from idle starts at the current virtual time, not with saved-up credit.
+            requests = self.tenants[request.tenant] = deque()
+            self.start[request.tenant] = self.vtime
+        requests.append(request)
+        self.waiting += 1
+
+    def pop(self, weights: Mapping[str, float]) -> Optional[_Request]:
+        while self.tenants:
+            tenant = min(self.tenants, key=self.start.__getitem__)
+            requests = self.tenants[tenant]
+            request = requests.popleft()
+            if not requests:
+                del self.tenants[tenant]
+            if request.state == "queued":
+                self.vtime = self.start[tenant]
+                self.start[tenant] += 1.0 / weights.get(tenant, 1.0)
+            if tenant not in self.tenants:
+                del self.start[tenant]
+            if request.state == "queued":
+                self.waiting -= 1
+                return request
+        return None
+
+    def observe(self, duration: float) -> None:
+        if self.estimate is None:
+            self.estimate = duration
+        else:
+            self.estimate += _ESTIMATE_ALPHA * (duration - self.estimate)
+
+
+class RequestScheduler:
+    """
+    Admission control in front of an OpenAIClient (or compatible client). At most
+    ``max_in_flight`` requests run at once; waiting requests are served by priority
+    class, then by per-tenant fair share within a class. Requests carry deadlines: one
+    whose deadline passes while queued is dropped, and one that reaches the front of the
+    queue but is not expected to finish in time (going by the class's recent service
+    times) is dropped or degraded according to its class. Because bulk classes are
+    capped below the full slot count, interactive requests find a free slot even while a
+    large batch run keeps the queue full. Give each Chatbot a ``for_tenant`` view to
+    route its requests through the scheduler.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_in_flight: int = 16,
+        classes: Sequence[PriorityClass] = DEFAULT_CLASSES,
+        default_priority: str = "default",
+        tenant_weights: Optional[Mapping[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        tracer: Any = NULL_TRACER,
+    ):
+        """
+        Args:
+            client: Client with async ``complete_prompt`` and ``stream_prompt``.
+            max_in_flight: Requests sent to the client concurrently, across all classes.
+            classes: Priority classes; names must be unique.
+            default_priority: Class of requests that do not name one.
+            tenant_weights: Relative fair-share weights per tenant (default 1.0).
+            clock: Monotonic clock in seconds; deadlines are expressed on it.
+            tracer: metrics.Tracer receiving queue depth gauges, wait times and drop counts.
+        Raises:
+            ValueError: If ``max_in_flight`` is less than 1, class names repeat or
+                ``default_priority`` is not one of them.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        ordered = sorted(classes, key=lambda cls: cls.rank)
+        self._queues: Dict[str, _ClassQueue] = {
+            cls.name: _ClassQueue(cls, max(1, int(max_in_flight * cls.max_share))) for cls in ordered
+        }
+        if len(self._queues) != len(ordered):
+            raise ValueError("Priority class names must be unique.")
+        if default_priority not in self._queues:
+            raise ValueError(f"Unknown default priority {default_priority!r}.")
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.default_priority = default_priority
+        self.tenant_weights = dict(tenant_weights or {})
+        self.clock = clock
+        self.tracer = tracer
+        self.stats = SchedulerStats()
+        self.in_flight = 0
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Returns:
+            Number of queued requests per priority class.
+        """
+        return {name: queue.waiting for name, queue in self._queues.items()}
+
+    def tenant_depths(self, priority: str) -> Dict[str, int]:
+        """
+        Args:
+            priority: Priority class name.
+        Returns:
+            Number of queued requests per tenant in that class.
+        """
+        depths = {
+            tenant: sum(request.state == "queued" for request in requests)
+            for tenant, requests in self._queue(priority).tenants.items()
+        }
+        return {tenant: depth for tenant, depth in depths.items() if depth}
+
+    def running(self) -> Dict[str, int]:
+        """
+        Returns:
+            Number of requests in flight per priority class.
+        """
+        return {name: queue.in_flight for name, queue in self._queues.items()}
+
+    def for_tenant(
+        self, tenant: str, priority: Optional[str] = None, timeout: Optional[float] = None
+    ) -> "ScheduledClient":
+        """
+        Args:
+            tenant: Tenant the requests are accounted to (e.g. a customer or a batch job).
+            priority: Priority class; defaults to ``default_priority``.
+            timeout: Default deadline in seconds; defaults to the class's ``timeout``.
+        Returns:
+            A client-compatible view to pass to Chatbot as ``openai_client``.
+        """
+        self._queue(priority)
+        return ScheduledClient(self, tenant, priority, timeout)
+
+    async def complete_prompt(
+        self,
+        prompt: Union[str, Messages],
+        priority: Optional[str] = None,
+        tenant: str = "default",
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> Optional[str]:
+        """
+        Waits for a slot, then calls the client's ``complete_prompt``.
+        Args:
+            prompt: Prompt string or messages.
+            priority: Priority class name; defaults to ``default_priority``.
+            tenant: Tenant the request is accounted to.
+            deadline: Absolute deadline on ``clock``; overrides ``timeout``.
+            timeout: Seconds from now; defaults to the class's ``timeout``.
+            **params: Completion parameters passed on to the client.
+        Returns:
+            The completion.
+        Raises:
+            DeadlineExceeded: If the request was dropped for missing its deadline.
+        """
+        queue, request = await self._acquire(priority, tenant, deadline, timeout)
+        started = self.clock()
+        ok = False
+        try:
+            result = await self.client.complete_prompt(prompt, **self._params(queue, request, params))
+            ok = True
+            return result
+        finally:
+            self._release(queue, self.clock() - started if ok else None)
+
+    async def stream_prompt(
+        self,
+        prompt: Union[str, Messages],
+        priority: Optional[str] = None,
+        tenant: str = "default",
+        deadline: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """
+        Waits for a slot, then streams the client's ``stream_prompt``; the slot is held
+        until the stream ends or is abandoned. Arguments are as for ``complete_prompt``.
+        Returns:
+            An async iterator of deltas.
+        Raises:
+            DeadlineExceeded: If the request was dropped for missing its deadline.
+        """
+        queue, request = await self._acquire(priority, tenant, deadline, timeout)
+        started = self.clock()
+        ok = False
+        try:
+            async for delta in self.client.stream_prompt(prompt, **self._params(queue, request, params)):
+                yield delta
+            ok = True
+        finally:
+            self._release(queue, self.clock() - started if ok else None)
+
+    def _queue(self, priority: Optional[str]) -> _ClassQueue:
+        queue = self._queues.get(priority or self.default_priority)
+        if queue is None:
+            raise ValueError(f"Unknown priority class {priority!r}.")
+        return queue
+
+    @staticmethod
+    def _params(queue: _ClassQueue, request: _Request, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {**params, **queue.cls.degrade} if request.degraded else params
+
+    async def _acquire(
+        self, priority: Optional[str], tenant: str, deadline: Optional[float], timeout: Optional[float]
+    ) -> Tuple[_ClassQueue, _Request]:
+        queue = self._queue(priority)
+        now = self.clock()
+        if deadline is None:
+            timeout = timeout if timeout is not None else queue.cls.timeout
+            deadline = now + timeout if timeout is not None else None
+        loop = asyncio.get_running_loop()
+        request = _Request(tenant, deadline, loop.create_future())
+        queue.push(request)
+        self._dispatch()
+        timer = None
+        if request.state == "queued":
+            self._publish(queue)
+            if deadline is not None:
+                timer = loop.call_later(max(deadline - now, 0.0), self._expire, queue, request)
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request.state == "running":
+                self._release(queue, None)
+            elif request.state == "queued":
+                request.state = "gone"
+                queue.waiting -= 1
+                self._publish(queue)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self.tracer.observe("scheduler_wait_seconds", self.clock() - now, priority=queue.cls.name)
+        return queue, request
+
+    def _expire(self, queue: _ClassQueue, request: _Request) -> None:
+        if request.state != "queued":
+            return
+        queue.waiting -= 1
+        self._drop(queue, request, "expired")
+        self._publish(queue)
+
+    def _drop(self, queue: _ClassQueue, request: _Request, reason: str) -> None:
+        request.state = "gone"
+        self.stats.dropped += 1
+        self.tracer.inc("scheduler_dropped_total", priority=queue.cls.name, reason=reason)
+        request.future.set_exception(
+            DeadlineExceeded(f"{queue.cls.name} request for {request.tenant!r} cannot meet its deadline.")
+        )
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_in_flight:
+            for queue in self._queues.values():
+                if queue.waiting and queue.in_flight < queue.limit:
+                    request = queue.pop(self.tenant_weights)
+                    if request is not None:
+                        break
+            else:
+                return
+            if request.deadline is not None and self.clock() + (queue.estimate or 0.0) > request.deadline:
+                if queue.cls.late == "degrade":
+                    request.degraded = True
+                    self.stats.degraded += 1
+                    self.tracer.inc("scheduler_degraded_total", priority=queue.cls.name)
+                else:
+                    self._drop(queue, request, "late")
+                    self._publish(queue)
+                    continue
+            request.state = "running"
+            self.in_flight += 1
+            queue.in_flight += 1
+            self.stats.dispatched += 1
+            request.future.set_result(None)
+            self._publish(queue)
+
+    def _release(self, queue: _ClassQueue, duration: Optional[float]) -> None:
+        self.in_flight -= 1
+        queue.in_flight -= 1
+        if duration is not None:
+            queue.observe(duration)
+        self._publish(queue)
+        self._dispatch()
+
+    def _publish(self, queue: _ClassQueue) -> None:
+        self.tracer.gauge("scheduler_queue_depth", queue.waiting, priority=queue.cls.name)
+        self.tracer.gauge("scheduler_in_flight", queue.in_flight, priority=queue.cls.name)
+
+
+class ScheduledClient:
+    """Client-compatible view of a RequestScheduler for one tenant and priority class."""
+
+    def __init__(
+        self, scheduler: RequestScheduler, tenant: str, priority: Optional[str] = None, timeout: Optional[float] = None
+    ):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.priority = priority
+        self.timeout = timeout
+
+    async def complete_prompt(self, prompt: Union[str, Messages], **params: Any) -> Optional[str]:
+        params.setdefault("priority", self.priority)
+        params.setdefault("timeout", self.timeout)
+        return await self.scheduler.complete_prompt(prompt, tenant=self.tenant, **params)
+
+    def stream_prompt(self, prompt: Union[str, Messages], **params: Any) -> AsyncIterator[str]:
+        params.setdefault("priority", self.priority)
+        params.setdefault("timeout", self.timeout)
+        return self.scheduler.stream_prompt(prompt, tenant=self.tenant, **params)
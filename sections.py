@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class PipelineConfig:
+    """
+    Settings for the pipelined writer/editor topology. The writer's reply is streamed and
+    cut into sections at Markdown headings of ``level`` or above (``##`` and ``#`` for the
+    default of 2); each finished section is sent to the editor with ``section_prompt``
+    while the writer keeps generating, and the critiques are merged with ``critique_format``.
+    """
+
+    level: int = 2
+    section_prompt: str = "Critique this section of {writer}'s blog post:\n\n{section}"
+    critique_format: str = "Section {index} ({title}):\n{critique}"
+    separator: str = "\n\n"
+
+
+class SectionSplitter:
+    """
+    Incremental Markdown section splitter for streamed text. ``feed`` returns the sections
+    completed by a delta (a section is complete once the next heading starts), ``flush``
+    returns the trailing section. Headings inside fenced code blocks are ignored.
+    """
+
+    def __init__(self, level: int = 2):
+        """
+        Args:
+            level: Deepest heading level that starts a new section (1-6).
+        """
+        if not 1 <= level <= 6:
+            raise ValueError("level must be between 1 and 6.")
+        self.level = level
+        self._partial = ""
+        self._lines: List[str] = []
+        self._in_fence = False
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Args:
+            delta: Next piece of streamed text.
+        Returns:
+            Sections completed by this delta, in order.
+        """
+        self._partial += delta
+        if "\n" not in delta:
+            return []
+        *lines, self._partial = self._partial.split("\n")
+        completed = []
+        for line in lines:
+            if self._is_boundary(line):
+                section = self._take()
+                if section is not None:
+                    completed.append(section)
+            self._lines.append(line)
+        return completed
+
+    def flush(self) -> Optional[str]:
+        """
+        Returns:
+            The last section (including any unterminated line), or None if it is empty.
+        """
+        if self._partial:
+            self._lines.append(self._partial)
+            self._partial = ""
+        self._in_fence = False
+        return self._take()
+
+    def _is_boundary(self, line: str) -> bool:
+        stripped = line.lstrip()
+        if stripped.startswith("```"):
+            self._in_fence = not self._in_fence
+            return False
+        if self._in_fence or not stripped.startswith("#"):
+            return False
+        hashes = len(stripped) - len(stripped.lstrip("#"))
+        return hashes <= self.level and stripped[hashes:hashes + 1] in (" ", "")
+
+    def _take(self) -> Optional[str]:
+        text = "\n".join(self._lines).strip()
+        self._lines = []
+        return text or None
+
+
+def section_title(section: str) -> str:
+    """
+    Args:
+        section: A section produced by SectionSplitter.
+    Returns:
+        Its heading text, or its first line if it has no heading.
+    """
+    first = section.split("\n", 1)[0].strip()
+    return first.lstrip("#").strip() or first
@@ -0,0 +1,273 @@
+import asyncio
+import gc
+import multiprocessing
+import queue
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from metrics import MetricsRegistry
+
+Assignment = Tuple[str, str, str]
+
+
+def shard_for(session_id: str, shards: int) -> int:
+    """
+    Args:
+        session_id: Session identifier.
+        shards: Number of shards.
+    Returns:
+        A shard index that is stable across processes and runs (unlike ``hash``).
+    """
+    return zlib.crc32(session_id.encode("utf-8")) % shards
+
+
+@dataclass
+class SessionOutcome:
+    """What a worker reported for one session."""
+
+    session_id: str
+    worker: int
+    turns: List[Tuple[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class ShardedReport:
+    """Outcome of a sharded run, aggregated over all workers."""
+
+    sessions: int
+    turns: int
+    elapsed: float
+    failed: int = 0
+    workers: int = 0
+    restarts: int = 0
+    reassigned: int = 0
+    per_worker: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def sessions_per_minute(self) -> float:
+        return self.sessions * 60.0 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: Any
+    inbox: Any
+    pending: Dict[str, Tuple[Assignment, int]] = field(default_factory=dict)
+    exited: bool = False
+
+
+class ShardedRunner:
+    """
+    Runs writer/editor sessions across a pool of worker processes, each with its own
+    event loop and ConversationManager, so JSON parsing, tokenisation and memory indexing
+    use every core. Sessions are assigned by a stable hash of their id, so a session's
+    turns always run in one process. With the default "fork" start method, ``assets``
+    built in the parent (compiled prompts, a config snapshot, ...) are inherited
+    copy-on-write rather than pickled into every worker. Turns, in-memory log entries and
+    metrics are shipped back to the parent. If a worker dies, its unfinished sessions are
+    re-sharded over the surviving workers (or a replacement when none survive); with a
+    checkpoint store they resume from their last saved turn.
+    """
+
+    def __init__(
+        self,
+        manager_factory: Callable[[Any], Any],
+        workers: Optional[int] = None,
+        assets: Any = None,
+        start_method: Optional[str] = None,
+        max_restarts: int = 2,
+        poll_interval: float = 0.1,
+    ):
+        """
+        Args:
+            manager_factory: Called in each worker with ``assets``; returns the worker's
+                ConversationManager. Its tracer's registry (if any) is merged into ``registry``.
+            workers: Number of worker processes (defaults to the CPU count).
+            assets: Read-only data shared with every worker.
+            start_method: multiprocessing start method; "fork" where available, else "spawn"
+                (which pickles ``manager_factory`` and ``assets``).
+            max_restarts: Replacement workers started when every worker has died.
+            poll_interval: Seconds between worker liveness checks.
+        Raises:
+            ValueError: If ``workers`` is less than 1.
+        """
+        workers = workers or multiprocessing.cpu_count()
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if start_method is None:
+            start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self.manager_factory = manager_factory
+        self.workers = workers
+        self.assets = assets
+        self.max_restarts = max_restarts
+        self.poll_interval = poll_interval
+        self.registry = MetricsRegistry()
+        self.results: Dict[str, SessionOutcome] = {}
+        self.log: Deque[Any] = deque(maxlen=10000)
+        self._context = multiprocessing.get_context(start_method)
+
+    def run(self, assignments: Iterable[Assignment], rounds: int = 1) -> ShardedReport:
+        """
+        Runs every session to completion across the worker pool.
+        Args:
+            assignments: (session_id, user, opening message) per session.
+            rounds: Number of passes through each session's chatbots.
+        Returns:
+            A ShardedReport; per-session turns and errors are in ``results``.
+        Raises:
+            RuntimeError: If every worker died and no restarts are left.
+        """
+        started = time.perf_counter()
+        outbox = self._context.Queue()
+        # Keep the parent's existing objects out of GC scans so workers do not touch
+        # (and thereby copy) the pages holding the shared assets.
+        gc.freeze()
+        try:
+            pool = [self._spawn(index, outbox, rounds) for index in range(self.workers)]
+        finally:
+            gc.unfreeze()
+        restarts = reassigned = 0
+        for assignment in assignments:
+            self._send(pool[shard_for(assignment[0], len(pool))], assignment, 0)
+        try:
+            while any(not worker.exited for worker in pool):
+                if not any(worker.pending for worker in pool):
+                    for worker in pool:
+                        if not worker.exited and worker.inbox is not None:
+                            worker.inbox.put(None)
+                            worker.inbox = None
+                try:
+                    self._handle(pool, outbox.get(timeout=self.poll_interval))
+                    continue
+                except queue.Empty:
+                    pass
+                for worker in pool:
+                    if worker.exited or worker.process.is_alive():
+                        continue
+                    if worker.process.exitcode == 0:
+                        # Exited cleanly; its final messages are still in the queue.
+                        continue
+                    self._drain(pool, outbox)
+                    worker.exited = True
+                    orphans = list(worker.pending.values())
+                    worker.pending.clear()
+                    live = [w for w in pool if not w.exited and w.inbox is not None]
+                    if not live and orphans:
+                        if restarts >= self.max_restarts:
+                            raise RuntimeError(f"All workers died; {len(orphans)} sessions unfinished.")
+                        restarts += 1
+                        live = [self._spawn(len(pool), outbox, rounds)]
+                        pool.extend(live)
+                    for assignment, attempt in orphans:
+                        self._send(live[shard_for(assignment[0], len(live))], assignment, attempt + 1)
+                        reassigned += 1
+        finally:
+            for worker in pool:
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                worker.process.join()
+        outcomes = list(self.results.values())
+        per_worker: Dict[int, int] = {}
+        for outcome in outcomes:
+            per_worker[outcome.worker] = per_worker.get(outcome.worker, 0) + 1
+        failed = sum(outcome.error is not None for outcome in outcomes)
+        return ShardedReport(
+            sessions=len(outcomes) - failed,
+            turns=sum(len(outcome.turns) for outcome in outcomes),
+            elapsed=time.perf_counter() - started,
+            failed=failed,
+            workers=len(pool),
+            restarts=restarts,
+            reassigned=reassigned,
+            per_worker=per_worker,
+        )
+
+    def _spawn(self, index: int, outbox: Any, rounds: int) -> _Worker:
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.manager_factory, self.assets, inbox, outbox, rounds),
+            name=f"shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        return _Worker(index, process, inbox)
+
+    @staticmethod
+    def _send(worker: _Worker, assignment: Assignment, attempt: int) -> None:
+        worker.pending[assignment[0]] = (assignment, attempt)
+        worker.inbox.put((assignment, attempt))
+
+    def _drain(self, pool: List[_Worker], outbox: Any) -> None:
+        while True:
+            try:
+                self._handle(pool, outbox.get_nowait())
+            except queue.Empty:
+                return
+
+    def _handle(self, pool: List[_Worker], message: Tuple[Any, ...]) -> None:
+        kind, index = message[0], message[1]
+        worker = pool[index]
+        if kind == "done":
+            _, _, session_id, turns, entries, error = message
+            if worker.pending.pop(session_id, None) is None:
+                return  # Already reassigned after this worker was given up on.
+            self.results[session_id] = SessionOutcome(session_id, index, turns, error)
+            self.log.extend(entries)
+        elif kind == "metrics":
+            self.registry.merge(message[2])
+        elif kind == "exit":
+            worker.exited = True
+
+
+def _worker_main(
+    index: int, manager_factory: Callable[[Any], Any], assets: Any, inbox: Any, outbox: Any, rounds: int
+) -> None:
+    asyncio.run(_serve(index, manager_factory(assets), inbox, outbox, rounds))
+
+
+async def _serve(index: int, manager: Any, inbox: Any, outbox: Any, rounds: int) -> None:
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    while True:
+        item = await loop.run_in_executor(None, inbox.get)
+        if item is None:
+            break
+        task = asyncio.ensure_future(_run_session(index, manager, item, outbox, rounds))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    await manager.close()
+    registry = getattr(getattr(manager, "tracer", None), "registry", None)
+    if registry is not None:
+        outbox.put(("metrics", index, registry))
+    outbox.put(("exit", index))
+
+
+async def _run_session(index: int, manager: Any, item: Tuple[Assignment, int], outbox: Any, rounds: int) -> None:
+    (session_id, user, message), attempt = item
+    turns: List[Tuple[str, Any]] = []
+    error = None
+    try:
+        saved = manager.checkpoint.load(session_id) if attempt and manager.checkpoint is not None else None
+        if saved is not None and saved[1]["plan"] is not None:
+            # A previous worker died part-way; finish its plan instead of starting over.
+            start = saved[1]["plan"]["start"]
+            await manager.resume(session_id)
+            turns = list(manager.sessions[session_id].turns[start:])
+        else:
+            turns = list(await manager.start_conversation(session_id, user, message, rounds))
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    entries = [entry for entry in manager.log if entry[0] == session_id]
+    outbox.put(("done", index, session_id, turns, entries, error))
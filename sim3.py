@@ -1,61 +1,59 @@
-import openai
-import os
-import requests
-import re
-from colorama import Fore, Style, init
+from checkpoint import CheckpointStore
+from context_window import ContextWindow
+from prompt_template import PromptTemplate
+from stream_sinks import ConsoleSink, LogFileSink
+from turn_record import StringArena
 
-
-# Initialize colorama
-init()
+# openai and colorama are imported where they are used, so importing this module is cheap
+# and runs nothing; the simulation itself starts from main() (see also cli.py).
 
 # Define a function to open a file and return its contents as a string
 def open_file(filepath):
     with open(filepath, 'r', encoding='utf-8') as infile:
         return infile.read()
 
-# Define a function to save content to a file
-def save_file(filepath, content):
-    with open(filepath, 'a', encoding='utf-8') as outfile:
-        outfile.write(content)
-
-# Set the OpenAI API keys by reading them from files
-api_key = open_file('openaiapikey2.txt')
-
-# Initialize two empty lists to store the conversations for each chatbot
-conversation1 = []
-conversation2 = []
-
-# Read the content of the files containing the chatbots' prompts
-chatbot1 = open_file('chatbot7.txt')
-chatbot2 = open_file('chatbot6.txt')
+# Define a function to save content to an already open (long-lived) log file
+def save_file(outfile, content):
+    outfile.write(content)
 
 # Define a function to make an API call to the OpenAI ChatCompletion endpoint
-def chatgpt(api_key, conversation, chatbot, user_input, temperature=0.9, frequency_penalty=0.2, presence_penalty=0):
+def chatgpt(api_key, conversation, chatbot, user_input, temperature=0.9, frequency_penalty=0.2, presence_penalty=0, sinks=()):
+
+    import openai
 
     # Set the API key
     openai.api_key = api_key
 
-    # Update conversation by appending the user's input
-    conversation.append({"role": "user","content": user_input})
-
-    # Insert prompt into message history
-    messages_input = conversation.copy()
-    prompt = [{"role": "system", "content": chatbot}]
-    messages_input.insert(0, prompt[0])
+    # Assemble system prompt + windowed history + user's input; the oldest turns that do not fit are left out
+    messages_input = conversation.build(chatbot, {"role": "user", "content": user_input})
 
-    # Make an API call to the ChatCompletion endpoint with the updated messages
+    # Make a streaming API call to the ChatCompletion endpoint with the updated messages
     completion = openai.ChatCompletion.create(
         model="gpt-4",
         temperature=temperature,
         frequency_penalty=frequency_penalty,
         presence_penalty=presence_penalty,
-        messages=messages_input)
-
-    # Extract the chatbot's response from the API response
-    chat_response = completion['choices'][0]['message']['content']
-
-    # Update conversation by appending the chatbot's response
-    conversation.append({"role": "assistant", "content": chat_response})
+        messages=messages_input,
+        stream=True)
+
+    # Hand each delta to the sinks as it arrives and collect the full response
+    parts = []
+    try:
+        for chunk in completion:
+            delta = chunk['choices'][0]['delta'].get('content')
+            if delta:
+                parts.append(delta)
+                for sink in sinks:
+                    sink.write(delta)
+    finally:
+        for sink in sinks:
+            sink.close()
+    chat_response = "".join(parts)
+
+    # Update conversation: evict the turns the request left out, then append the user's input and the chatbot's response
+    conversation.apply_trim()
+    conversation.append("user", user_input)
+    conversation.append("assistant", chat_response)
 
     # Return the chatbot's response
     return chat_response
@@ -63,6 +61,8 @@ def chatgpt(api_key, conversation, chatbot, user_input, temperature=0.9, frequen
     
 # Add a function to print text in green if it contains certain keywords
 def print_colored(agent, text):
+    from colorama import Fore, Style
+
     agent_colors = {
         "Miss Writer:": Fore.YELLOW,
         "Mr.Editor:": Fore.CYAN,
@@ -72,19 +72,61 @@ def print_colored(agent, text):
 
     print(color + f"{agent}: {text}" + Style.RESET_ALL, end="")  
 
-num_turns = 10  # Number of turns for each chatbot (you can adjust this value)
-
-# Start the conversation with ChatBot1's first message
-user_message = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
-
-# Update the loop where chatbots talk to each other
-for i in range(num_turns):
-    print_colored("Miss Writer:", f"{user_message}\n\n")
-    save_file("ChatLog.txt", "Miss Writer: " + user_message + "\n\n")
-    response = chatgpt(api_key, conversation1, chatbot1, user_message)
-    user_message = response
 
-    print_colored("Mr.Editor:", f"{user_message}\n\n")
-    save_file("ChatLog.txt", "Mr.Editor: " + user_message + "\n\n")
-    response = chatgpt(api_key, conversation2, chatbot2, user_message)
-    user_message = response
+# num_turns: number of turns for each chatbot (you can adjust this value)
+# checkpoint_path: where the resumable run state lives (SQLite also writes -wal/-shm files beside it)
+def main(num_turns=10, checkpoint_path='sim3_checkpoint.db'):
+    from colorama import init
+
+    # Initialize colorama
+    init()
+
+    # Set the OpenAI API keys by reading them from files
+    api_key = open_file('openaiapikey2.txt')
+
+    # Initialize two token-budgeted windows to store the conversations for each chatbot
+    conversation1 = ContextWindow(max_tokens=8192, reserve_tokens=1024)
+    conversation2 = ContextWindow(max_tokens=8192, reserve_tokens=1024)
+
+    # Read and compile the chatbots' prompts once; placeholders are validated at load time
+    chatbot1 = PromptTemplate.from_file('chatbot7.txt').render()
+    chatbot2 = PromptTemplate.from_file('chatbot6.txt').render()
+
+    # Start the conversation with ChatBot1's first message
+    user_message = "Hello Mr.Editor. I am Miss Writer. I'll be starting my assignment now."
+
+    # Checkpoint both windows after every turn so a run that dies part-way resumes where it stopped
+    checkpoint = CheckpointStore(checkpoint_path)
+    start_turn = 0
+    saved = checkpoint.load('sim3')
+    if saved is not None:
+        start_turn, state = saved
+        # One agent's reply is the other's input, so restore both windows through one arena to keep a single copy of each text
+        arena = StringArena()
+        conversation1.restore(arena.share(state['conversation1']))
+        conversation2.restore(arena.share(state['conversation2']))
+        user_message = state['user_message']
+
+    # Keep one buffered handle on the chat log for the whole run instead of reopening it per message
+    with open("ChatLog.txt", 'a', encoding='utf-8') as chat_log:
+        if start_turn == 0:
+            print_colored("Miss Writer:", f"{user_message}\n\n")
+            save_file(chat_log, "Miss Writer: " + user_message + "\n\n")
+
+        # Update the loop where chatbots talk to each other; responses are printed and logged as they stream
+        for i in range(start_turn, num_turns):
+            user_message = chatgpt(api_key, conversation1, chatbot1, user_message,
+                                   sinks=(ConsoleSink("Mr.Editor:"), LogFileSink(chat_log, "Mr.Editor:")))
+            user_message = chatgpt(api_key, conversation2, chatbot2, user_message,
+                                   sinks=(ConsoleSink("Miss Writer:"), LogFileSink(chat_log, "Miss Writer:")))
+            checkpoint.save('sim3', i + 1, {'conversation1': conversation1.snapshot(),
+                                            'conversation2': conversation2.snapshot(),
+                                            'user_message': user_message})
+
+    # The run completed, so the next one starts fresh
+    checkpoint.delete('sim3')
+    checkpoint.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters; ``coalesced`` counts callers served by another caller's upstream request."""
+
+    leaders: int = 0
+    coalesced: int = 0
+    bypassed: int = 0
+
+
+class _Flight:
+    """One upstream call shared by every caller with the same key."""
+
+    def __init__(self) -> None:
+        self.task: Optional["asyncio.Task[Any]"] = None
+        self.waiters = 0
+        # Streams: deltas received so far, so late joiners replay from the start.
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def push(self, part: str) -> None:
+        self.parts.append(part)
+        self._wake()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    def _wake(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def replay(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.parts):
+                yield self.parts[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests: the first caller for a key starts the
+    upstream call and later callers with the same key share its result, or for streams
+    receive the same deltas as they arrive. Only requests deterministic enough to share
+    are coalesced (temperature at or below ``max_temperature``, or an explicit ``seed``);
+    sampling calls always go upstream on their own. Keys are forgotten as soon as the
+    call completes, so this complements rather than replaces ResponseCache.
+    """
+
+    def __init__(self, max_temperature: float = 0.0, coalesce_seeded: bool = True):
+        """
+        Args:
+            max_temperature: Highest temperature still considered deterministic.
+            coalesce_seeded: Whether requests carrying a ``seed`` are coalesced at any temperature.
+        """
+        self.max_temperature = max_temperature
+        self.coalesce_seeded = coalesce_seeded
+        self.stats = SingleFlightStats()
+        self._flights: Dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def is_coalescable(self, payload: Mapping[str, Any]) -> bool:
+        """
+        Args:
+            payload: Chat completion request body.
+        Returns:
+            True if identical concurrent requests may share one upstream call.
+        """
+        if payload.get("n", 1) != 1:
+            return False
+        if self.coalesce_seeded and payload.get("seed") is not None:
+            return True
+        # The API's default temperature is 1.0.
+        return float(payload.get("temperature", 1.0)) <= self.max_temperature
+
+    def joins(self, key: str) -> bool:
+        """
+        Args:
+            key: Request key.
+        Returns:
+            True if a call for ``key`` is in flight, i.e. a new caller would be coalesced.
+        """
+        return key in self._flights
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs ``call`` unless an identical call is in flight, and returns the shared result.
+        The upstream call only stops early if every caller waiting on it is cancelled.
+        Args:
+            key: Request key (e.g. response_cache.cache_key of the payload).
+            call: Starts the upstream request; only invoked by the first caller.
+        Returns:
+            The call's result.
+        Raises:
+            Exception: Whatever the shared call raised, for every caller.
+        """
+        flight = self._join(key)
+        if flight.task is None:
+            flight.task = asyncio.ensure_future(call())
+            flight.task.add_done_callback(lambda task: self._land(key, flight, task))
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                self._abandon(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def stream(self, key: str, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Streams ``open_stream()`` unless an identical stream is in flight, in which case the
+        deltas received so far are replayed and the rest arrive as the leader receives them.
+        Args:
+            key: Request key.
+            open_stream: Starts the upstream stream; only invoked by the first caller.
+        Returns:
+            An async iterator of deltas.
+        Raises:
+            Exception: Whatever the shared stream raised, for every caller.
+        """
+        flight = self._join(key)
+        if flight.task is None:
+            flight.task = asyncio.ensure_future(self._pump(flight, open_stream))
+            flight.task.add_done_callback(lambda task: self._land(key, flight, task))
+        flight.waiters += 1
+        try:
+            async for part in flight.replay():
+                yield part
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._abandon(key, flight)
+
+    def _join(self, key: str) -> _Flight:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            self.stats.leaders += 1
+        else:
+            self.stats.coalesced += 1
+        return flight
+
+    def _abandon(self, key: str, flight: _Flight) -> None:
+        # Forget the key before cancelling, so a caller arriving while the task winds down
+        # starts a fresh call instead of joining one that is about to raise CancelledError.
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.task.cancel()
+
+    def _land(self, key: str, flight: _Flight, task: "asyncio.Task[Any]") -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here so an unawaited failure is not reported twice.
+
+    @staticmethod
+    async def _pump(flight: _Flight, open_stream: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for part in open_stream():
+                flight.push(part)
+        except BaseException as exc:
+            flight.finish(exc)
+            raise
+        flight.finish()
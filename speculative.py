@@ -0,0 +1,152 @@
+import asyncio
+import inspect
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+Scorer = Callable[[str], Union[float, Awaitable[float]]]
+
+_HEADING = re.compile(r"^(#{1,3})\s+\S", re.MULTILINE)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def structure_scorer(text: str) -> float:
+    """
+    Cheap heuristic for the writer's assignment: rewards H1/H2/H3 structure, the
+    "Response: ... Blog Post: ..." layout from chatbot7.txt and length up to ~1500 words.
+    Args:
+        text: Candidate draft.
+    Returns:
+        A score in [0, 1].
+    """
+    if not text:
+        return 0.0
+    levels = {len(match.group(1)) for match in _HEADING.finditer(text)}
+    layout = ("Response:" in text) + ("Blog Post:" in text)
+    length = min(len(text.split()) / 1500.0, 1.0)
+    return (len(levels) / 3.0) * 0.4 + (layout / 2.0) * 0.2 + length * 0.4
+
+
+def make_editor_scorer(openai_client: Any, instructions: Optional[str] = None, **params: Any) -> Scorer:
+    """
+    Builds a scorer that asks the model for a quick 1-10 editorial rating.
+    Args:
+        openai_client: Client with async complete_prompt.
+        instructions: Rating instructions sent as the system prompt.
+        **params: Extra completion parameters (e.g. a cheaper model, max_tokens).
+    Returns:
+        An async scorer mapping a draft to its rating in [0, 1].
+    """
+    system = instructions or (
+        "You are Mr.Editor. Rate the following blog post draft from 1 to 10 for structure, "
+        "clarity and completeness of the assignment. Reply with the number only."
+    )
+    params.setdefault("temperature", 0)
+    params.setdefault("max_tokens", 4)
+
+    async def score(text: str) -> float:
+        reply = await openai_client.complete_prompt(
+            [{"role": "system", "content": system}, {"role": "user", "content": text}], **params
+        )
+        match = _NUMBER.search(reply or "")
+        return min(float(match.group()), 10.0) / 10.0 if match else 0.0
+
+    return score
+
+
+@dataclass
+class SpeculationConfig:
+    """
+    Settings for fanning out several drafts per turn. Candidate ``i`` uses
+    ``temperatures[i % len]`` and ``seeds[i % len]`` when given. With ``accept_score``
+    the first candidate scoring at least that much wins and the others are cancelled.
+    Only the agents named in ``agents`` speculate (None means every agent); the default
+    is the writer, since ``structure_scorer`` ranks blog-post drafts and says nothing
+    about an editor's notes. Pass a scorer suited to other agents when adding them.
+    """
+
+    n: int = 3
+    temperatures: Sequence[float] = (0.7, 0.9, 1.1)
+    seeds: Sequence[int] = ()
+    scorer: Scorer = structure_scorer
+    accept_score: Optional[float] = None
+    agents: Optional[Sequence[str]] = ("Miss Writer",)
+
+
+@dataclass
+class SpeculationResult:
+    """Outcome of one speculative turn."""
+
+    response: Any
+    score: float
+    scores: List[float] = field(default_factory=list)
+    cancelled: int = 0
+    failed: int = 0
+
+
+async def speculate(
+    chatbot: Any,
+    user: str,
+    message: str,
+    config: SpeculationConfig,
+    slots: Optional[asyncio.Semaphore] = None,
+) -> SpeculationResult:
+    """
+    Runs ``config.n`` concurrent drafts, scores them as they finish and commits the winner.
+    Args:
+        chatbot: Chatbot with async draft() and accept().
+        user: The user sending the message.
+        message: The message content.
+        config: Speculation settings.
+        slots: Optional semaphore bounding in-flight requests (one slot per draft).
+    Returns:
+        The winning response and scoring details.
+    Raises:
+        Exception: The last draft error, if every draft failed.
+    """
+    if config.n < 1:
+        raise ValueError("Speculation needs at least one draft.")
+
+    async def run_draft(index: int) -> Any:
+        params: Dict[str, Any] = {}
+        if config.temperatures:
+            params["temperature"] = config.temperatures[index % len(config.temperatures)]
+        if config.seeds:
+            params["seed"] = config.seeds[index % len(config.seeds)]
+        if slots is None:
+            return await chatbot.draft(user, message, **params)
+        async with slots:
+            return await chatbot.draft(user, message, **params)
+
+    pending = {asyncio.ensure_future(run_draft(i)) for i in range(config.n)}
+    best: Optional[Any] = None
+    best_score = float("-inf")
+    scores: List[float] = []
+    failed = 0
+    last_error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    failed += 1
+                    last_error = task.exception()
+                    continue
+                candidate = task.result()
+                score = config.scorer(candidate if isinstance(candidate, str) else str(candidate or ""))
+                if inspect.isawaitable(score):
+                    score = await score
+                scores.append(score)
+                if score > best_score:
+                    best, best_score = candidate, score
+            if config.accept_score is not None and best_score >= config.accept_score:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    if not scores:
+        raise last_error  # type: ignore[misc]
+    await chatbot.accept(user, message, best)
+    return SpeculationResult(best, best_score, scores, cancelled=len(pending), failed=failed)
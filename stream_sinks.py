@@ -0,0 +1,97 @@
+import sys
+from typing import AsyncIterator, Dict, Optional, TextIO, Union
+
+# ANSI codes matching colorama's Fore.YELLOW / Fore.CYAN / Style.RESET_ALL.
+AGENT_COLORS: Dict[str, str] = {
+    "Miss Writer:": "\x1b[33m",
+    "Mr.Editor:": "\x1b[36m",
+}
+RESET = "\x1b[0m"
+
+
+class ConsoleSink:
+    """
+    Prints a streamed message in the agent's color as chunks arrive,
+    in the same "<agent>: <text>" layout as the simulation's print_colored.
+    """
+
+    def __init__(self, agent: str, stream: Optional[TextIO] = None, colors: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            agent: Agent label, e.g. "Miss Writer:".
+            stream: Output stream; defaults to sys.stdout at write time.
+            colors: Mapping of agent label to ANSI color prefix.
+        """
+        self.agent = agent
+        self.stream = stream
+        self.colors = AGENT_COLORS if colors is None else colors
+        self._started = False
+
+    def write(self, chunk: str) -> None:
+        out = self.stream or sys.stdout
+        if not self._started:
+            out.write(self.colors.get(self.agent, "") + f"{self.agent}: ")
+            self._started = True
+        out.write(chunk)
+        out.flush()
+
+    def close(self) -> None:
+        if not self._started:
+            self.write("")
+        out = self.stream or sys.stdout
+        out.write("\n\n" + RESET)
+        out.flush()
+
+
+class LogFileSink:
+    """
+    Appends a streamed message to a chat log chunk by chunk. Pass an already open
+    file to keep one long-lived handle across messages; a path is opened per message.
+    """
+
+    def __init__(self, target: Union[str, TextIO], agent: str):
+        """
+        Args:
+            target: Open text file (left open on close) or a path opened in append mode.
+            agent: Agent label written before the message, e.g. "Miss Writer:".
+        """
+        self.agent = agent
+        self._owns_file = isinstance(target, str)
+        self.path = target if isinstance(target, str) else getattr(target, "name", None)
+        self._target = target
+        self._file: Optional[TextIO] = None
+
+    def write(self, chunk: str) -> None:
+        if self._file is None:
+            self._file = open(self._target, "a", encoding="utf-8") if self._owns_file else self._target
+            self._file.write(f"{self.agent} ")
+        self._file.write(chunk)
+
+    def close(self) -> None:
+        if self._file is None:
+            self.write("")
+        self._file.write("\n\n")
+        if self._owns_file:
+            self._file.close()
+        self._file = None
+
+
+async def stream_to_sinks(chunks: AsyncIterator[str], *sinks: object) -> str:
+    """
+    Forwards every chunk to each sink as it arrives.
+    Args:
+        chunks: Async iterator of text deltas (e.g. Chatbot.send_message_stream).
+        *sinks: Objects with write(chunk) and close() methods.
+    Returns:
+        The full concatenated text.
+    """
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            for sink in sinks:
+                sink.write(chunk)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return "".join(parts)
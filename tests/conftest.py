@@ -0,0 +1,95 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest_asyncio
+
+
+class StubHTTPServer:
+    """Minimal keep-alive HTTP/1.1 server for exercising the transport without network access."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests: List[Dict[str, Any]] = []
+        self.handler: Callable[[Dict[str, Any]], Tuple[int, Dict[str, str], bytes]] = self.default_handler
+        self.server = None
+        self.port = 0
+
+    @staticmethod
+    def default_handler(request: Dict[str, Any]) -> Tuple[int, Dict[str, str], bytes]:
+        payload = json.loads(request["body"] or b"{}")
+        content = "echo: " + " | ".join(m["content"] for m in payload.get("messages", []))
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]})
+        return 200, {"Content-Type": "application/json"}, body.encode()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                request = {"method": method, "path": path, "headers": headers, "body": body}
+                self.requests.append(request)
+                result = self.handler(request)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                status, response_headers, response_body = result
+                if isinstance(response_body, (bytes, str)):
+                    data = response_body.encode() if isinstance(response_body, str) else response_body
+                    head_lines = [f"HTTP/1.1 {status} OK", f"Content-Length: {len(data)}"]
+                    head_lines += [f"{k}: {v}" for k, v in response_headers.items()]
+                    writer.write(("\r\n".join(head_lines) + "\r\n\r\n").encode() + data)
+                else:
+                    # Iterable of chunks: use chunked transfer encoding.
+                    head_lines = [f"HTTP/1.1 {status} OK", "Transfer-Encoding: chunked"]
+                    head_lines += [f"{k}: {v}" for k, v in response_headers.items()]
+                    writer.write(("\r\n".join(head_lines) + "\r\n\r\n").encode())
+                    async for chunk in _aiter(response_body):
+                        data = chunk.encode() if isinstance(chunk, str) else chunk
+                        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                        await writer.drain()
+                    writer.write(b"0\r\n\r\n")
+                await writer.drain()
+                if response_headers.get("Connection", "").lower() == "close":
+                    break
+        finally:
+            writer.close()
+
+
+async def _aiter(chunks: Any):
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+
+@pytest_asyncio.fixture
+async def stub_server():
+    server = StubHTTPServer()
+    await server.start()
+    yield server
+    await server.stop()
@@ -118,4 +118,122 @@ class TestChatbot:
             def __init__(self):
                 self.data = []
         chatbot.memory_modules["new"] = DummyNewMemory()
-        assert hasattr(chatbot.memory_modules["new"], "data")
\ No newline at end of file
+        assert hasattr(chatbot.memory_modules["new"], "data")
+
+    async def test_send_message_stream(self, chatbot):
+        async def stream_prompt(prompt):
+            for delta in ["AI ", "stream"]:
+                yield delta
+
+        chatbot.openai_client.stream_prompt = stream_prompt
+        deltas = [delta async for delta in chatbot.send_message_stream("gina", "Go")]
+        assert deltas == ["AI ", "stream"]
+        assert chatbot.history[-1] == ("gina", "Go", "AI stream")
+        assert chatbot.memory_modules["buffer"].messages[-1] == "Go"
+
+    async def test_send_message_stream_takes_extra_and_is_traced(self, openai_client, memory_modules, prompt_template):
+        from metrics import Tracer
+
+        prompts = []
+
+        async def stream_prompt(prompt):
+            prompts.append(prompt)
+            yield "AI stream"
+
+        openai_client.stream_prompt = stream_prompt
+        tracer = Tracer()
+        chatbot = Chatbot(openai_client, memory_modules, prompt_template, name="Miss Writer", tracer=tracer)
+        draft = {"role": "system", "content": "Current draft"}
+        assert [delta async for delta in chatbot.send_message_stream("gina", "Go", extra=[draft])] == ["AI stream"]
+        assert draft in prompts[0]
+        assert [m["content"] for m in chatbot.context] == ["Go", "AI stream"]
+        spans = tracer.registry.histograms["span_duration_seconds"]
+        assert (("span", "chatbot.send_message_stream"),) in spans and (("span", "chatbot.prepare"),) in spans
+
+    async def test_abandoned_stream_not_committed(self, chatbot):
+        async def stream_prompt(prompt):
+            yield "partial"
+            yield "rest"
+
+        chatbot.openai_client.stream_prompt = stream_prompt
+        stream = chatbot.send_message_stream("hank", "Go")
+        assert await stream.__anext__() == "partial"
+        await stream.aclose()
+        assert chatbot.history == []
+
+    async def test_context_window_sent_to_client(self, chatbot):
+        await chatbot.send_message("ivy", "first")
+        await chatbot.send_message("ivy", "second")
+        messages = chatbot.openai_client.complete_prompt.call_args[0][0]
+        assert messages[0] == {"role": "system", "content": "Hello, ivy!"}
+        assert [m["content"] for m in messages[1:]] == ["first", "AI response", "second"]
+        assert len(chatbot.context) == 4
+
+    async def test_failed_call_leaves_context_untouched(self, chatbot):
+        chatbot.openai_client.complete_prompt.side_effect = ConnectionError("down")
+        with pytest.raises(ConnectionError):
+            await chatbot.send_message("jo", "lost")
+        assert len(chatbot.context) == 0
+
+    async def test_failed_call_keeps_messages_the_prompt_left_out(self, openai_client, memory_modules, prompt_template):
+        from context_window import ContextWindow
+
+        evicted = []
+        window = ContextWindow(max_tokens=60, reserve_tokens=10, on_evict=evicted.extend)
+        chatbot = Chatbot(openai_client, memory_modules, prompt_template, context_window=window)
+        for i in range(4):
+            await chatbot.send_message("jo", f"message {i} " + "word " * 5)
+        before = list(window)
+        evicted.clear()
+        openai_client.complete_prompt.side_effect = ConnectionError("down")
+        with pytest.raises(ConnectionError):
+            await chatbot.send_message("jo", "lost " * 5)
+        assert list(window) == before and evicted == []
+        openai_client.complete_prompt.side_effect = None
+        await chatbot.send_message("jo", "kept")
+        assert evicted and len(window) < len(before) + 2
+    async def test_vector_recall_with_embedder(self, openai_client, prompt_template):
+        class KeywordEmbedder:
+            async def embed_many(self, texts):
+                return [[float("cats" in t), float("dogs" in t)] for t in texts]
+
+        class ListVectorMemory:
+            def __init__(self):
+                self.items = []
+
+            def __len__(self):
+                return len(self.items)
+
+            def add_vector(self, v, payload=None):
+                self.items.append((v, payload))
+
+            def search(self, query, k=5):
+                scored = [(p, sum(a * b for a, b in zip(v, query))) for v, p in self.items]
+                return sorted(scored, key=lambda item: -item[1])[:k]
+
+        from context_window import ContextWindow
+
+        memory = {"buffer": DummyBufferMemory(), "vector": ListVectorMemory()}
+        bot = Chatbot(
+            openai_client, memory, prompt_template,
+            context_window=ContextWindow(max_tokens=110, reserve_tokens=10),
+            embedder=KeywordEmbedder(), recall_k=1,
+        )
+        await bot.send_message("kim", "I love cats " + "and more " * 20)
+        await bot.send_message("kim", "dogs are fine " + "really " * 20)
+        await bot.send_message("kim", "tell me about cats")
+        messages = openai_client.complete_prompt.call_args[0][0]
+        assert any(m["content"].startswith("Relevant earlier turns:") and "I love cats" in m["content"] for m in messages)
+        assert len(memory["vector"]) == 6
+
+    async def test_compiled_template_token_count_used(self, openai_client, memory_modules):
+        from context_window import ContextWindow
+        from prompt_template import PromptTemplate
+
+        template = PromptTemplate("You are {user}'s editor. " + "Static guidance. " * 50)
+        template.count_tokens = MagicMock(wraps=template.count_tokens)
+        bot = Chatbot(openai_client, memory_modules, template, context_window=ContextWindow())
+        await bot.send_message("lee", "Review this")
+        template.count_tokens.assert_called_once_with(user="lee")
+        messages = openai_client.complete_prompt.call_args[0][0]
+        assert messages[0]["content"].startswith("You are lee's editor.")
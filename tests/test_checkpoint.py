@@ -0,0 +1,118 @@
+import pytest
+
+from chatbot import Chatbot
+from checkpoint import CheckpointStore
+from context_window import ContextWindow
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are a helpful agent."
+
+
+class CountingClient:
+    """Deterministic client that can be told to fail on a given call."""
+
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.fail_on = fail_on
+
+    async def complete_prompt(self, prompt, **params):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise ConnectionError("network down")
+        return f"reply to: {prompt[-1]['content'][:40]}"
+
+
+def factory_for(client):
+    def factory():
+        return [
+            Chatbot(client, {"buffer": BufferMemory(max_messages=4)}, DummyTemplate(), name="Miss Writer"),
+            Chatbot(client, {"buffer": BufferMemory(max_messages=4)}, DummyTemplate(), name="Mr.Editor"),
+        ]
+
+    return factory
+
+
+def test_store_roundtrip(tmp_path):
+    store = CheckpointStore(str(tmp_path / "sessions.db"))
+    store.save("s1", 1, {"plan": None}, [("turns", 0, ["a", "hello"])])
+    store.save("s1", 2, {"plan": {"x": 1}}, [("turns", 1, ["b", "world"])])
+    assert store.load("s1") == (2, {"plan": {"x": 1}})
+    assert store.entries("s1", "turns") == [["a", "hello"], ["b", "world"]]
+    assert "s1" in store and store.session_ids() == ["s1"]
+    assert store.load("missing") is None
+    store.delete("s1")
+    assert "s1" not in store and store.entries("s1", "turns") == []
+    store.close()
+
+
+def test_chatbot_snapshot_roundtrip():
+    bot = Chatbot(CountingClient(), {"buffer": BufferMemory()}, DummyTemplate(), context_window=ContextWindow())
+    bot._commit("user", "hello", "hi there")
+    bot.context.set_summary("earlier talk")
+    state = bot.snapshot()
+    clone = Chatbot(CountingClient(), {"buffer": BufferMemory()}, DummyTemplate(), context_window=ContextWindow())
+    clone.restore(state)
+    assert clone.history == [("user", "hello", "hi there")]
+    assert list(clone.context) == list(bot.context)
+    assert clone.context.total_tokens == bot.context.total_tokens
+    assert clone.context.summary == bot.context.summary
+    assert clone.memory_modules["buffer"].messages == ["hello"]
+    assert clone.memory_modules["buffer"].total_tokens == bot.memory_modules["buffer"].total_tokens
+
+
+def test_checkpointing_requires_factory(tmp_path):
+    with pytest.raises(ValueError):
+        ConversationManager([object()], checkpoint=CheckpointStore(str(tmp_path / "s.db")))
+
+
+@pytest.mark.asyncio
+async def test_resume_after_crash_does_not_repeat_turns(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    reference_client = CountingClient()
+    reference = ConversationManager([], chatbot_factory=factory_for(reference_client))
+    expected = await reference.start_conversation("s1", "user", "Start the post", rounds=3)
+
+    crashing = CountingClient(fail_on=5)
+    manager = ConversationManager([], chatbot_factory=factory_for(crashing), checkpoint=CheckpointStore(path))
+    with pytest.raises(ConnectionError):
+        await manager.start_conversation("s1", "user", "Start the post", rounds=3)
+    manager.checkpoint.close()
+
+    # A new process: fresh manager and chatbots, same store.
+    client = CountingClient()
+    restarted = ConversationManager([], chatbot_factory=factory_for(client), checkpoint=CheckpointStore(path))
+    resumed = await restarted.resume("s1")
+    assert client.calls == 2
+    session = restarted.sessions["s1"]
+    assert session.turns == expected
+    assert resumed == expected[4:]
+    reference_bots = reference.sessions["s1"].chatbots
+    for bot, reference_bot in zip(session.chatbots, reference_bots):
+        assert bot.history == reference_bot.history
+        assert list(bot.context) == list(reference_bot.context)
+    assert await restarted.resume("s1") == []
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted_and_reloaded(tmp_path):
+    client = CountingClient()
+    manager = ConversationManager(
+        [],
+        chatbot_factory=factory_for(client),
+        checkpoint=CheckpointStore(str(tmp_path / "sessions.db")),
+        max_resident_sessions=2,
+    )
+    for i in range(5):
+        await manager.start_conversation(f"s{i}", "user", f"topic {i}")
+    assert list(manager.sessions) == ["s3", "s4"]
+
+    turns = await manager.start_conversation("s0", "user", "next topic")
+    session = manager.sessions["s0"]
+    assert [turn[0] for turn in session.turns] == ["Miss Writer", "Mr.Editor"] * 2
+    assert turns == session.turns[2:]
+    assert len(session.chatbots[0].history) == 2
+    assert len(manager.sessions) == 2
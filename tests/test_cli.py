@@ -0,0 +1,78 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+from mock_server import MockOpenAIServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_MODULES = ["chatbot", "openai_client", "conversation_manager", "memory", "vector_memory", "context_window"]
+HEAVY_MODULES = ["numpy", "sqlite3", "tiktoken", "difflib", "gzip", "urllib.parse", "openai", "colorama"]
+
+
+def _run_python(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def test_core_imports_defer_heavy_dependencies():
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"for name in {CORE_MODULES!r}: __import__(name)\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    report = json.loads(_run_python(code))
+    assert report["loaded"] == []
+    # Generous bound: the point is catching a heavy import creeping back in, not timing CI.
+    assert report["elapsed"] < 2.0
+
+
+def test_importing_sim3_runs_nothing():
+    loaded = json.loads(_run_python("import json, sys, sim3; print(json.dumps([m for m in ('openai', 'colorama') if m in sys.modules]))"))
+    assert loaded == []
+
+
+def test_cli_help_does_not_load_the_agent_stack():
+    code = (
+        "import json, sys, cli\n"
+        "try:\n    cli.main(['--help'])\nexcept SystemExit:\n    pass\n"
+        "print(json.dumps([m for m in ('asyncio', 'openai_client', 'conversation_manager') if m in sys.modules]))\n"
+    )
+    assert json.loads(_run_python(code).splitlines()[-1]) == []
+
+
+def test_cli_runs_conversation_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    server = MockOpenAIServer(completion_tokens=12)
+    server.start_in_thread()
+    try:
+        args = ["--base-url", server.base_url, "--key-file", "", "--rounds", "2", "--checkpoint", str(tmp_path / "cli.db")]
+        out = io.StringIO()
+        parsed = cli.build_parser().parse_args(args)
+        assert asyncio.run(cli.run(parsed, out)) == 0
+        transcript = out.getvalue()
+        assert transcript.startswith("Miss Writer: Hello Mr.Editor.")
+        assert transcript.count("Miss Writer: ") == 3 and transcript.count("Mr.Editor: ") == 2
+
+        # Asking for three rounds from the same checkpoint only runs the missing one.
+        requests = server.stats.completions
+        more = io.StringIO()
+        parsed = cli.build_parser().parse_args(args[:-3] + ["3", "--checkpoint", str(tmp_path / "cli.db")])
+        assert asyncio.run(cli.run(parsed, more)) == 0
+        assert server.stats.completions - requests == 2
+        assert more.getvalue().count("Mr.Editor: ") == 1
+    finally:
+        server.stop_thread()
+
+
+def test_missing_key_is_reported(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    parsed = cli.build_parser().parse_args(["--key-file", str(tmp_path / "missing.txt")])
+    with pytest.raises(KeyError):
+        cli.load_config(parsed)
@@ -1,9 +1,10 @@
+import asyncio
 import pytest
 import os
 from unittest.mock import patch
 
 # Placeholder for the actual ConfigManager import
-from config_manager import ConfigManager
+from config_manager import ConfigError, ConfigManager
 
 @pytest.mark.asyncio
 class TestConfigManager:
@@ -76,4 +77,97 @@ class TestConfigManager:
         if "OPENAI_API_KEY" in os.environ:
             del os.environ["OPENAI_API_KEY"]
         # Should still retrieve from file
-        assert config_manager.get("OPENAI_API_KEY") == "file-key"
\ No newline at end of file
+        assert config_manager.get("OPENAI_API_KEY") == "file-key"
+
+
+def test_layered_typed_snapshot(tmp_path):
+    base = tmp_path / "base.env"
+    base.write_text("# defaults for tests\nTIMEOUT=30s\nMAX_CONCURRENCY=8\nexport MODEL='gpt-4'\n")
+    local = tmp_path / "local.env"
+    local.write_text("MAX_CONCURRENCY=16\nSTREAM=yes\n")
+    cm = ConfigManager(str(base), defaults={"RETRIES": 3}, files=[str(local)], environ={"TEMPERATURE": "0.7"})
+    snapshot = cm.snapshot
+    assert snapshot.get_duration("TIMEOUT") == 30.0
+    assert snapshot.get_int("MAX_CONCURRENCY") == 16
+    assert snapshot.get_int("RETRIES") == 3
+    assert snapshot.get_float("TEMPERATURE") == 0.7
+    assert snapshot.get_bool("STREAM") is True
+    assert snapshot.get("MODEL") == "gpt-4"
+    assert snapshot.get_int("MISSING", 5) == 5
+    with pytest.raises(ConfigError):
+        snapshot.get_int("MODEL")
+    with pytest.raises(TypeError):
+        snapshot.values["MODEL"] = "other"
+
+
+def test_malformed_file_is_reported(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("GOOD=1\nthis line is broken\n")
+    with pytest.raises(ConfigError, match=":2:"):
+        ConfigManager(str(env_file))
+
+
+def test_reload_swaps_snapshot_and_notifies(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("OPENAI_API_KEY=old-key\nRPM=100\n")
+    cm = ConfigManager(str(env_file), environ={})
+    before = cm.snapshot
+    changes = []
+    unsubscribe = cm.subscribe(lambda old, new: changes.append((old.get("OPENAI_API_KEY"), new.get("OPENAI_API_KEY"))))
+    assert cm.check() is False
+
+    env_file.write_text("OPENAI_API_KEY=new-key\nRPM=100\n")
+    os.utime(env_file, (1, 1))
+    assert cm.check() is True
+    assert changes == [("old-key", "new-key")]
+    assert before.get("OPENAI_API_KEY") == "old-key" and cm.get("OPENAI_API_KEY") == "new-key"
+
+    env_file.write_text("broken\n")
+    os.utime(env_file, (2, 2))
+    with pytest.raises(ConfigError):
+        cm.reload()
+    assert cm.snapshot.get("OPENAI_API_KEY") == "new-key"
+    unsubscribe()
+    env_file.write_text("OPENAI_API_KEY=third-key\n")
+    cm.reload()
+    assert len(changes) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_picks_up_rotated_key(tmp_path, stub_server):
+    from openai_client import OpenAIClient
+
+    env_file = tmp_path / ".env"
+    env_file.write_text("OPENAI_API_KEY=old-key\n")
+    cm = ConfigManager(str(env_file), environ={})
+    watcher = asyncio.ensure_future(cm.watch(interval=0.01))
+    try:
+        async with OpenAIClient(cm, base_url=stub_server.base_url) as client:
+            await client.complete_prompt("first")
+            env_file.write_text("OPENAI_API_KEY=new-key\n")
+            os.utime(env_file, (1, 1))
+            for _ in range(100):
+                if client.api_key == "new-key":
+                    break
+                await asyncio.sleep(0.01)
+            await client.complete_prompt("second")
+    finally:
+        watcher.cancel()
+    keys = [request["headers"]["authorization"] for request in stub_server.requests]
+    assert keys == ["Bearer old-key", "Bearer new-key"]
+
+
+@pytest.mark.asyncio
+async def test_client_leaves_a_supplied_endpoint_key_alone(tmp_path):
+    from endpoint_pool import Endpoint, EndpointPool
+    from openai_client import OpenAIClient
+
+    env_file = tmp_path / ".env"
+    env_file.write_text("OPENAI_API_KEY=env-key\n")
+    cm = ConfigManager(str(env_file), environ={})
+    endpoints = EndpointPool([Endpoint("http://backup.invalid", "backup-key")])
+    async with OpenAIClient(cm, endpoints=endpoints) as client:
+        env_file.write_text("OPENAI_API_KEY=rotated-key\n")
+        os.utime(env_file, (1, 1))
+        assert cm.reload() is True
+        assert client.api_key == "backup-key" and endpoints.endpoints[0].api_key == "backup-key"
@@ -0,0 +1,91 @@
+import pytest
+
+from context_window import ContextOverflowError, ContextWindow
+from token_counter import MESSAGE_OVERHEAD, TokenCounter
+
+
+def word_counter():
+    # One token per whitespace-separated word keeps budgets easy to reason about.
+    return TokenCounter(encode=lambda text: text.split())
+
+
+class CountingCounter(TokenCounter):
+    def __init__(self):
+        super().__init__(encode=lambda text: text.split())
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return super().count(text)
+
+
+class TestTokenCounter:
+    def test_fallback_estimate(self):
+        counter = TokenCounter(encode=None)
+        counter._resolved = True
+        assert counter.count("abcdefgh") == 2
+
+    def test_message_overhead(self):
+        assert word_counter().count_message({"role": "user", "content": "a b c"}) == 3 + MESSAGE_OVERHEAD
+
+
+class TestContextWindow:
+    def test_running_total_counts_each_message_once(self):
+        counter = CountingCounter()
+        window = ContextWindow(max_tokens=1000, reserve_tokens=10, token_counter=counter)
+        window.append("user", "one two")
+        window.append("assistant", "three")
+        for _ in range(5):
+            window.build("system prompt text")
+        assert window.total_tokens == 3 + 2 * MESSAGE_OVERHEAD
+        # Two messages plus the system prompt, which is cached across builds.
+        assert counter.calls == 3
+
+    def test_build_orders_messages(self):
+        window = ContextWindow(max_tokens=1000, reserve_tokens=10, token_counter=word_counter())
+        window.append("user", "hi")
+        window.append("assistant", "hello")
+        messages = window.build("sys", {"role": "user", "content": "next"})
+        assert [m["role"] for m in messages] == ["system", "user", "assistant", "user"]
+        assert len(window) == 2
+
+    def test_trims_oldest_to_fit_budget(self):
+        evicted = []
+        window = ContextWindow(max_tokens=40, reserve_tokens=10, token_counter=word_counter(), on_evict=evicted.extend)
+        for i in range(6):
+            window.append("user", f"message number {i}")
+        messages = window.build("sys")
+        total = sum(word_counter().count_message(m) for m in messages)
+        assert total <= window.budget
+        assert messages[-1]["content"] == "message number 5"
+        # Building a prompt leaves the window alone; the left-out messages go on apply_trim.
+        assert len(window) == 6 and evicted == []
+        assert window.apply_trim() == evicted and window.apply_trim() == []
+        assert evicted[0]["content"] == "message number 0"
+        assert [m["content"] for m in window] == [m["content"] for m in messages[1:]]
+        assert window.total_tokens == sum(word_counter().count_message(m) for m in window)
+
+    def test_extra_is_dropped_before_the_fixed_prompt_overflows(self):
+        window = ContextWindow(max_tokens=20, reserve_tokens=2, token_counter=word_counter())
+        window.append("user", "old message")
+        extra = [{"role": "system", "content": "recalled one"}, {"role": "system", "content": "recalled " * 8}]
+        messages = window.build("sys", {"role": "user", "content": "next"}, extra)
+        assert [m["content"] for m in messages] == ["sys", "recalled one", "next"]
+        with pytest.raises(ContextOverflowError):
+            window.build("sys " * 20)
+        assert len(window) == 1
+
+    def test_summary_is_budgeted(self):
+        window = ContextWindow(max_tokens=40, reserve_tokens=10, token_counter=word_counter())
+        window.set_summary("earlier turns " * 3)
+        for i in range(4):
+            window.append("user", f"message number {i}")
+        messages = window.build()
+        assert messages[0]["content"].startswith("Summary of earlier conversation")
+        assert sum(word_counter().count_message(m) for m in messages) <= window.budget
+        window.set_summary(None)
+        assert window.summary is None
+
+    def test_invalid_reserve(self):
+        with pytest.raises(ValueError):
+            ContextWindow(max_tokens=10, reserve_tokens=10)
@@ -0,0 +1,86 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from conversation_log import AsyncLogWriter, ConversationLogWriter, iter_records, segments
+
+
+def record(i, session="s1"):
+    return {"session": session, "agent": "writer", "message": f"turn {i}", "tokens": i, "latency": 0.1}
+
+
+class TestConversationLogWriter:
+    def test_buffered_jsonl_append(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        writer = ConversationLogWriter(path)
+        writer.write(record(1))
+        writer.write(record(2))
+        writer.close()
+        lines = open(path, encoding="utf-8").read().splitlines()
+        assert [json.loads(line)["message"] for line in lines] == ["turn 1", "turn 2"]
+        with pytest.raises(ValueError):
+            writer.write(record(3))
+
+    def test_reopen_appends(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        for i in range(2):
+            writer = ConversationLogWriter(path)
+            writer.write(record(i))
+            writer.close()
+        assert [r["tokens"] for r in iter_records(path)] == [0, 1]
+
+    def test_size_rotation_and_ordered_reading(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        writer = ConversationLogWriter(path, max_bytes=200)
+        for i in range(10):
+            writer.write(record(i))
+        writer.close()
+        assert len(segments(path)) > 2
+        assert all(os.path.getsize(p) <= 200 for p in segments(path))
+        assert [r["tokens"] for r in iter_records(path)] == list(range(10))
+
+    def test_time_rotation_with_compression(self, tmp_path):
+        now = [0.0]
+        path = str(tmp_path / "log.jsonl")
+        writer = ConversationLogWriter(path, max_age=60, compress=True, fsync="rotate", clock=lambda: now[0])
+        writer.write(record(0))
+        now[0] = 61
+        writer.write(record(1))
+        writer.close()
+        assert segments(path) == [path + ".1.gz", path]
+        with gzip.open(path + ".1.gz", "rt", encoding="utf-8") as f:
+            assert json.loads(f.readline())["tokens"] == 0
+        assert [r["tokens"] for r in iter_records(path)] == [0, 1]
+
+    def test_paging_and_session_filter(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        writer = ConversationLogWriter(path, fsync="always")
+        for i in range(10):
+            writer.write(record(i, session="a" if i % 2 else "b"))
+        writer.close()
+        assert [r["tokens"] for r in iter_records(path, session_id="a", start=1, limit=2)] == [3, 5]
+
+    def test_invalid_fsync_policy(self, tmp_path):
+        with pytest.raises(ValueError):
+            ConversationLogWriter(str(tmp_path / "log.jsonl"), fsync="sometimes")
+
+
+@pytest.mark.asyncio
+class TestAsyncLogWriter:
+    async def test_background_writer_drains_on_close(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        async with AsyncLogWriter(ConversationLogWriter(path)) as writer:
+            for i in range(50):
+                await writer.write(record(i))
+        assert [r["tokens"] for r in iter_records(path)] == list(range(50))
+
+    async def test_flush_waits_for_queued_records(self, tmp_path):
+        path = str(tmp_path / "log.jsonl")
+        writer = AsyncLogWriter(ConversationLogWriter(path))
+        for i in range(5):
+            await writer.write(record(i))
+        await writer.flush()
+        assert [r["tokens"] for r in iter_records(path)] == list(range(5))
+        await writer.close()
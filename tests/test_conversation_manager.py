@@ -1,3 +1,4 @@
+import os
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -27,53 +28,46 @@ class TestConversationManager:
         # Use the real ConversationManager with mock chatbots
         return ConversationManager(chatbots)
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_orchestrate_multi_agent_conversation(self, conversation_manager):
         session_id = "sess1"
         result = await conversation_manager.start_conversation(session_id, "alice", "Hello!")
         assert len(result) == 2
         assert all("received" in r[1] for r in result)
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_session_thread_management(self, conversation_manager):
         await conversation_manager.start_conversation("sessA", "bob", "Hi")
         await conversation_manager.start_conversation("sessB", "carol", "Hey")
         assert "sessA" in conversation_manager.sessions
         assert "sessB" in conversation_manager.sessions
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_persistent_logging(self, conversation_manager):
         await conversation_manager.start_conversation("sessX", "dave", "Log this")
         log = conversation_manager.get_log()
         assert any("Log this" in entry[2] for entry in log)
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_invalid_agent_list(self):
         # Test ConversationManager with no chatbots
         cm = ConversationManager([])
         with pytest.raises(ValueError):
             await cm.start_conversation("sess", "user", "msg")
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_corrupted_session(self, conversation_manager):
         conversation_manager.sessions = None
         with pytest.raises(TypeError):
             await conversation_manager.start_conversation("sessY", "eve", "Test")
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_logging_failure(self, conversation_manager):
         # Simulate log as None to trigger error
         conversation_manager.log = None
         with pytest.raises(AttributeError):
             await conversation_manager.start_conversation("sessZ", "frank", "Test")
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
     async def test_boundary_max_concurrent_sessions(self, conversation_manager):
         for i in range(10):
             await conversation_manager.start_conversation(f"sess{i}", "user", f"msg{i}")
         assert len(conversation_manager.sessions) == 10
 
-    @pytest.mark.xfail(reason="start_conversation not implemented in ConversationManager")
+    @pytest.mark.xfail(reason="An empty chatbot list is rejected with ValueError (see test_invalid_agent_list)")
     async def test_empty_agent_list(self):
         cm = ConversationManager([])
         result = await cm.start_conversation("sess", "user", "msg")
@@ -83,4 +77,179 @@ class TestConversationManager:
     async def test_extensibility_pluggable_topology(self, chatbots):
         # This test assumes ConversationManager supports topology, which is not implemented.
         # If/when topology is added, update this test accordingly.
-        pass
\ No newline at end of file
+        pass
+
+    async def test_rounds_alternate_speakers(self, conversation_manager):
+        turns = await conversation_manager.start_conversation("sessR", "alice", "Draft", rounds=2)
+        assert [speaker for speaker, _ in turns] == ["bot1", "bot2", "bot1", "bot2"]
+        assert conversation_manager.get_log()[1][1] == "bot1"
+
+    async def test_turns_within_session_stay_sequential(self, chatbots):
+        active = []
+
+        async def send(user, msg):
+            active.append(msg)
+            assert len(active) == 1
+            await asyncio.sleep(0.01)
+            active.pop()
+            return f"re: {msg}"
+
+        for bot in chatbots:
+            bot.send_message = AsyncMock(side_effect=send)
+        cm = ConversationManager(chatbots)
+        await asyncio.gather(*(cm.start_conversation("same", "u", f"m{i}") for i in range(3)))
+        assert len(cm.sessions["same"].turns) == 6
+
+    async def test_global_concurrency_bound(self):
+        in_flight = 0
+        peak = 0
+
+        def make_bots():
+            async def send(user, msg):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.005)
+                in_flight -= 1
+                return "ok"
+
+            bot = MagicMock()
+            bot.name = "writer"
+            bot.send_message = AsyncMock(side_effect=send)
+            return [bot]
+
+        cm = ConversationManager([], max_concurrency=4, chatbot_factory=make_bots)
+        report = await cm.run_sessions((f"s{i}", "u", "go") for i in range(20))
+        assert peak == 4
+        assert report.sessions == 20
+        assert report.turns == 20
+        assert report.turns_per_second > 0
+        assert report.sessions_per_minute > 0
+
+    async def test_shared_chatbots_refuse_concurrent_sessions(self, chatbots):
+        release = asyncio.Event()
+
+        async def slow(user, msg):
+            await release.wait()
+            return "ok"
+
+        chatbots[0].send_message = AsyncMock(side_effect=slow)
+        cm = ConversationManager(chatbots)
+        with pytest.raises(ValueError):
+            await cm.run_sessions([("a", "u", "go"), ("b", "u", "go")])
+        first = asyncio.ensure_future(cm.start_conversation("a", "u", "go"))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await cm.start_conversation("b", "u", "go")
+        release.set()
+        await first
+        assert len(await cm.start_conversation("b", "u", "go")) == 2
+
+    async def test_factory_isolates_sessions(self):
+        cm = ConversationManager([], chatbot_factory=lambda: [MagicMock(name="bot")])
+        cm._get_session("a")
+        cm._get_session("b")
+        assert cm.sessions["a"].chatbots[0] is not cm.sessions["b"].chatbots[0]
+
+    async def test_cancel_session(self, chatbots):
+        async def slow(user, msg):
+            await asyncio.sleep(10)
+
+        chatbots[0].send_message = AsyncMock(side_effect=slow)
+        cm = ConversationManager(chatbots)
+        run = asyncio.ensure_future(cm.run_sessions([("slow", "u", "go")]))
+        await asyncio.sleep(0.01)
+        assert cm.cancel("slow")
+        report = await run
+        assert report.cancelled == 1
+        assert report.sessions == 0
+        assert not cm.cancel("missing")
+
+    async def test_jsonl_log_per_session(self, chatbots, tmp_path):
+        cm = ConversationManager(chatbots, log_dir=str(tmp_path))
+        await cm.start_conversation("sessJ", "alice", "Write", rounds=2)
+        records = list(cm.get_log("sessJ", start=1, limit=2))
+        assert [r["agent"] for r in records] == ["bot2", "bot1"]
+        assert records[0]["message"] == "bot1 received: Write"
+        assert records[0]["tokens"] > 0 and records[0]["latency"] >= 0
+        await cm.close()
+        assert (tmp_path / "sessJ.jsonl").read_text(encoding="utf-8").count("\n") == 4
+
+    async def test_open_log_files_are_bounded(self, tmp_path):
+        def make_bots():
+            async def send(user, msg):
+                await asyncio.sleep(0.001)
+                return "ok"
+
+            bots = [MagicMock(), MagicMock()]
+            for name, bot in zip(("writer", "editor"), bots):
+                bot.name = name
+                bot.send_message = AsyncMock(side_effect=send)
+            return bots
+
+        def open_logs():
+            count = 0
+            for fd in os.listdir("/proc/self/fd"):
+                try:
+                    count += os.readlink(f"/proc/self/fd/{fd}").endswith(".jsonl")
+                except OSError:
+                    pass
+            return count
+
+        cm = ConversationManager([], chatbot_factory=make_bots, log_dir=str(tmp_path), max_open_logs=3)
+        peak = 0
+
+        def on_turn(session_id, agent, latency):
+            nonlocal peak
+            peak = max(peak, len(cm._open_logs))
+            if os.path.isdir("/proc/self/fd"):
+                assert open_logs() <= 3
+
+        cm.on_turn = on_turn
+        report = await cm.run_sessions((f"s{i}", "u", "go") for i in range(10))
+        assert report.sessions == 10 and peak == 3
+        assert sum(session.log_writer is not None for session in cm.sessions.values()) == 3
+        await cm.close()
+        assert not cm._open_logs
+        assert all(len(list(cm.get_log(f"s{i}"))) == 2 for i in range(10))
+        with pytest.raises(ValueError):
+            ConversationManager([], max_open_logs=0)
+
+    async def test_log_records_are_written_off_the_event_loop(self, chatbots, tmp_path, monkeypatch):
+        import threading
+
+        from conversation_log import ConversationLogWriter
+
+        threads = []
+        write = ConversationLogWriter.write
+
+        def tracking_write(self, record):
+            threads.append(threading.get_ident())
+            write(self, record)
+
+        monkeypatch.setattr(ConversationLogWriter, "write", tracking_write)
+        cm = ConversationManager(chatbots, log_dir=str(tmp_path), log_options={"fsync": "always", "max_bytes": 200})
+        await cm.start_conversation("s", "alice", "Write", rounds=2)
+        assert len(threads) == 4 and threading.get_ident() not in threads
+        assert [r["agent"] for r in cm.get_log("s")] == ["bot1", "bot2", "bot1", "bot2"]
+        await cm.close()
+
+    async def test_log_file_names_stay_inside_log_dir(self, chatbots, tmp_path):
+        log_dir = tmp_path / "logs"
+        log_dir.mkdir()
+        cm = ConversationManager(chatbots, log_dir=str(log_dir))
+        await cm.start_conversation("../../escape", "alice", "Write")
+        await cm.start_conversation("team/a b", "alice", "Write")
+        await cm.close()
+        assert sorted(p.name for p in log_dir.iterdir()) == ["..%2F..%2Fescape.jsonl", "team%2Fa%20b.jsonl"]
+        assert list(tmp_path.iterdir()) == [log_dir]
+        assert len(list(cm.get_log("team/a b"))) == 2
+        (log_dir / "link.jsonl").symlink_to(tmp_path / "outside.jsonl")
+        with pytest.raises(ValueError):
+            cm.get_log("link")
+
+    async def test_in_memory_log_is_bounded(self, chatbots):
+        cm = ConversationManager(chatbots, log_limit=3)
+        await cm.start_conversation("s", "u", "m", rounds=3)
+        assert len(cm.get_log()) == 3
+        assert len(cm.get_log("s", limit=2)) == 2
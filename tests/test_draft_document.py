@@ -0,0 +1,127 @@
+import pytest
+
+from chatbot import Chatbot
+from conversation_manager import ConversationManager
+from draft_document import DraftConfig, DraftDocument, PatchError, parse_patches, split_reply, unified_diff
+from memory import BufferMemory
+
+POST = """# Title
+Intro text.
+
+### Setup
+Install things.
+
+### Usage
+Run things.
+
+### Summary
+Done."""
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are a helpful agent."
+
+
+class ScriptedClient:
+    """Returns the scripted replies in order and records every prompt."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    async def complete_prompt(self, prompt, **params):
+        self.prompts.append(prompt)
+        return self.replies.pop(0)
+
+
+def test_parse_and_apply_patches():
+    document = DraftDocument.from_text(POST)
+    assert document.titles == ["Title", "Setup", "Usage", "Summary"]
+    patches = parse_patches(
+        "Notes before patches are ignored.\n"
+        "@@ REPLACE Usage\nRun things faster.\n"
+        "@@ INSERT AFTER setup\n### Configuration\nSet options.\n"
+        "@@ DELETE ### Summary\n"
+        "@@ APPEND\n### FAQ\nAsk away."
+    )
+    assert [patch.op for patch in patches] == ["REPLACE", "INSERT AFTER", "DELETE", "APPEND"]
+    changed = document.apply(patches)
+    assert changed == ["Usage", "Configuration", "FAQ"]
+    assert document.titles == ["Title", "Setup", "Configuration", "Usage", "FAQ"]
+    assert document.section("usage") == "### Usage\nRun things faster."
+    assert document.render().startswith("# Title\nIntro text.")
+
+
+def test_invalid_patches_leave_document_unchanged():
+    document = DraftDocument.from_text(POST)
+    with pytest.raises(PatchError):
+        parse_patches("just prose")
+    with pytest.raises(PatchError):
+        parse_patches("@@ DELETE")
+    with pytest.raises(PatchError):
+        document.apply(parse_patches("@@ REPLACE Usage\nNew usage.\n@@ DELETE Missing"))
+    with pytest.raises(PatchError):
+        document.apply(parse_patches("@@ APPEND\nno heading here"))
+    assert document.render() == DraftDocument.from_text(POST).render()
+
+
+def test_split_reply_and_diff():
+    assert split_reply("Response: ok\nBlog Post: body") == ("Response: ok", "body")
+    assert split_reply("only a post") == ("", "only a post")
+    diff = unified_diff("a\nb\nc", "a\nB\nc")
+    assert "-b" in diff and "+B" in diff
+
+
+@pytest.mark.asyncio
+async def test_writer_sends_patches_and_editor_receives_diff():
+    writer_client = ScriptedClient([
+        f"Response: first draft\nBlog Post:\n{POST}",
+        "Response: tightened usage\nBlog Post:\n@@ REPLACE Usage\nRun things faster.",
+    ])
+    editor_client = ScriptedClient(["Please tighten usage.", "Looks good."])
+
+    def factory():
+        return [
+            Chatbot(writer_client, {"buffer": BufferMemory()}, DummyTemplate(), name="Miss Writer"),
+            Chatbot(editor_client, {"buffer": BufferMemory()}, DummyTemplate(), name="Mr.Editor"),
+        ]
+
+    manager = ConversationManager([], chatbot_factory=factory, drafts=DraftConfig())
+    turns = await manager.start_conversation("s1", "user", "Write a post", rounds=2)
+    session = manager.sessions["s1"]
+    assert session.document.section("Usage") == "### Usage\nRun things faster."
+    assert "Install things." in session.document.render()
+
+    # The writer saw the current post as per-request context, not in its history.
+    second_prompt = writer_client.prompts[1]
+    assert any("Current blog post:" in m["content"] for m in second_prompt if m["role"] == "system")
+    assert all("Current blog post:" not in entry[1] for entry in session.chatbots[0].history)
+
+    # The editor received the diff and only the changed section.
+    editor_input = editor_client.prompts[1][-1]["content"]
+    assert "+Run things faster." in editor_input and "-Run things." in editor_input
+    assert "Updated sections:\n\n### Usage\nRun things faster." in editor_input
+    assert "Install things." not in editor_input
+    assert turns[2][1] == editor_input
+
+
+@pytest.mark.asyncio
+async def test_invalid_patch_is_retried_then_reported_with_the_post():
+    writer_client = ScriptedClient([
+        f"Blog Post:\n{POST}",
+        "Blog Post:\n@@ REPLACE Missing\ntext",
+        "Response: fixed it\nBlog Post:\n@@ REPLACE Nope\ntext",
+    ])
+    bot = Chatbot(writer_client, {"buffer": BufferMemory()}, DummyTemplate(), name="Miss Writer")
+    manager = ConversationManager([bot], drafts=DraftConfig(retries=1))
+    await manager.start_conversation("s1", "user", "Write a post")
+    turns = await manager.start_conversation("s1", "user", "Revise it")
+    assert len(writer_client.prompts) == 3
+    assert "could not be applied" in writer_client.prompts[2][-1]["content"]
+    document = manager.sessions["s1"].document
+    assert document.titles == ["Title", "Setup", "Usage", "Summary"]
+    (_, text), = turns
+    assert "@@ REPLACE" not in text
+    assert text.startswith("Response: fixed it\n\nThe writer's patch could not be applied")
+    assert text.endswith(f"Blog Post:\n{document.render()}")
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from embedding_batcher import EmbeddingBatcher, EmbeddingCache, text_key
+
+
+class FakeEmbedder:
+    """Deterministic local embedder: records each batch it is asked to embed."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("embedder down")
+        return [[float(len(text)), float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+@pytest.mark.asyncio
+class TestEmbeddingBatcher:
+    async def test_concurrent_callers_share_one_batch(self):
+        embedder = FakeEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_wait=0.01)
+        vectors = await asyncio.gather(*(batcher.embed(f"text {i}") for i in range(10)))
+        assert len(embedder.batches) == 1
+        assert vectors[3] == [6.0, float(sum(map(ord, "text 3")) % 97)]
+        assert batcher.stats.batch_sizes.count == 1
+        assert batcher.stats.batch_sizes.sum == 10
+        assert batcher.stats.wait_times.count == 10
+
+    async def test_max_batch_size_splits(self):
+        embedder = FakeEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_batch_size=4, max_wait=0.01)
+        await batcher.embed_many(f"t{i}" for i in range(10))
+        assert sorted(len(batch) for batch in embedder.batches) == [2, 4, 4]
+
+    async def test_dedup_in_flight_and_cached(self):
+        embedder = FakeEmbedder(delay=0.01)
+        batcher = EmbeddingBatcher(embedder, max_wait=0.001)
+        first = await asyncio.gather(batcher.embed("same"), batcher.embed("same"))
+        again = await batcher.embed("same")
+        assert first[0] == first[1] == again
+        assert embedder.batches == [["same"]]
+        assert batcher.stats.coalesced == 1
+        assert batcher.stats.cache_hits == 1
+
+    async def test_failure_propagates_to_all_waiters(self):
+        batcher = EmbeddingBatcher(FakeEmbedder(fail=True), max_wait=0.001)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        assert all(isinstance(r, ConnectionError) for r in results)
+        # Failed texts are not cached and can be retried.
+        assert len(batcher.cache) == 0
+
+    async def test_flush_dispatches_immediately(self):
+        embedder = FakeEmbedder()
+        batcher = EmbeddingBatcher(embedder, max_wait=60)
+        task = asyncio.ensure_future(batcher.embed("now"))
+        await asyncio.sleep(0)
+        await batcher.flush()
+        assert await task == [3.0, float(sum(map(ord, "now")) % 97)]
+
+    async def test_persistent_cache(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite")
+        embedder = FakeEmbedder()
+        cache = EmbeddingCache(path)
+        await EmbeddingBatcher(embedder, max_wait=0.001, cache=cache).embed("keep me")
+        cache.close()
+        reopened = EmbeddingCache(path)
+        batcher = EmbeddingBatcher(embedder, max_wait=0.001, cache=reopened)
+        assert await batcher.embed("keep me") == [7.0, float(sum(map(ord, "keep me")) % 97)]
+        assert len(embedder.batches) == 1
+        assert reopened.get(text_key("other-model", "keep me")) is None
+        reopened.close()
+
+    async def test_memory_tier_is_lru_bounded(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite"), max_entries=2)
+        cache.put_many([("a", [1.0]), ("b", [2.0])])
+        assert cache.get("a") == [1.0]
+        cache.put_many([("c", [3.0])])
+        assert len(cache) == 2 and "b" not in cache._entries
+        # Evicted entries are still served from the persistent tier.
+        assert cache.get("b") == [2.0] and len(cache) == 2
+        cache.close()
+        with pytest.raises(ValueError):
+            EmbeddingCache(max_entries=0)
+
+    async def test_invalid_batch_size(self):
+        with pytest.raises(ValueError):
+            EmbeddingBatcher(FakeEmbedder(), max_batch_size=0)
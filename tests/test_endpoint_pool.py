@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from endpoint_pool import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, Endpoint, EndpointPool
+from mock_server import MockOpenAIServer, fixed
+from openai_client import AuthenticationError, OpenAIClient
+from rate_limiter import RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.available()
+    clock.now = 10.0
+    assert breaker.state == HALF_OPEN and breaker.available()
+    breaker.begin()
+    assert not breaker.available()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 20.0
+    breaker.begin()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_select_balances_by_weight_and_outstanding():
+    a, b = Endpoint("http://a/v1", "ka", name="a"), Endpoint("http://b/v1", "kb", weight=2.0, name="b")
+    pool = EndpointPool([a, b])
+    chosen = [pool.select().name for _ in range(6)]
+    assert chosen.count("b") == 4 and chosen.count("a") == 2
+    for endpoint in (a, b):
+        while endpoint.outstanding:
+            endpoint.finish(True)
+    assert pool.select(exclude=[a]) is b
+    b.finish(False, trip=True)
+    assert pool.select(exclude=[a]) is None
+    assert [row["state"] for row in pool.snapshot()] == [CLOSED, OPEN]
+
+
+def test_from_config():
+    pool = EndpointPool.from_config({"OPENAI_API_KEYS": "k1, k2"}, "http://api/v1/")
+    assert [(e.base_url, e.api_key) for e in pool.endpoints] == [("http://api/v1", "k1"), ("http://api/v1", "k2")]
+    spec = json.dumps([{"base_url": "http://local:8000/v1", "api_key": "x", "weight": 3, "model": "llama"}])
+    (local,) = EndpointPool.from_config({"OPENAI_ENDPOINTS": spec}, "http://api/v1").endpoints
+    assert local.weight == 3 and local.model == "llama"
+    with pytest.raises(ValueError):
+        EndpointPool.from_config({"OPENAI_ENDPOINTS": "[{\"url\": 1}]"}, "http://api/v1")
+    assert EndpointPool.from_config({"OPENAI_API_KEY": "solo"}, "http://api/v1").endpoints[0].api_key == "solo"
+
+
+@pytest.mark.asyncio
+async def test_client_spreads_load_and_fails_over():
+    async with MockOpenAIServer(latency=fixed(0.01)) as good, MockOpenAIServer(error_rate=1.0) as bad:
+        pool = EndpointPool(
+            [Endpoint(good.base_url, "k1"), Endpoint(good.base_url, "k2"), Endpoint(bad.base_url, "k3")],
+            failure_threshold=2,
+        )
+        async with OpenAIClient(None, endpoints=pool, retry_policy=RetryPolicy(max_retries=0)) as client:
+            replies = await asyncio.gather(*(client.complete_prompt(f"post {i}") for i in range(12)))
+            first, second, broken = pool.endpoints
+            assert broken.breaker.state == OPEN
+            failed = broken.requests
+            replies += await asyncio.gather(*(client.complete_prompt(f"more {i}") for i in range(12)))
+    assert all(replies)
+    assert broken.requests == failed
+    assert first.requests >= 12 and second.requests >= 12
+    assert all(endpoint.outstanding == 0 for endpoint in pool.endpoints)
+
+
+@pytest.mark.asyncio
+async def test_rejected_key_is_taken_out_of_rotation(stub_server):
+    def handler(request):
+        if request["headers"]["authorization"] == "Bearer revoked":
+            return 401, {}, b'{"error": {"message": "invalid key"}}'
+        return stub_server.default_handler(request)
+
+    stub_server.handler = handler
+    pool = EndpointPool([Endpoint(stub_server.base_url, "revoked"), Endpoint(stub_server.base_url, "valid")])
+    async with OpenAIClient(None, endpoints=pool) as client:
+        assert await client.complete_prompt("hi") == "echo: hi"
+        assert await client.complete_prompt("again") == "echo: again"
+    assert pool.endpoints[0].requests == 1 and pool.endpoints[0].breaker.state == OPEN
+
+    only_revoked = EndpointPool([Endpoint(stub_server.base_url, "revoked")])
+    async with OpenAIClient(None, endpoints=only_revoked) as client:
+        with pytest.raises(AuthenticationError):
+            await client.complete_prompt("hi")
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from http_transport import ConnectionPool, TransportError
+
+
+@pytest.mark.asyncio
+class TestConnectionPool:
+    async def test_keep_alive_reuses_connection(self, stub_server):
+        async with ConnectionPool() as pool:
+            for _ in range(5):
+                response = await pool.request("POST", stub_server.base_url + "/chat/completions", body=b"{}")
+                assert response.status == 200
+        assert stub_server.connections == 1
+        assert pool.stats.connections_created == 1
+        assert pool.stats.connections_reused == 4
+        assert pool.stats.requests == 5
+
+    async def test_per_host_limit_bounds_connections(self, stub_server):
+        async def slow(request):
+            await asyncio.sleep(0.02)
+            return 200, {}, b"ok"
+
+        stub_server.handler = slow
+        async with ConnectionPool(max_connections_per_host=2) as pool:
+            await asyncio.gather(*(pool.request("GET", stub_server.base_url) for _ in range(8)))
+            assert pool.idle_count() <= 2
+        assert stub_server.connections == 2
+
+    async def test_chunked_stream(self, stub_server):
+        stub_server.handler = lambda request: (200, {}, ["alpha", "beta", "gamma"])
+        async with ConnectionPool() as pool:
+            async with pool.stream("GET", stub_server.base_url) as response:
+                chunks = [chunk async for chunk in response.iter_chunks()]
+            assert chunks == [b"alpha", b"beta", b"gamma"]
+            assert pool.idle_count() == 1
+
+    async def test_server_close_is_not_reused(self, stub_server):
+        stub_server.handler = lambda request: (200, {"Connection": "close"}, b"bye")
+        async with ConnectionPool() as pool:
+            await pool.request("GET", stub_server.base_url)
+            await pool.request("GET", stub_server.base_url)
+            assert pool.stats.connections_reused == 0
+        assert stub_server.connections == 2
+
+    async def test_header_timeout_on_reused_connection_is_not_resent(self, stub_server):
+        async def stall(request):
+            if len(stub_server.requests) > 1:
+                await asyncio.sleep(0.5)
+            return 200, {}, b"ok"
+
+        stub_server.handler = stall
+        async with ConnectionPool() as pool:
+            await pool.request("POST", stub_server.base_url, body=b"{}")
+            with pytest.raises(TransportError, match="Timed out"):
+                await pool.request("POST", stub_server.base_url, body=b"{}", timeout=0.05)
+            assert pool.stats.connections_reused == 1
+        assert len(stub_server.requests) == 2
+
+    async def test_connection_refused(self):
+        async with ConnectionPool(connect_timeout=1.0) as pool:
+            with pytest.raises(TransportError):
+                await pool.request("GET", "http://127.0.0.1:9/")
+
+    async def test_closed_pool_rejects_requests(self, stub_server):
+        pool = ConnectionPool()
+        await pool.close()
+        with pytest.raises(TransportError):
+            await pool.request("GET", stub_server.base_url)
+
+    async def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            ConnectionPool(max_connections=0)
@@ -0,0 +1,148 @@
+from memory import BufferMemory
+from token_counter import TokenCounter
+
+
+def word_counter():
+    return TokenCounter(encode=lambda text: text.split())
+
+
+class TestBufferMemory:
+    def test_window_and_token_window(self):
+        buffer = BufferMemory(token_counter=word_counter())
+        for text in ["a", "b c", "d e f"]:
+            buffer.add_message(text)
+        assert buffer.get_window(2) == ["b c", "d e f"]
+        assert buffer.get_window(0) == []
+        assert buffer.get_token_window(5) == ["b c", "d e f"]
+        assert buffer.total_tokens == 6
+
+    def test_limits_evict_oldest(self):
+        buffer = BufferMemory(max_messages=3, max_tokens=4, token_counter=word_counter())
+        for text in ["a", "b", "c d", "e f g"]:
+            buffer.add_message(text)
+        assert buffer.messages == ["e f g"]
+        assert buffer.total_tokens == 3
+
+
+import asyncio
+
+import pytest
+
+from chatbot import Chatbot
+from context_window import ContextWindow
+from memory import SummaryMemory, make_summarizer
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are Miss Writer."
+
+
+class RecordingClient:
+    def __init__(self):
+        self.prompts = []
+
+    async def complete_prompt(self, prompt, **params):
+        self.prompts.append(prompt)
+        return f"draft {len(self.prompts)}"
+
+
+class FakeSummarizer:
+    def __init__(self, gate=None, fail=False):
+        self.calls = []
+        self.gate = gate
+        self.fail = fail
+
+    async def __call__(self, previous, messages):
+        self.calls.append((previous, [m["content"] for m in messages]))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("summarizer down")
+        return f"summary {len(self.calls)}"
+
+
+def make_bot(summarizer, keep_turns=1):
+    summary = SummaryMemory(summarizer, keep_turns=keep_turns)
+    bot = Chatbot(
+        RecordingClient(),
+        {"buffer": BufferMemory(), "summary": summary},
+        DummyTemplate(),
+        context_window=ContextWindow(token_counter=word_counter()),
+    )
+    return bot, summary
+
+
+@pytest.mark.asyncio
+class TestSummaryMemory:
+    async def test_only_latest_turn_stays_verbatim(self):
+        summarizer = FakeSummarizer()
+        bot, summary = make_bot(summarizer)
+        sizes = []
+        for turn in range(4):
+            await bot.send_message("Mr.Editor", f"critique {turn}")
+            await summary.wait()
+            sizes.append(len(bot.openai_client.prompts[-1]))
+        assert [m["content"] for m in bot.context] == ["critique 3", "draft 4"]
+        assert summary.summary == "summary 3" and summary.updates == 3
+        assert bot.context.summary["content"].endswith("summary 3")
+        assert summarizer.calls[1] == ("summary 1", ["critique 1", "draft 2"])
+        # system + (summary) + one verbatim turn + new message: constant from turn 2 on.
+        assert sizes == [2, 4, 5, 5]
+
+    async def test_summarization_is_off_the_critical_path(self):
+        gate = asyncio.Event()
+        summarizer = FakeSummarizer(gate)
+        bot, summary = make_bot(summarizer)
+        await bot.send_message("Mr.Editor", "critique 0")
+        await bot.send_message("Mr.Editor", "critique 1")
+        assert summary.pending
+        # Not summarized yet, so the older turn is still sent verbatim.
+        await bot.send_message("Mr.Editor", "critique 2")
+        contents = [m["content"] for m in bot.openai_client.prompts[-1]]
+        assert "critique 0" in contents and "draft 1" in contents
+        gate.set()
+        await summary.wait()
+        assert [m["content"] for m in bot.context] == ["critique 1", "draft 2", "critique 2", "draft 3"]
+        summary.update()
+        await summary.wait()
+        assert [m["content"] for m in bot.context] == ["critique 2", "draft 3"]
+
+    async def test_failed_summary_keeps_turns(self):
+        summarizer = FakeSummarizer(fail=True)
+        bot, summary = make_bot(summarizer)
+        await bot.send_message("Mr.Editor", "critique 0")
+        await bot.send_message("Mr.Editor", "critique 1")
+        await summary.wait()
+        assert isinstance(summary.last_error, RuntimeError)
+        assert len(bot.context) == 4 and summary.summary is None
+        summarizer.fail = False
+        summary.update()
+        await summary.wait()
+        assert summary.summary == "summary 2" and len(bot.context) == 2
+
+    async def test_budget_evictions_are_summarized(self):
+        summarizer = FakeSummarizer()
+        summary = SummaryMemory(summarizer, keep_turns=5)
+        window = ContextWindow(max_tokens=12, reserve_tokens=2, token_counter=word_counter())
+        summary.bind(window)
+        for i in range(3):
+            window.append("user", f"message number {i}")
+        window.build()
+        window.apply_trim()
+        summary.update()
+        await summary.wait()
+        assert summarizer.calls == [(None, ["message number 0", "message number 1"])]
+
+    async def test_make_summarizer(self):
+        class Client:
+            async def complete_prompt(self, prompt, **params):
+                self.prompt, self.params = prompt, params
+                return "merged"
+
+        client = Client()
+        summarize = make_summarizer(client, max_words=50)
+        assert await summarize("old", [{"role": "assistant", "content": "Draft"}]) == "merged"
+        assert "50 words" in client.prompt[0]["content"]
+        assert "old" in client.prompt[1]["content"] and "assistant: Draft" in client.prompt[1]["content"]
+        assert client.params["temperature"] == 0
@@ -0,0 +1,178 @@
+from metrics import Histogram
+
+
+class TestHistogram:
+    def test_observe_and_quantiles(self):
+        histogram = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.observe(value)
+        assert histogram.count == 5
+        assert histogram.mean == 16.5 / 5
+        assert histogram.quantile(0.5) == 2
+        assert histogram.quantile(1.0) == float("inf")
+        assert histogram.snapshot()["buckets"] == {"1": 1, "2": 3, "4": 4, "+Inf": 5}
+
+    def test_empty(self):
+        assert Histogram().quantile(0.99) == 0.0
+
+
+import asyncio
+import json
+
+import pytest
+
+from chatbot import Chatbot
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+from metrics import NULL_TRACER, JSONExporter, MetricsRegistry, PrometheusExporter, Tracer, prometheus_text
+from mock_server import MockOpenAIServer
+from openai_client import OpenAIClient
+from response_cache import ResponseCache
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.started = []
+        self.ended = []
+
+    def on_start(self, span):
+        self.started.append(span.name)
+
+    def on_end(self, span):
+        self.ended.append(span)
+
+
+class TestTracer:
+    def test_nested_spans_and_durations(self):
+        ticks = iter([0.0, 1.0, 3.0, 6.0])
+        exporter = RecordingExporter()
+        tracer = Tracer(exporters=[exporter], clock=lambda: next(ticks))
+        with tracer.span("outer", agent="writer") as outer:
+            with tracer.span("inner") as inner:
+                assert tracer.current() is inner
+            inner.set("tokens", 7)
+        assert tracer.current() is None
+        assert inner.parent is outer and inner.duration == 2.0 and outer.duration == 6.0
+        assert exporter.started == ["outer", "inner"]
+        assert [s.name for s in exporter.ended] == ["inner", "outer"]
+        assert inner.to_dict()["parent_id"] == outer.span_id
+        assert tracer.registry.histograms["span_duration_seconds"][(("span", "outer"),)].sum == 6.0
+
+    def test_errors_are_recorded(self):
+        tracer = Tracer()
+        with pytest.raises(KeyError):
+            with tracer.span("failing") as span:
+                raise KeyError("x")
+        assert span.error == "KeyError"
+
+    @pytest.mark.asyncio
+    async def test_child_tasks_inherit_parent(self):
+        tracer = Tracer()
+
+        async def child():
+            with tracer.span("child") as span:
+                await asyncio.sleep(0)
+                return span
+
+        with tracer.span("parent") as parent:
+            spans = await asyncio.gather(child(), child())
+        assert all(span.parent is parent for span in spans)
+
+    @pytest.mark.asyncio
+    async def test_span_closed_in_another_task(self):
+        tracer = Tracer()
+        span = tracer.span("handed-off").__enter__()
+
+        async def finish():
+            span.__exit__(None, None, None)
+            return tracer.current()
+
+        assert await asyncio.ensure_future(finish()) is None
+        assert tracer.current() is span
+        with tracer.span("next") as following:
+            assert following.parent is span
+        assert tracer.current() is span
+
+    def test_null_tracer_is_inert(self):
+        with NULL_TRACER.span("anything", a=1) as span:
+            span.set("k", "v")
+        NULL_TRACER.inc("x")
+        NULL_TRACER.observe("y", 1.0)
+        assert NULL_TRACER.span("a") is NULL_TRACER.span("b")
+
+
+class TestExporters:
+    def test_prometheus_text(self):
+        registry = MetricsRegistry(buckets=(0.1, 1))
+        registry.describe("requests_total", "Requests sent.")
+        registry.inc("requests_total", status=200)
+        registry.inc("requests_total", 2, status=200)
+        registry.observe("latency_seconds", 0.5, agent='Mr."Editor"')
+        registry.gauge("queue_depth", 4, priority="batch")
+        registry.gauge("queue_depth", 2, priority="batch")
+        text = prometheus_text(registry)
+        assert '# TYPE queue_depth gauge\nqueue_depth{priority="batch"} 2\n' in text
+        assert "# HELP requests_total Requests sent.\n# TYPE requests_total counter\n" in text
+        assert 'requests_total{status="200"} 3\n' in text
+        assert 'latency_seconds_bucket{agent="Mr.\\"Editor\\"",le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{agent="Mr.\\"Editor\\"",le="+Inf"} 1' in text
+        assert 'latency_seconds_count{agent="Mr.\\"Editor\\""} 1' in text
+
+    @pytest.mark.asyncio
+    async def test_prometheus_endpoint(self):
+        registry = MetricsRegistry()
+        registry.inc("turns_total")
+        exporter = PrometheusExporter(registry, port=0)
+        await exporter.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", exporter.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+        finally:
+            await exporter.stop()
+        assert response.startswith(b"HTTP/1.1 200 OK")
+        assert response.endswith(b"turns_total 1\n")
+
+    def test_json_exporter(self, tmp_path):
+        exporter = JSONExporter(str(tmp_path / "spans.jsonl"))
+        tracer = Tracer(exporters=[exporter])
+        with tracer.span("turn", agent="writer"):
+            pass
+        exporter.dump(tracer.registry, str(tmp_path / "metrics.json"))
+        exporter.close()
+        record = json.loads((tmp_path / "spans.jsonl").read_text())
+        assert record["name"] == "turn" and record["attributes"] == {"agent": "writer"}
+        metrics = json.loads((tmp_path / "metrics.json").read_text())
+        assert metrics["histograms"]["span_duration_seconds"][0]["count"] == 1
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are Mr.Editor."
+
+
+@pytest.mark.asyncio
+async def test_agent_stack_is_instrumented():
+    tracer = Tracer(exporters=[RecordingExporter()])
+    async with MockOpenAIServer(completion_tokens=8) as server:
+        async with OpenAIClient(
+            {"OPENAI_API_KEY": "test-key"}, base_url=server.base_url, cache=ResponseCache(), tracer=tracer
+        ) as client:
+            bot = Chatbot(client, {"buffer": BufferMemory()}, DummyTemplate(), name="Mr.Editor", tracer=tracer)
+            manager = ConversationManager([bot], tracer=tracer)
+            await manager.start_conversation("s1", "Miss Writer", "Review this")
+            await client.complete_prompt("cached?", temperature=0)
+            await client.complete_prompt("cached?", temperature=0)
+    ended = {}
+    for span in tracer.exporters[0].ended:
+        ended.setdefault(span.name, span)
+    assert ended["openai.complete"].parent is ended["chatbot.send_message"]
+    assert ended["chatbot.build_prompt"].parent is ended["chatbot.prepare"]
+    assert ended["chatbot.send_message"].parent is ended["conversation.turn"]
+    assert ended["openai.complete"].attributes["tokens"] > 0
+    counters = tracer.registry.counters
+    assert counters["openai_cache_lookups_total"] == {(("result", "miss"),): 1, (("result", "hit"),): 1}
+    assert counters["openai_requests_total"][(("status", "200"),)] == 2
+    assert "conversation_slot_wait_seconds" in tracer.registry.histograms
+    assert "openai_queue_wait_seconds" in tracer.registry.histograms
@@ -0,0 +1,70 @@
+import pytest
+
+from benchmark import BenchmarkReport, compare, percentile, run_benchmark
+from mock_server import MockOpenAIServer, fixed
+from openai_client import OpenAIClient, RateLimitError
+from rate_limiter import RetryPolicy
+
+CONFIG = {"OPENAI_API_KEY": "test-key"}
+
+
+@pytest.mark.asyncio
+async def test_completions_are_deterministic_and_stream():
+    async with MockOpenAIServer(completion_tokens=20, section_tokens=8) as server:
+        async with OpenAIClient(CONFIG, base_url=server.base_url) as client:
+            first = await client.complete_prompt("Write a post")
+            again = await client.complete_prompt("Write a post")
+            streamed = "".join([d async for d in client.stream_prompt("Write a post")])
+            other = await client.complete_prompt("Something else")
+    assert first == again == streamed
+    assert first != other
+    assert first.startswith("## Section 1") and "## Section 3" in first
+    assert server.stats.completions == 3 and server.stats.streams == 1
+    assert server.stats.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_fault_injection_and_retry():
+    async with MockOpenAIServer(rate_limit_rate=1.0, retry_after=0.01) as server:
+        async with OpenAIClient(CONFIG, base_url=server.base_url, retry_policy=RetryPolicy(max_retries=2)) as client:
+            with pytest.raises(RateLimitError):
+                await client.complete_prompt("hi")
+    assert server.stats.rate_limited == 3
+
+    async with MockOpenAIServer(rate_limit_rate=0.5, retry_after=0.001, seed=3) as server:
+        async with OpenAIClient(CONFIG, base_url=server.base_url, retry_policy=RetryPolicy(max_retries=20, base_delay=0.001)) as client:
+            for _ in range(5):
+                assert await client.complete_prompt("hi")
+    assert server.stats.rate_limited > 0
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_deterministic():
+    async with MockOpenAIServer(embedding_dim=8) as server:
+        async with OpenAIClient(CONFIG, base_url=server.base_url) as client:
+            a, b, a2 = await client.embed(["alpha", "beta", "alpha"])
+    assert len(a) == 8 and a == a2 and a != b
+
+
+@pytest.mark.asyncio
+async def test_benchmark_reports_latency_percentiles():
+    async with MockOpenAIServer(latency=fixed(0.001), completion_tokens=16) as server:
+        report = await run_benchmark(server.base_url, sessions=4, rounds=2, concurrency=4)
+    assert report.sessions == 4 and report.failed == 0
+    assert report.turns == 16
+    assert 0 < report.p50 <= report.p95 <= report.p99
+    assert report.turns_per_second > 0 and report.peak_memory_mb > 0
+
+
+def test_percentile_and_regression_check():
+    assert percentile([], 50) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 99) == 5
+    report = BenchmarkReport(
+        sessions=1, rounds=1, turns=2, failed=0, elapsed=1.0, p50=0.1, p95=0.2, p99=0.3, mean=0.1,
+        turns_per_second=10.0, sessions_per_minute=60.0, peak_memory_mb=5.0,
+    )
+    baseline = dict(report.to_dict(), p95=0.1, turns_per_second=20.0)
+    regressions = compare(report, baseline)
+    assert [line.split(":")[0] for line in regressions] == ["p95", "turns_per_second"]
+    assert compare(report, report.to_dict()) == []
@@ -1,8 +1,19 @@
+import json
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, patch, MagicMock
 
-from openai_client import OpenAIClient
+from openai_client import (
+    APIConnectionError,
+    AuthenticationError,
+    OpenAIClient,
+    OpenAIError,
+    RateLimitError,
+)
+from http_transport import ConnectionPool
+from rate_limiter import RateLimiter, RetryPolicy, estimate_tokens
+from response_cache import ResponseCache
 from config_manager import ConfigManager
 from unittest.mock import AsyncMock, patch, MagicMock
 
@@ -87,4 +98,184 @@ class TestOpenAIClient:
             result = "Fallback response"
         else:
             result = "Should not reach here"
-        assert result == "Fallback response"
\ No newline at end of file
+        assert result == "Fallback response"
+
+@pytest.mark.asyncio
+class TestOpenAIClientTransport:
+    @pytest.fixture
+    def config_manager(self):
+        cm = ConfigManager()
+        cm.get = MagicMock(return_value="test-key")
+        return cm
+
+    async def test_complete_prompt_against_stub_server(self, config_manager, stub_server):
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            result = await client.complete_prompt("Say hello")
+        assert result == "echo: Say hello"
+        request = stub_server.requests[-1]
+        assert request["path"] == "/v1/chat/completions"
+        assert request["headers"]["authorization"] == "Bearer test-key"
+
+    async def test_message_list_and_params(self, config_manager, stub_server):
+        messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            result = await client.complete_prompt(messages, temperature=0.2)
+        assert result == "echo: sys | hi"
+        payload = json.loads(stub_server.requests[-1]["body"])
+        assert payload["model"] == "gpt-4"
+        assert payload["temperature"] == 0.2
+
+    async def test_shared_pool_reuses_connections(self, config_manager, stub_server):
+        async with ConnectionPool() as pool:
+            clients = [OpenAIClient(config_manager, base_url=stub_server.base_url, pool=pool) for _ in range(3)]
+            for client in clients:
+                await client.complete_prompt("turn")
+                await client.close()
+            assert not pool.closed
+            assert pool.stats.connections_created == 1
+            assert clients[0].stats.connections_reused == 2
+
+    @pytest.mark.parametrize(
+        "status, error",
+        [(429, RateLimitError), (401, AuthenticationError), (500, OpenAIError)],
+    )
+    async def test_error_statuses(self, config_manager, stub_server, status, error):
+        body = json.dumps({"error": {"message": "nope"}}).encode()
+        stub_server.handler = lambda request: (status, {}, body)
+        async with OpenAIClient(
+            config_manager, base_url=stub_server.base_url, retry_policy=RetryPolicy(max_retries=0)
+        ) as client:
+            with pytest.raises(error, match="nope"):
+                await client.complete_prompt("Test")
+
+    async def test_malformed_body_returns_none(self, config_manager, stub_server):
+        stub_server.handler = lambda request: (200, {}, b"not json")
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            assert await client.complete_prompt("Test") is None
+
+    async def test_unreachable_host(self, config_manager):
+        async with OpenAIClient(
+            config_manager, base_url="http://127.0.0.1:9/v1", retry_policy=RetryPolicy(max_retries=0)
+        ) as client:
+            with pytest.raises(APIConnectionError):
+                await client.complete_prompt("Test")
+
+    async def test_retries_rate_limit_then_succeeds(self, config_manager, stub_server):
+        responses = iter([429, 503, 200])
+
+        def handler(request):
+            status = next(responses)
+            if status != 200:
+                return status, {"retry-after": "0.01"}, b"{}"
+            return stub_server.default_handler(request)
+
+        stub_server.handler = handler
+        policy = RetryPolicy(max_retries=3, base_delay=0.001)
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url, retry_policy=policy) as client:
+            assert await client.complete_prompt("again") == "echo: again"
+            assert client.rate_limiter.stats.throttled == 1
+        assert len(stub_server.requests) == 3
+
+    async def test_retry_charges_token_budget_once(self, config_manager, stub_server):
+        responses = iter([429, 200])
+
+        def handler(request):
+            if next(responses) == 429:
+                return 429, {"retry-after": "0.05"}, b"{}"
+            return stub_server.default_handler(request)
+
+        stub_server.handler = handler
+        limiter = RateLimiter(tokens_per_minute=100000)
+        # A long policy delay would dominate if it were slept on top of the retry-after pause.
+        policy = RetryPolicy(max_retries=1, base_delay=30.0, max_delay=30.0)
+        estimate = estimate_tokens([{"role": "user", "content": "again"}], 5000)
+        async with OpenAIClient(
+            config_manager, base_url=stub_server.base_url, retry_policy=policy, rate_limiter=limiter
+        ) as client:
+            started = time.perf_counter()
+            assert await client.complete_prompt("again", max_tokens=5000) == "echo: again"
+            assert time.perf_counter() - started < 5.0
+        assert 100000 - estimate <= limiter.tokens.tokens < 100000 - estimate + 1000
+
+    async def test_retries_exhausted(self, config_manager, stub_server):
+        stub_server.handler = lambda request: (429, {}, b"{}")
+        policy = RetryPolicy(max_retries=2, base_delay=0.001)
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url, retry_policy=policy) as client:
+            with pytest.raises(RateLimitError):
+                await client.complete_prompt("Test")
+        assert len(stub_server.requests) == 3
+
+    async def test_budgets_learned_from_headers(self, config_manager, stub_server):
+        def handler(request):
+            status, headers, body = stub_server.default_handler(request)
+            headers.update({
+                "x-ratelimit-limit-requests": "500",
+                "x-ratelimit-remaining-requests": "499",
+                "x-ratelimit-limit-tokens": "30000",
+                "x-ratelimit-remaining-tokens": "29000",
+            })
+            return status, headers, body
+
+        stub_server.handler = handler
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            await client.complete_prompt("learn")
+            assert client.rate_limiter.requests.capacity == 500
+            assert client.rate_limiter.tokens.capacity == 30000
+            assert client.rate_limiter.tokens.tokens <= 29000
+
+    async def test_stream_prompt_yields_deltas(self, config_manager, stub_server):
+        def sse(request):
+            events = [{"choices": [{"delta": {"role": "assistant"}}]}]
+            events += [{"choices": [{"delta": {"content": part}}]} for part in ["Hel", "lo", " world"]]
+            chunks = [f"data: {json.dumps(event)}\n\n" for event in events]
+            # Split one event across two network chunks to exercise line buffering.
+            chunks[2:3] = [chunks[2][:10], chunks[2][10:]]
+            return 200, {"Content-Type": "text/event-stream"}, chunks + ["data: [DONE]\n\n"]
+
+        stub_server.handler = sse
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            deltas = [delta async for delta in client.stream_prompt("Stream")]
+            assert deltas == ["Hel", "lo", " world"]
+            assert json.loads(stub_server.requests[-1]["body"])["stream"] is True
+            await client.complete_prompt("reuse")
+            assert client.stats.connections_reused == 1
+
+    async def test_stream_prompt_retries_before_first_delta(self, config_manager, stub_server):
+        responses = iter([(429, {}, b"{}"), (200, {}, ['data: {"choices": [{"delta": {"content": "ok"}}]}\n\n'])])
+        stub_server.handler = lambda request: next(responses)
+        policy = RetryPolicy(max_retries=1, base_delay=0.001)
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url, retry_policy=policy) as client:
+            assert [delta async for delta in client.stream_prompt("x")] == ["ok"]
+
+    async def test_cache_serves_deterministic_replays(self, config_manager, stub_server):
+        cache = ResponseCache()
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url, cache=cache) as client:
+            first = await client.complete_prompt("same", temperature=0)
+            second = await client.complete_prompt("same", temperature=0)
+            streamed = [delta async for delta in client.stream_prompt("same", temperature=0)]
+            await client.complete_prompt("same", temperature=0.9)
+        assert first == second == "echo: same"
+        assert streamed == ["echo: same"]
+        assert len(stub_server.requests) == 2
+        assert cache.stats.hits == 2
+        assert cache.stats.bypassed == 1
+
+    async def test_empty_stream_is_not_cached(self, config_manager, stub_server):
+        stub_server.handler = lambda request: (200, {}, ['data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'])
+        cache = ResponseCache()
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url, cache=cache) as client:
+            assert [delta async for delta in client.stream_prompt("same", temperature=0)] == []
+            assert [delta async for delta in client.stream_prompt("same", temperature=0)] == []
+        assert len(stub_server.requests) == 2
+        assert len(cache) == 0 and cache.stats.hits == 0
+
+    async def test_embed_batch(self, config_manager, stub_server):
+        def handler(request):
+            texts = json.loads(request["body"])["input"]
+            data = [{"index": i, "embedding": [float(len(t))]} for i, t in enumerate(texts)]
+            return 200, {}, json.dumps({"data": list(reversed(data))}).encode()
+
+        stub_server.handler = handler
+        async with OpenAIClient(config_manager, base_url=stub_server.base_url) as client:
+            assert await client.embed(["a", "bbb"]) == [[1.0], [3.0]]
+        assert stub_server.requests[-1]["path"] == "/v1/embeddings"
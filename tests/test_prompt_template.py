@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from prompt_template import PromptTemplate, PromptTemplateError
+from token_counter import TokenCounter
+
+
+class CountingCounter(TokenCounter):
+    def __init__(self):
+        super().__init__(encode=lambda text: text.split())
+        self.texts = []
+
+    def count(self, text):
+        self.texts.append(text)
+        return super().count(text)
+
+
+class TestPromptTemplate:
+    def test_render_matches_str_format(self):
+        source = "Hello, {user}! You are {role:>8} ({user!r})."
+        template = PromptTemplate(source)
+        assert template.render(user="ann", role="editor", extra=1) == source.format(user="ann", role="editor")
+        assert template.fields == ("user", "role")
+        assert template.format(user="b", role="c") == source.format(user="b", role="c")
+
+    def test_static_template_is_constant(self):
+        template = PromptTemplate("Your name is Mr.Editor. {{not a slot}}")
+        first = template.render(user="x")
+        assert first == "Your name is Mr.Editor. {not a slot}"
+        assert template.render() is first
+
+    def test_static_tokens_counted_once(self):
+        counter = CountingCounter()
+        template = PromptTemplate("static words here {user} and more static", token_counter=counter)
+        for name in ("a", "bb", "c c"):
+            assert template.count_tokens(user=name) == 6 + len(name.split())
+        assert counter.texts.count(template.static_text) == 1
+
+    def test_missing_value(self):
+        with pytest.raises(KeyError):
+            PromptTemplate("{user}").render()
+
+    @pytest.mark.parametrize("source", ["{}", "{0}", "{user.name}", "{user[0]}", "{user", "oops }", "{a:{b}}"])
+    def test_invalid_placeholders_rejected_at_load(self, source):
+        with pytest.raises(PromptTemplateError):
+            PromptTemplate(source)
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / "prompt.txt"
+        path.write_text("Hi {user}", encoding="utf-8")
+        template = PromptTemplate.from_file(str(path))
+        assert template.name == str(path)
+        assert template.render(user="z") == "Hi z"
+
+    @pytest.mark.parametrize("path", ["chatbot6.txt", "chatbot7.txt"])
+    def test_bundled_prompts_compile(self, path):
+        template = PromptTemplate.from_file(os.path.join(os.path.dirname(__file__), "..", path))
+        assert template.fields == ()
+        assert template.static_tokens > 0
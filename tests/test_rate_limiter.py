@@ -0,0 +1,109 @@
+import asyncio
+import random
+
+import pytest
+
+from rate_limiter import RateLimiter, RetryPolicy, TokenBucket, estimate_tokens, parse_reset
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+class TestHelpers:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m3s", 3723.0), ("0.5", 0.5)],
+    )
+    def test_parse_reset(self, value, expected):
+        assert parse_reset(value) == pytest.approx(expected)
+
+    def test_parse_reset_invalid(self):
+        assert parse_reset("soon") is None
+
+    def test_estimate_tokens_includes_reservation(self):
+        messages = [{"role": "user", "content": "x" * 400}]
+        assert estimate_tokens(messages, max_tokens=100) == 100 + 4 + 100
+
+    def test_bucket_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+        bucket.consume(60)
+        assert bucket.wait_time(1) == pytest.approx(1.0)
+        clock.now += 30
+        assert bucket.wait_time(30) == 0
+
+    def test_unlimited_bucket(self):
+        assert TokenBucket(None).wait_time(10 ** 9) == 0
+
+    def test_full_jitter_bounds(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=8.0, rng=random.Random(7))
+        delays = [policy.delay(attempt) for attempt in range(10)]
+        assert all(0 <= d <= 8.0 for d in delays)
+        assert policy.delay(0, retry_after=5.0) >= 5.0
+
+
+@pytest.mark.asyncio
+class TestRateLimiter:
+    async def test_requests_per_minute_enforced(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            await limiter.acquire()
+        assert clock.now == 0
+        await limiter.acquire()
+        assert clock.now == pytest.approx(1.0)
+        assert limiter.stats.delayed == 1
+
+    async def test_tokens_per_minute_enforced(self):
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+        await limiter.acquire(600)
+        await limiter.acquire(300)
+        assert clock.now == pytest.approx(30.0)
+
+    async def test_callers_admitted_in_arrival_order(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=1, clock=clock, sleep=clock.sleep)
+        order = []
+
+        async def caller(i):
+            await limiter.acquire()
+            order.append(i)
+
+        await asyncio.gather(*(caller(i) for i in range(5)))
+        assert order == [0, 1, 2, 3, 4]
+
+    async def test_reconcile_refunds_unused_tokens(self):
+        clock = FakeClock()
+        limiter = RateLimiter(tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+        await limiter.acquire(800)
+        limiter.reconcile(800, 100)
+        assert limiter.tokens.tokens == pytest.approx(900)
+
+    async def test_headers_adapt_budget_and_pause(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        limiter.update_from_headers({
+            "x-ratelimit-limit-requests": "120",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        })
+        assert limiter.requests.capacity == 120
+        await limiter.acquire()
+        assert clock.now >= 0.5
+
+    async def test_retry_after_pauses_all_callers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+        limiter.update_from_headers({"retry-after": "3"})
+        await limiter.acquire()
+        assert clock.now == pytest.approx(3.0)
@@ -0,0 +1,78 @@
+import pytest
+
+from response_cache import ResponseCache, cache_key
+
+
+def payload(content="Hi", **params):
+    body = {"model": "gpt-4", "messages": [{"role": "system", "content": "sys"}, {"role": "user", "content": content}]}
+    body.update(params)
+    return body
+
+
+class TestCacheKey:
+    def test_key_ignores_order_and_transport_fields(self):
+        a = {"model": "gpt-4", "temperature": 0, "messages": []}
+        b = {"messages": [], "temperature": 0, "model": "gpt-4", "stream": True}
+        assert cache_key(a) == cache_key(b)
+
+    def test_key_depends_on_sampling_params(self):
+        assert cache_key(payload(temperature=0)) != cache_key(payload(temperature=0.5))
+
+
+class TestResponseCache:
+    def test_hit_and_miss(self):
+        cache = ResponseCache()
+        assert cache.lookup(payload(temperature=0)) is None
+        cache.store(payload(temperature=0), "answer")
+        assert cache.lookup(payload(temperature=0)) == "answer"
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.stats.hit_rate == 0.5
+
+    def test_bypass_for_sampling_temperature(self):
+        cache = ResponseCache()
+        cache.store(payload(temperature=0.9), "random")
+        assert cache.lookup(payload(temperature=0.9)) is None
+        assert cache.lookup(payload()) is None
+        assert cache.stats.bypassed == 2
+        assert len(cache) == 0
+
+    def test_seeded_requests_are_cacheable(self):
+        cache = ResponseCache()
+        cache.store(payload(temperature=0.9, seed=7), "seeded")
+        assert cache.lookup(payload(temperature=0.9, seed=7)) == "seeded"
+        assert not ResponseCache(cache_seeded=False).is_cacheable(payload(temperature=0.9, seed=7))
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats.evictions == 1
+
+    def test_eviction_by_bytes(self):
+        cache = ResponseCache(max_bytes=10)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+        assert len(cache) == 1
+        assert cache.bytes == 6
+        cache.put("c", "z" * 11)
+        assert cache.get("c") is None
+
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = ResponseCache(path=path)
+        cache.store(payload(temperature=0), "durable")
+        cache.close()
+        reopened = ResponseCache(path=path)
+        assert reopened.lookup(payload(temperature=0)) == "durable"
+        assert reopened.stats.disk_hits == 1
+        assert reopened.lookup(payload(temperature=0)) == "durable"
+        assert reopened.stats.disk_hits == 1
+        reopened.close()
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError):
+            ResponseCache(max_entries=0)
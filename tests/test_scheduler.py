@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from benchmark import percentile
+from chatbot import Chatbot
+from memory import BufferMemory
+from metrics import Tracer
+from scheduler import DeadlineExceeded, PriorityClass, RequestScheduler
+
+
+class SlowClient:
+    """Records the order and parameters of calls; every call takes ``delay`` seconds."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+
+    async def complete_prompt(self, prompt, **params):
+        self.calls.append((prompt, params))
+        await asyncio.sleep(self.delay)
+        return f"done: {prompt}"
+
+    async def stream_prompt(self, prompt, **params):
+        self.calls.append((prompt, params))
+        for part in ("a", "b"):
+            await asyncio.sleep(self.delay / 2)
+            yield part
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are a helpful agent."
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_class_goes_first():
+    client = SlowClient()
+    scheduler = RequestScheduler(client, max_in_flight=1)
+    first = asyncio.ensure_future(scheduler.complete_prompt("b0", priority="batch"))
+    await settle()
+    queued = [asyncio.ensure_future(scheduler.complete_prompt(f"b{i}", priority="batch")) for i in (1, 2)]
+    queued.append(asyncio.ensure_future(scheduler.complete_prompt("i0", priority="interactive")))
+    await settle()
+    assert scheduler.depths() == {"interactive": 1, "default": 0, "batch": 2}
+    assert scheduler.running()["batch"] == 1
+    await asyncio.gather(first, *queued)
+    assert [prompt for prompt, _ in client.calls] == ["b0", "i0", "b1", "b2"]
+    assert scheduler.in_flight == 0 and scheduler.stats.dispatched == 4
+
+
+@pytest.mark.asyncio
+async def test_tenants_share_a_class_fairly():
+    client = SlowClient(delay=0.005)
+    scheduler = RequestScheduler(client, max_in_flight=1, tenant_weights={"big": 1.0, "small": 1.0})
+    blocker = asyncio.ensure_future(scheduler.complete_prompt("x", tenant="other"))
+    await settle()
+    tasks = [asyncio.ensure_future(scheduler.complete_prompt(f"big{i}", tenant="big")) for i in range(4)]
+    tasks += [asyncio.ensure_future(scheduler.complete_prompt(f"small{i}", tenant="small")) for i in range(2)]
+    await settle()
+    assert scheduler.tenant_depths("default") == {"big": 4, "small": 2}
+    await asyncio.gather(blocker, *tasks)
+    order = [prompt for prompt, _ in client.calls[1:]]
+    assert order == ["big0", "small0", "big1", "small1", "big2", "big3"]
+
+
+@pytest.mark.asyncio
+async def test_expired_request_is_dropped():
+    tracer = Tracer()
+    scheduler = RequestScheduler(SlowClient(delay=0.1), max_in_flight=1, tracer=tracer)
+    busy = asyncio.ensure_future(scheduler.complete_prompt("long"))
+    await settle()
+    with pytest.raises(DeadlineExceeded):
+        await scheduler.complete_prompt("short", timeout=0.01)
+    assert scheduler.depths()["default"] == 0 and scheduler.stats.dropped == 1
+    assert tracer.registry.counters["scheduler_dropped_total"] == {(("priority", "default"), ("reason", "expired")): 1}
+    assert tracer.registry.gauges["scheduler_queue_depth"][(("priority", "default"),)] == 0
+    await busy
+
+
+@pytest.mark.asyncio
+async def test_late_request_is_degraded_or_dropped():
+    classes = [
+        PriorityClass("interactive", 0, late="degrade", degrade={"max_tokens": 16}),
+        PriorityClass("batch", 1),
+    ]
+    client = SlowClient(delay=0.05)
+    scheduler = RequestScheduler(client, max_in_flight=2, classes=classes, default_priority="batch")
+    # Teach both classes that a request takes about 50ms.
+    await asyncio.gather(scheduler.complete_prompt("warm", priority="interactive"), scheduler.complete_prompt("warm"))
+    assert await scheduler.complete_prompt("quick", priority="interactive", timeout=0.01) == "done: quick"
+    assert client.calls[-1][1] == {"max_tokens": 16}
+    with pytest.raises(DeadlineExceeded):
+        await scheduler.complete_prompt("hopeless", timeout=0.01)
+    assert scheduler.stats.degraded == 1 and scheduler.stats.dropped == 1
+    assert await scheduler.complete_prompt("patient", priority="interactive", timeout=10) == "done: patient"
+    assert client.calls[-1][1] == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    scheduler = RequestScheduler(SlowClient(delay=0.05), max_in_flight=1)
+    busy = asyncio.ensure_future(scheduler.complete_prompt("busy"))
+    await settle()
+    waiter = asyncio.ensure_future(scheduler.complete_prompt("waiting"))
+    await settle()
+    waiter.cancel()
+    await settle()
+    assert scheduler.depths()["default"] == 0
+    await busy
+    assert scheduler.in_flight == 0 and scheduler.stats.dispatched == 1
+
+
+@pytest.mark.asyncio
+async def test_streams_hold_a_slot_until_done():
+    scheduler = RequestScheduler(SlowClient(), max_in_flight=1)
+    view = scheduler.for_tenant("acme", "interactive")
+    parts = []
+    async for part in view.stream_prompt("hi"):
+        parts.append(part)
+        assert scheduler.running()["interactive"] == 1
+    assert parts == ["a", "b"] and scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_latency_is_stable_under_batch_load():
+    client = SlowClient(delay=0.02)
+    scheduler = RequestScheduler(client, max_in_flight=4)
+    batch = [
+        asyncio.ensure_future(scheduler.complete_prompt(f"bulk{i}", priority="batch", tenant="nightly"))
+        for i in range(60)
+    ]
+    chatbot = Chatbot(scheduler.for_tenant("alice", "interactive"), {"buffer": BufferMemory()}, DummyTemplate())
+    latencies = []
+    for i in range(10):
+        started = asyncio.get_running_loop().time()
+        await chatbot.send_message("alice", f"question {i}")
+        latencies.append(asyncio.get_running_loop().time() - started)
+    assert scheduler.depths()["batch"] > 0  # the batch run was still queued throughout
+    # Batch may hold only 3 of 4 slots, so interactive turns never queue behind it.
+    assert percentile(latencies, 95) < 2 * client.delay + 0.02
+    await asyncio.gather(*batch)
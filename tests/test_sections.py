@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from conversation_manager import ConversationManager
+from sections import PipelineConfig, SectionSplitter, section_title
+
+POST = (
+    "Response: Thanks for the notes.\n\n"
+    "# Prompt Engineering Research\n"
+    "Intro paragraph.\n"
+    "## Research\n"
+    "Searching ArXiv.\n"
+    "### Picking papers\n"
+    "Details.\n"
+    "```\n## not a heading\n```\n"
+    "## Testing\n"
+    "The water jug benchmark."
+)
+
+
+def split_streamed(text, chunk, level=2):
+    splitter = SectionSplitter(level)
+    sections = []
+    for i in range(0, len(text), chunk):
+        sections.extend(splitter.feed(text[i:i + chunk]))
+    last = splitter.flush()
+    return sections + ([last] if last else [])
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, len(POST)])
+def test_splitter_is_independent_of_chunking(chunk):
+    sections = split_streamed(POST, chunk)
+    assert [section_title(s) for s in sections] == [
+        "Response: Thanks for the notes.",
+        "Prompt Engineering Research",
+        "Research",
+        "Testing",
+    ]
+    assert "### Picking papers" in sections[2]
+    assert "## not a heading" in sections[2]
+
+
+def test_splitter_level_one_and_sections_complete_early():
+    assert len(split_streamed(POST, 5, level=1)) == 2
+    splitter = SectionSplitter()
+    assert splitter.feed("## A\nalpha\n") == []
+    assert splitter.feed("## B\n") == ["## A\nalpha"]
+    assert splitter.flush() == "## B"
+    with pytest.raises(ValueError):
+        SectionSplitter(0)
+
+
+class Writer:
+    name = "Miss Writer"
+
+    def __init__(self, text, delay):
+        self.text = text
+        self.delay = delay
+
+    async def send_message_stream(self, user, message):
+        for line in self.text.splitlines(keepends=True):
+            await asyncio.sleep(self.delay)
+            yield line
+
+
+class Editor:
+    name = "Mr.Editor"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.started = []
+        self.accepted = []
+
+    async def draft(self, user, message):
+        self.started.append(asyncio.get_running_loop().time())
+        await asyncio.sleep(self.delay)
+        return "ok: " + message.splitlines()[-1]
+
+    async def accept(self, user, message, response):
+        self.accepted.append((user, message, response))
+
+
+@pytest.mark.asyncio
+async def test_editor_overlaps_writer_and_critiques_are_merged():
+    text = "## One\nfirst\n## Two\nsecond\n## Three\nthird\n"
+    writer, editor = Writer(text, 0.02), Editor(0.05)
+    manager = ConversationManager([writer, editor], pipeline=PipelineConfig())
+    loop_start = asyncio.get_running_loop().time()
+    turns = await manager.start_conversation("s1", "user", "Write the post")
+    total = asyncio.get_running_loop().time() - loop_start
+
+    assert turns[0] == ("Miss Writer", text)
+    assert turns[1][1] == "Section 1 (One):\nok: first\n\nSection 2 (Two):\nok: second\n\nSection 3 (Three):\nok: third"
+    assert editor.accepted == [("Miss Writer", text, turns[1][1])]
+    # The first critique starts while the writer is still streaming.
+    assert editor.started[0] - loop_start < 6 * 0.02
+    # Serial would be 6 * 0.02 + 3 * 0.05; the pipeline only pays for the last section.
+    assert total < 6 * 0.02 + 3 * 0.05
+    assert [entry[2] for entry in manager.get_log()] == ["Write the post", text]
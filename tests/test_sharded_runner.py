@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from chatbot import Chatbot
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+from metrics import Tracer
+from sharded_runner import ShardedRunner, shard_for
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires the fork start method")
+
+
+class Template:
+    def __init__(self, text):
+        self.text = text
+
+    def format(self, **kwargs):
+        return self.text
+
+
+class EchoClient:
+    """Deterministic client; optionally kills its process on the first call for ``crash_session``."""
+
+    def __init__(self, crash_marker=None):
+        self.crash_marker = crash_marker
+
+    async def complete_prompt(self, prompt, **params):
+        content = prompt[-1]["content"]
+        if self.crash_marker and "crash me" in content and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, "w").close()
+            os._exit(1)
+        return f"{os.getpid()}: {content[:30]}"
+
+
+def make_factory(crash_marker=None):
+    def factory(assets):
+        client = EchoClient(crash_marker)
+
+        def chatbots():
+            return [
+                Chatbot(client, {"buffer": BufferMemory()}, Template(assets["writer"]), name="Miss Writer"),
+                Chatbot(client, {"buffer": BufferMemory()}, Template(assets["editor"]), name="Mr.Editor"),
+            ]
+
+        return ConversationManager([], chatbot_factory=chatbots, tracer=Tracer())
+
+    return factory
+
+
+ASSETS = {"writer": "You are Miss Writer.", "editor": "You are Mr.Editor."}
+
+
+def test_shard_for_is_stable():
+    assert shard_for("session-1", 4) == shard_for("session-1", 4)
+    shards = {shard_for(f"session-{i}", 4) for i in range(100)}
+    assert shards == {0, 1, 2, 3}
+
+
+def test_sessions_run_across_workers_and_metrics_are_merged():
+    runner = ShardedRunner(make_factory(), workers=3, assets=ASSETS)
+    report = runner.run([(f"s{i}", "Mr.Editor", f"topic {i}") for i in range(12)], rounds=2)
+    assert report.sessions == 12 and report.failed == 0
+    assert report.turns == 12 * 4
+    assert len(report.per_worker) > 1
+    for i in range(12):
+        outcome = runner.results[f"s{i}"]
+        assert [speaker for speaker, _ in outcome.turns] == ["Miss Writer", "Mr.Editor"] * 2
+        assert outcome.worker == shard_for(f"s{i}", 3)
+    # Each worker recorded its own turn spans; the parent sees the total.
+    turn_spans = [h for key, h in runner.registry.histograms["span_duration_seconds"].items()
+                  if dict(key).get("span") == "conversation.turn"]
+    assert sum(h.count for h in turn_spans) == 48
+    assert len(runner.log) == 48
+
+
+def test_sessions_of_a_dead_worker_are_reassigned(tmp_path):
+    marker = str(tmp_path / "crashed")
+    runner = ShardedRunner(make_factory(marker), workers=2, assets=ASSETS, poll_interval=0.02)
+    sessions = [(f"s{i}", "Mr.Editor", "crash me" if i == 3 else f"topic {i}") for i in range(6)]
+    report = runner.run(sessions)
+    assert os.path.exists(marker)
+    assert report.failed == 0 and report.sessions == 6
+    assert report.reassigned >= 1
+    assert len(runner.results["s3"].turns) == 2
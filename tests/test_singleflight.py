@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from mock_server import MockOpenAIServer, fixed
+from openai_client import OpenAIClient
+from singleflight import SingleFlight
+
+CONFIG = {"OPENAI_API_KEY": "test-key"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "shared"
+
+    results = await asyncio.gather(*(flights.do("k", call) for _ in range(5)))
+    assert results == ["shared"] * 5 and len(calls) == 1
+    assert flights.stats.leaders == 1 and flights.stats.coalesced == 4
+    assert len(flights) == 0
+    assert await flights.do("k", call) == "shared" and len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_and_cancellation():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("down")
+
+    results = await asyncio.gather(*(flights.do("k", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("s", slow))
+    second = asyncio.ensure_future(flights.do("s", slow))
+    await started.wait()
+    first.cancel()
+    assert await second == "done"
+
+    lonely = asyncio.ensure_future(flights.do("c", slow))
+    await asyncio.sleep(0)
+    flight_task = flights._flights["c"].task
+    lonely.cancel()
+    await asyncio.sleep(0.01)
+    assert flight_task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_stream_fans_out_and_replays_for_late_joiners():
+    flights = SingleFlight()
+    opened = []
+    release = asyncio.Event()
+
+    async def upstream():
+        opened.append(1)
+        yield "a"
+        await release.wait()
+        yield "b"
+        yield "c"
+
+    async def consume():
+        return [part async for part in flights.stream("k", upstream)]
+
+    early = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+    late = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await early == await late == ["a", "b", "c"]
+    assert len(opened) == 1 and flights.stats.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_client_coalesces_deterministic_requests_only():
+    async with MockOpenAIServer(latency=fixed(0.02), completion_tokens=16) as server:
+        async with OpenAIClient(CONFIG, base_url=server.base_url, singleflight=SingleFlight()) as client:
+            prompt = "Hello Mr.Editor. I am Miss Writer."
+            replies = await asyncio.gather(*(client.complete_prompt(prompt, temperature=0) for _ in range(8)))
+            assert len(set(replies)) == 1 and server.stats.completions == 1
+
+            streams = await asyncio.gather(*(
+                _collect(client.stream_prompt(prompt, temperature=0)) for _ in range(4)
+            ))
+            assert all(stream == replies[0] for stream in streams) and server.stats.streams == 1
+
+            await asyncio.gather(*(client.complete_prompt(prompt, temperature=0.9) for _ in range(3)))
+            assert server.stats.completions == 4
+        assert client.singleflight.stats.coalesced == 10
+        assert client.singleflight.stats.bypassed == 3
+
+
+async def _collect(deltas):
+    return "".join([delta async for delta in deltas])
+
+
+@pytest.mark.asyncio
+async def test_caller_joining_after_last_waiter_cancelled_starts_fresh():
+    flights = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    assert await flights.do("k", slow) == "done" and len(calls) == 2
+
+    async def upstream():
+        calls.append(1)
+        yield "a"
+        await asyncio.sleep(0.01)
+        yield "b"
+
+    stream = flights.stream("s", upstream)
+    assert await stream.__anext__() == "a"
+    await stream.aclose()
+    assert [part async for part in flights.stream("s", upstream)] == ["a", "b"]
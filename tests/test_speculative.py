@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from chatbot import Chatbot
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+from speculative import SpeculationConfig, make_editor_scorer, speculate, structure_scorer
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return f"You are Miss Writer talking to {kwargs.get('user')}."
+
+
+class DraftClient:
+    """Replies depend on temperature; hot drafts are slow so they can be cancelled."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = []
+        self.cancelled = 0
+
+    async def complete_prompt(self, prompt, **params):
+        temperature = params.get("temperature")
+        self.calls.append(params)
+        try:
+            await asyncio.sleep(self.delays.get(temperature, 0))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"draft@{temperature}"
+
+
+def length_scorer(text):
+    # Higher temperature -> higher score in these tests.
+    return float(text.split("@")[1])
+
+
+def make_writer(client):
+    return Chatbot(client, {"buffer": BufferMemory()}, DummyTemplate(), name="Miss Writer")
+
+
+@pytest.mark.asyncio
+async def test_speculate_picks_best_and_commits_once():
+    client = DraftClient()
+    writer = make_writer(client)
+    config = SpeculationConfig(n=3, temperatures=(0.2, 0.9, 0.5), scorer=length_scorer)
+    result = await speculate(writer, "Mr.Editor", "Start the post", config)
+    assert result.response == "draft@0.9"
+    assert sorted(result.scores) == [0.2, 0.5, 0.9]
+    assert [c["temperature"] for c in client.calls] == [0.2, 0.9, 0.5]
+    assert writer.history == [("Mr.Editor", "Start the post", "draft@0.9")]
+    assert len(writer.context) == 2
+
+
+@pytest.mark.asyncio
+async def test_losers_cancelled_once_accept_score_reached():
+    client = DraftClient(delays={0.9: 5.0, 1.1: 5.0})
+    writer = make_writer(client)
+    config = SpeculationConfig(n=3, temperatures=(0.7, 0.9, 1.1), scorer=length_scorer, accept_score=0.5)
+    result = await asyncio.wait_for(speculate(writer, "Mr.Editor", "Go", config), timeout=2)
+    assert result.response == "draft@0.7"
+    assert result.cancelled == 2
+    assert client.cancelled == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_drafts_are_skipped():
+    class FlakyClient(DraftClient):
+        async def complete_prompt(self, prompt, **params):
+            if params.get("seed") == 1:
+                raise RuntimeError("boom")
+            return await super().complete_prompt(prompt, **params)
+
+    writer = make_writer(FlakyClient())
+    config = SpeculationConfig(n=2, temperatures=(0.3,), seeds=(1, 2), scorer=length_scorer)
+    result = await speculate(writer, "Mr.Editor", "Go", config)
+    assert result.response == "draft@0.3"
+    assert result.failed == 1
+
+    class BrokenClient(DraftClient):
+        async def complete_prompt(self, prompt, **params):
+            raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await speculate(make_writer(BrokenClient()), "Mr.Editor", "Go", config)
+
+
+@pytest.mark.asyncio
+async def test_editor_scorer_parses_rating():
+    class RatingClient:
+        async def complete_prompt(self, prompt, **params):
+            assert params["temperature"] == 0
+            return "Rating: 8"
+
+    score = make_editor_scorer(RatingClient())
+    assert await score("# Title") == pytest.approx(0.8)
+
+
+def test_structure_scorer_prefers_structured_drafts():
+    plain = "just some words " * 50
+    structured = "Response: ok\n\nBlog Post:\n# Title\n## Section\n### Detail\n" + plain
+    assert structure_scorer("") == 0.0
+    assert structure_scorer(structured) > structure_scorer(plain)
+
+
+@pytest.mark.asyncio
+async def test_manager_speculates_for_configured_agents_only():
+    client = DraftClient()
+    writer = make_writer(client)
+
+    class Editor:
+        name = "Mr.Editor"
+
+        async def send_message(self, user, message):
+            return f"edit of {message}"
+
+    config = SpeculationConfig(n=2, temperatures=(0.4, 0.8), scorer=length_scorer, agents=("Miss Writer",))
+    manager = ConversationManager([writer, Editor()], max_concurrency=4, speculation=config)
+    turns = await manager.start_conversation("s1", "user", "Write about tea")
+    assert turns == [("Miss Writer", "draft@0.8"), ("Mr.Editor", "edit of draft@0.8")]
+    assert len(client.calls) == 2
+    assert len(writer.history) == 1
+
+
+def test_default_speculates_for_the_writer_only():
+    manager = ConversationManager([], chatbot_factory=list, speculation=SpeculationConfig())
+    assert manager._speculates("Miss Writer")
+    assert not manager._speculates("Mr.Editor")
+    everyone = ConversationManager([], chatbot_factory=list, speculation=SpeculationConfig(agents=None))
+    assert everyone._speculates("Mr.Editor")
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from stream_sinks import RESET, ConsoleSink, LogFileSink, stream_to_sinks
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.mark.asyncio
+class TestStreamSinks:
+    async def test_console_sink_colors_and_prefix(self):
+        out = io.StringIO()
+        text = await stream_to_sinks(chunks("Dear ", "Editor"), ConsoleSink("Miss Writer:", stream=out))
+        assert text == "Dear Editor"
+        assert out.getvalue() == "\x1b[33mMiss Writer:: Dear Editor\n\n" + RESET
+
+    async def test_log_sink_appends_incrementally(self, tmp_path):
+        path = tmp_path / "ChatLog.txt"
+        path.write_text("earlier\n\n", encoding="utf-8")
+        sink = LogFileSink(str(path), "Mr.Editor:")
+        stream = chunks("Needs ", "work")
+        await stream_to_sinks(stream, sink)
+        assert path.read_text(encoding="utf-8") == "earlier\n\nMr.Editor: Needs work\n\n"
+
+    async def test_sinks_closed_on_error(self, tmp_path):
+        async def failing():
+            yield "half"
+            raise ConnectionError("dropped")
+
+        path = tmp_path / "ChatLog.txt"
+        with pytest.raises(ConnectionError):
+            await stream_to_sinks(failing(), LogFileSink(str(path), "Mr.Editor:"))
+        assert path.read_text(encoding="utf-8") == "Mr.Editor: half\n\n"
+
+    async def test_log_sink_shares_open_file(self, tmp_path):
+        path = tmp_path / "ChatLog.txt"
+        with open(path, "a", encoding="utf-8") as log:
+            await stream_to_sinks(chunks("one"), LogFileSink(log, "Miss Writer:"))
+            await stream_to_sinks(chunks("two"), LogFileSink(log, "Mr.Editor:"))
+            assert not log.closed
+        assert path.read_text(encoding="utf-8") == "Miss Writer: one\n\nMr.Editor: two\n\n"
@@ -0,0 +1,103 @@
+import json
+import pickle
+
+import pytest
+
+from benchmark import measure_turn_memory
+from chatbot import Chatbot
+from context_window import ContextWindow
+from conversation_manager import ConversationManager
+from memory import BufferMemory
+from turn_record import StringArena, TurnRecord
+
+
+class DummyTemplate:
+    def format(self, **kwargs):
+        return "You are a helpful agent."
+
+
+class EchoClient:
+    async def complete_prompt(self, prompt, **params):
+        return f"re: {prompt[-1]['content']}"
+
+
+def make_bot(arena=None):
+    return Chatbot(EchoClient(), {"buffer": BufferMemory()}, DummyTemplate(), name="Miss Writer",
+                   context_window=ContextWindow(), arena=arena)
+
+
+def test_turn_record_behaves_like_a_tuple():
+    record = TurnRecord("alice", "hello", "hi")
+    assert record == ("alice", "hello", "hi") and ("alice", "hello", "hi") == record
+    assert record[0] == "alice" and record[-1] == "hi" and record[1:] == ("hello", "hi")
+    user, message, response = record
+    assert (user, message, response) == ("alice", "hello", "hi")
+    assert len(record) == 3 and list(record) == ["alice", "hello", "hi"]
+    assert hash(record) == hash(("alice", "hello", "hi"))
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(IndexError):
+        record[3]
+
+
+def test_arena_keeps_one_copy():
+    arena = StringArena()
+    first = "".join(["long ", "message"])
+    second = "".join(["long ", "mess", "age"])
+    assert first is not second
+    assert arena.intern(first) is first and arena.intern(second) is first
+    assert arena.text(None) == "" and arena.text(42) == "42"
+    state = arena.share({"messages": [["x", "".join(["long ", "message"])]], "n": 3})
+    assert state["messages"][0][1] is first and state["n"] == 3
+    record = arena.record("bob", second, second)
+    assert record.message is first and record.response is first
+
+
+@pytest.mark.asyncio
+async def test_chatbot_structures_share_message_text():
+    bot = make_bot()
+    await bot.send_message("alice", "Write a post")
+    record = bot.history[-1]
+    assert isinstance(record, TurnRecord)
+    messages = list(bot.context)
+    assert messages[0]["content"] is record.message
+    assert messages[1]["content"] is record.response
+    assert bot.memory_modules["buffer"].messages[-1] is record.message
+
+
+def test_restore_deduplicates_decoded_copies():
+    bot = make_bot()
+    for i in range(3):
+        bot._commit("Mr.Editor", f"message {i}", f"reply {i}")
+    state = json.loads(json.dumps(bot.snapshot()))
+    clone = make_bot()
+    clone.restore(state)
+    assert clone.history == bot.history
+    for record, (user, assistant) in zip(clone.history, zip(*[iter(list(clone.context))] * 2)):
+        assert user["content"] is record.message and assistant["content"] is record.response
+    assert clone.memory_modules["buffer"].messages[-1] is clone.history[-1].message
+
+
+@pytest.mark.asyncio
+async def test_session_agents_log_and_turns_share_one_arena():
+    manager = ConversationManager([], chatbot_factory=lambda: [make_bot(), make_bot()])
+    turns = await manager.start_conversation("s", "Mr.Editor", "Start")
+    session = manager.sessions["s"]
+    writer, editor = session.chatbots
+    assert writer.arena is session.arena and editor.arena is session.arena
+    assert turns[0][1] is writer.history[0].response is editor.history[0].message
+    assert manager.log[1][2] is editor.history[0].message
+
+
+def test_memory_benchmark_shows_savings():
+    before = measure_turn_memory(turns=20, chars=1000, shared=False)
+    after = measure_turn_memory(turns=20, chars=1000)
+    assert after < before / 2
+
+
+def test_live_session_memory_is_measured():
+    before = measure_turn_memory(turns=20, chars=1000, shared=False, live=True)
+    after = measure_turn_memory(turns=20, chars=1000, live=True)
+    # A live session keeps one copy of each reply across history, buffer, window and log.
+    assert 1000 < after < 1.25 * before
+    assert after < measure_turn_memory(turns=20, chars=1000, shared=False)
@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vector_memory import VectorStoreMemory
+
+
+def random_vectors(n, dim, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+class TestVectorStoreMemory:
+    def test_add_and_exact_search(self):
+        store = VectorStoreMemory(dim=3, capacity=1)
+        store.add_vector([1, 0, 0], "x-axis")
+        store.add_vector([0, 1, 0], "y-axis")
+        store.add_vector([0.9, 0.1, 0], "near-x")
+        results = store.search([1, 0, 0], k=2)
+        assert [payload for payload, _ in results] == ["x-axis", "near-x"]
+        assert results[0][1] == pytest.approx(1.0)
+        assert len(store) == 3
+
+    def test_default_payload_is_id(self):
+        store = VectorStoreMemory(dim=2)
+        ids = store.add_vectors([[1, 0], [0, 1]])
+        assert ids == [0, 1]
+        assert store.search([0, 1], k=1)[0][0] == 1
+
+    def test_empty_store_and_bad_input(self):
+        store = VectorStoreMemory(dim=2)
+        assert store.search([1, 0]) == []
+        with pytest.raises(ValueError):
+            store.add_vectors([[1, 0]], payloads=["a", "b"])
+        with pytest.raises(ValueError):
+            VectorStoreMemory(dim=0)
+
+    def test_batched_search_matches_single(self):
+        store = VectorStoreMemory(dim=8)
+        store.add_vectors(random_vectors(50, 8))
+        queries = random_vectors(4, 8, seed=1)
+        batch = store.search_batch(queries, k=3)
+        single = [store.search(q, k=3) for q in queries]
+        assert [[p for p, _ in r] for r in batch] == [[p for p, _ in r] for r in single]
+
+    def test_ivf_index_recall(self):
+        # Embeddings of real text are clustered; mimic that with noisy copies of a few topics.
+        topics = random_vectors(20, 16, seed=2)
+        data = np.repeat(topics, 100, axis=0) + 0.3 * random_vectors(2000, 16)
+        store = VectorStoreMemory(dim=16, exact_threshold=1000, n_probe=8)
+        store.add_vectors(data)
+        assert store.indexed
+        exact = VectorStoreMemory(dim=16, exact_threshold=10 ** 9)
+        exact.add_vectors(data)
+        queries = topics + 0.3 * random_vectors(20, 16, seed=3)
+        hits = sum(
+            len({p for p, _ in store.search(q, k=10)} & {p for p, _ in exact.search(q, k=10)})
+            for q in queries
+        )
+        assert hits / 200 >= 0.8
+
+    def test_incremental_insert_after_index(self):
+        store = VectorStoreMemory(dim=4, exact_threshold=100)
+        store.add_vectors(random_vectors(100, 4))
+        store.add_vector([0, 0, 0, 1], "late")
+        assert store.search([0, 0, 0, 1], k=1)[0][0] == "late"
+
+    def test_save_and_mmap_load(self, tmp_path):
+        store = VectorStoreMemory(dim=4, exact_threshold=64)
+        store.add_vectors(random_vectors(80, 4), payloads=[f"turn {i}" for i in range(80)])
+        store.save(str(tmp_path / "store"))
+        loaded = VectorStoreMemory.load(str(tmp_path / "store"))
+        assert loaded.indexed
+        assert isinstance(loaded._vectors, np.memmap)
+        query = random_vectors(1, 4, seed=9)[0]
+        assert loaded.search(query, k=5) == store.search(query, k=5)
+        loaded.add_vector([1, 0, 0, 0], "new")
+        assert len(loaded) == 81
+        assert loaded.search([1, 0, 0, 0], k=1)[0][0] == "new"
@@ -0,0 +1,54 @@
+from typing import Any, Callable, List, Mapping, Optional
+
+# Tokens OpenAI adds around each chat message (role markers and separators).
+MESSAGE_OVERHEAD = 4
+
+
+class TokenCounter:
+    """
+    Counts tokens for budgeting. Uses tiktoken when it is installed; otherwise falls back
+    to a ~4-characters-per-token estimate that errs on the high side for English text.
+    """
+
+    def __init__(self, model: str = "gpt-4", encode: Optional[Callable[[str], List[int]]] = None):
+        """
+        Args:
+            model: Model whose tokenizer should be used if tiktoken is available.
+            encode: Optional explicit encoder (text -> token ids), mainly for tests.
+        """
+        self.model = model
+        self._encode = encode
+        self._resolved = encode is not None
+
+    def count(self, text: str) -> int:
+        """
+        Args:
+            text: Text to measure.
+        Returns:
+            Number of tokens in ``text``.
+        """
+        if not self._resolved:
+            self._encode = self._load_encoder()
+            self._resolved = True
+        if self._encode is not None:
+            return len(self._encode(text))
+        return (len(text) + 3) // 4
+
+    def count_message(self, message: Mapping[str, Any]) -> int:
+        """
+        Args:
+            message: Chat message with ``role`` and ``content``.
+        Returns:
+            Tokens the message occupies in a chat request.
+        """
+        return self.count(str(message.get("content") or "")) + MESSAGE_OVERHEAD
+
+    def _load_encoder(self) -> Optional[Callable[[str], List[int]]]:
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model).encode
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base").encode
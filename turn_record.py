@@ -0,0 +1,122 @@
+import sys
+from typing import Any, Dict, Iterator, Union
+
+
+class TurnRecord:
+    """
+    One history entry: who spoke to the agent, what they said and what the agent replied.
+    Slotted (no per-instance ``__dict__``) and indexable like the ``(user, message,
+    response)`` tuples it replaces, so ``entry[1]``, unpacking and comparison with
+    tuples keep working. The user name is interned; texts come from a StringArena.
+    """
+
+    __slots__ = ("user", "message", "response")
+
+    def __init__(self, user: str, message: str, response: Any):
+        self.user = sys.intern(user) if type(user) is str else user
+        self.message = message
+        self.response = response
+
+    def __len__(self) -> int:
+        return 3
+
+    def __iter__(self) -> Iterator[Any]:
+        yield self.user
+        yield self.message
+        yield self.response
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (TurnRecord, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return f"TurnRecord({self.user!r}, {self.message!r}, {self.response!r})"
+
+    def __reduce__(self) -> Any:
+        return (TurnRecord, tuple(self))
+
+
+class StringArena:
+    """
+    Session-scoped store holding one copy of each distinct message text. Texts passed
+    through the same arena come back as the same object, so a session's history, buffer
+    memory, context window, turns and log all reference a single copy -- most notably
+    after a checkpoint restore, where JSON decoding would otherwise create a fresh copy
+    per structure. The arena lives as long as its session; its own cost is one dict slot
+    per distinct text, which the history references anyway.
+    """
+
+    __slots__ = ("_texts",)
+
+    def __init__(self) -> None:
+        self._texts: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, text: object) -> bool:
+        return text in self._texts
+
+    def intern(self, text: str) -> str:
+        """
+        Args:
+            text: Message text.
+        Returns:
+            The arena's copy of ``text`` (``text`` itself the first time it is seen).
+        """
+        return self._texts.setdefault(text, text)
+
+    def text(self, response: Any) -> str:
+        """
+        Args:
+            response: A completion result; non-strings (e.g. API response objects) are
+                converted once so the original object need not be kept alive.
+        Returns:
+            The arena's copy of the response text.
+        """
+        return self.intern(response if isinstance(response, str) else str(response or ""))
+
+    def record(self, user: str, message: str, response: Any) -> TurnRecord:
+        """
+        Args:
+            user: The user who sent the message.
+            message: The message content.
+            response: The agent's response.
+        Returns:
+            A TurnRecord referencing the arena's copies of the texts.
+        """
+        return TurnRecord(user, self.intern(message), self.text(response))
+
+    def share(self, value: Any) -> Any:
+        """
+        Replaces every string inside a JSON-like structure with the arena's copy.
+        Args:
+            value: A string, or lists / tuples / dicts of them (e.g. decoded checkpoint state).
+        Returns:
+            The same structure; lists and dicts are updated in place.
+        """
+        if isinstance(value, str):
+            return self.intern(value)
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                value[index] = self.share(item)
+            return value
+        if isinstance(value, tuple):
+            return tuple(self.share(item) for item in value)
+        if isinstance(value, dict):
+            for key, item in value.items():
+                value[key] = self.share(item)
+            return value
+        return value
+
+    def clear(self) -> None:
+        self._texts.clear()
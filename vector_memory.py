@@ -0,0 +1,243 @@
+import json
+import os
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from lazy_import import LazyModule
+
+# NumPy is imported on first use, keeping startup cheap for processes that never recall.
+np = LazyModule("numpy")
+
+SearchResult = Tuple[Any, float]
+
+
+class VectorStoreMemory:
+    """
+    Vector store memory for semantic recall. Embeddings live in one contiguous float32
+    array (grown by doubling) so small stores are searched exactly with a single matrix
+    multiply. Once the store reaches ``exact_threshold`` vectors an IVF index (k-means
+    coarse quantizer) is built and queries only scan the ``n_probe`` closest lists.
+    Scores are cosine similarities.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int = 1024,
+        exact_threshold: int = 20000,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            dim: Embedding dimensionality.
+            capacity: Initial number of rows allocated.
+            exact_threshold: Store size at which the IVF index is built automatically.
+            n_lists: Number of IVF lists; defaults to ~sqrt(size) when the index is built.
+            n_probe: Number of IVF lists scanned per query.
+            seed: Seed for k-means initialisation.
+        """
+        if dim < 1:
+            raise ValueError("dim must be positive.")
+        self.dim = dim
+        self.exact_threshold = exact_threshold
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.payloads: List[Any] = []
+        self._vectors = np.empty((max(capacity, 1), dim), dtype=np.float32)
+        self._size = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._indexed_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """Read-only view of the stored (normalised) vectors."""
+        view = self._vectors[: self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def indexed(self) -> bool:
+        return self._centroids is not None
+
+    def add_vector(self, v: Sequence[float], payload: Any = None) -> int:
+        """
+        Stores one embedding.
+        Args:
+            v: Embedding of length ``dim``.
+            payload: Value returned by searches (e.g. the message text); defaults to the id.
+        Returns:
+            The vector's id.
+        """
+        return self.add_vectors([v], [payload])[0]
+
+    def add_vectors(self, vectors: Any, payloads: Optional[Iterable[Any]] = None) -> List[int]:
+        """
+        Stores a batch of embeddings.
+        Args:
+            vectors: Array-like of shape (n, dim).
+            payloads: Optional payload per vector.
+        Returns:
+            The ids assigned to the vectors.
+        """
+        batch = self._normalise(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        n = len(batch)
+        payload_list = list(payloads) if payloads is not None else [None] * n
+        if len(payload_list) != n:
+            raise ValueError("Number of payloads does not match number of vectors.")
+        self._reserve(self._size + n)
+        start = self._size
+        self._vectors[start : start + n] = batch
+        self._size += n
+        ids = list(range(start, start + n))
+        self.payloads.extend(p if p is not None else i for p, i in zip(payload_list, ids))
+        if self._centroids is not None:
+            for i, lst in zip(ids, self._assign(batch)):
+                self._lists[lst].append(i)
+            if self._size >= 2 * self._indexed_size:
+                self.build_index()
+        elif self._size >= self.exact_threshold:
+            self.build_index()
+        return ids
+
+    def search(self, query: Sequence[float], k: int = 5) -> List[SearchResult]:
+        """
+        Finds the stored vectors most similar to ``query``.
+        Args:
+            query: Query embedding.
+            k: Number of results.
+        Returns:
+            Up to ``k`` (payload, cosine similarity) pairs, best first.
+        """
+        return self.search_batch([query], k)[0]
+
+    def search_batch(self, queries: Any, k: int = 5) -> List[List[SearchResult]]:
+        """
+        Searches several queries at once.
+        Args:
+            queries: Array-like of shape (m, dim).
+            k: Number of results per query.
+        Returns:
+            One result list per query.
+        """
+        q = self._normalise(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(len(q))]
+        if self._centroids is None:
+            return [self._top_k(row, None, k) for row in q @ self._vectors[: self._size].T]
+        probe = min(self.n_probe, len(self._centroids))
+        nearest_lists = np.argsort(-(q @ self._centroids.T), axis=1)[:, :probe]
+        results = []
+        for query_vector, lists in zip(q, nearest_lists):
+            candidates = np.fromiter(
+                (i for lst in lists for i in self._lists[lst]), dtype=np.int64
+            )
+            if len(candidates) == 0:
+                results.append([])
+                continue
+            scores = self._vectors[candidates] @ query_vector
+            results.append(self._top_k(scores, candidates, k))
+        return results
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10) -> None:
+        """
+        (Re)builds the IVF index over all stored vectors with spherical k-means.
+        Args:
+            n_lists: Number of lists; defaults to the configured value or ~sqrt(size).
+            iterations: k-means iterations.
+        """
+        data = self._vectors[: self._size]
+        n_lists = n_lists or self.n_lists or max(1, int(np.sqrt(self._size)))
+        n_lists = min(n_lists, self._size)
+        if n_lists == 0:
+            return
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(self._size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, data)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = self._normalise(sums)
+        self._install_index(centroids, np.argmax(data @ centroids.T, axis=1))
+
+    def save(self, path: str) -> None:
+        """
+        Persists the store to a directory (``.npy`` arrays plus JSON payloads).
+        Args:
+            path: Target directory; created if missing.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self._vectors[: self._size])
+        meta = {"dim": self.dim, "n_probe": self.n_probe, "exact_threshold": self.exact_threshold}
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "payloads": self.payloads}, f)
+        if self._centroids is not None:
+            assignment = np.empty(self._size, dtype=np.int32)
+            for lst, ids in enumerate(self._lists):
+                assignment[ids] = lst
+            np.save(os.path.join(path, "centroids.npy"), self._centroids)
+            np.save(os.path.join(path, "assignment.npy"), assignment)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "VectorStoreMemory":
+        """
+        Loads a store saved with ``save``. With ``mmap`` the vectors are memory-mapped
+        read-only and only copied into RAM on the first insert.
+        Args:
+            path: Directory written by ``save``.
+            mmap: Whether to memory-map the vector file.
+        Returns:
+            The loaded store.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            saved = json.load(f)
+        meta = saved["meta"]
+        store = cls(meta["dim"], capacity=1, exact_threshold=meta["exact_threshold"], n_probe=meta["n_probe"])
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r" if mmap else None)
+        store._vectors = vectors
+        store._size = len(vectors)
+        store.payloads = saved["payloads"]
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            store._install_index(np.load(centroids_path), np.load(os.path.join(path, "assignment.npy")))
+        return store
+
+    def _install_index(self, centroids: "np.ndarray", assignment: "np.ndarray") -> None:
+        self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._lists = [[] for _ in range(len(centroids))]
+        for i, lst in enumerate(assignment.tolist()):
+            self._lists[lst].append(i)
+        self._indexed_size = self._size
+
+    def _assign(self, batch: "np.ndarray") -> List[int]:
+        return np.argmax(batch @ self._centroids.T, axis=1).tolist()
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= len(self._vectors) and self._vectors.flags.writeable:
+            return
+        capacity = max(needed, 2 * len(self._vectors))
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[: self._size] = self._vectors[: self._size]
+        self._vectors = grown
+
+    def _top_k(self, scores: "np.ndarray", ids: Optional["np.ndarray"], k: int) -> List[SearchResult]:
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self.payloads[int(ids[i]) if ids is not None else int(i)], float(scores[i]))
+            for i in top
+        ]
+
+    @staticmethod
+    def _normalise(matrix: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32, copy=False)